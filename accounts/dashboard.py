@@ -0,0 +1,210 @@
+"""
+Donation figures for the user dashboard.
+
+Each donor has a DonorSummary row (lifetime total, donation count and
+their last RECENT_LIMIT donations) and one DonorAnimalStats row per
+animal they support. ``apply_donation()`` updates them from the payment
+status hook whenever a payment starts or stops counting as succeeded,
+inside the payment's transaction and under a lock on the summary row;
+``refresh_donation()`` catches donor details filled in later.
+The dashboard then reads one summary row and the per-animal rows; its
+cost no longer depends on how many donations the user has made.
+
+``computed_summaries()`` derives the same figures from hot and archived
+payments; ``manage.py rebuild_donor_summaries`` uses it to verify or
+rebuild the store.
+"""
+from copy import copy
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+
+RECENT_LIMIT = 10
+MESSAGE_LENGTH = 100
+CENTS = Decimal('0.01')
+
+# Columns the animal cards need (see {% animal_image %})
+ANIMAL_FIELDS = ('name', 'slug', 'species', 'is_active', 'image', 'image_variants')
+RECENT_FIELDS = ('id', 'amount', 'created_at', 'message', 'animal__name')
+
+
+def recent_entry(row):
+    """Stored form of a donation in ``DonorSummary.recent``."""
+    return {
+        'id': row['id'],
+        'amount': str(Decimal(str(row['amount'])).quantize(CENTS)),
+        'created_at': row['created_at'].isoformat(),
+        'animal': row['animal__name'] or '',
+        'message': (row['message'] or '')[:MESSAGE_LENGTH],
+    }
+
+
+def payment_entry(payment):
+    return recent_entry({
+        'id': payment.pk,
+        'amount': payment.amount,
+        'created_at': payment.created_at,
+        'message': payment.message,
+        'animal__name': payment.animal.name if payment.animal_id else '',
+    })
+
+
+def entry_key(entry):
+    return parse_datetime(entry['created_at']), entry['id']
+
+
+def latest_donations(user_ids=None, limit=RECENT_LIMIT):
+    """
+    ``{user_id: [entry, ...]}``, newest first, from hot and archived
+    payments, for the given users or (``None``) every donor.
+    """
+    from payments.archive import payment_models
+    latest = {}
+    for model in payment_models():
+        qs = model.objects.filter(status='succeeded', user__isnull=False)
+        if user_ids is not None:
+            qs = qs.filter(user_id__in=user_ids)
+        rows = (
+            qs.annotate(rank=Window(
+                RowNumber(), partition_by=[F('user_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(rank__lte=limit)
+            .values('user_id', *RECENT_FIELDS)
+        )
+        for row in rows:
+            latest.setdefault(row['user_id'], []).append(recent_entry(row))
+    return {
+        user_id: sorted(entries, key=entry_key, reverse=True)[:limit]
+        for user_id, entries in latest.items()
+    }
+
+
+def apply_donation(payment, delta, amount=None):
+    """
+    Add (delta=1) or remove (delta=-1) a succeeded payment from its
+    donor's figures, counting ``amount`` instead of its current amount
+    if given. Guest donations have no summary.
+    """
+    from .models import DonorAnimalStats, DonorSummary
+    if not payment.user_id:
+        return
+    amount = Decimal(str(payment.amount if amount is None else amount))
+
+    DonorSummary.objects.get_or_create(user_id=payment.user_id)
+    summary = DonorSummary.objects.select_for_update().get(user_id=payment.user_id)
+    summary.total_donated += delta * amount
+    summary.donation_count += delta
+
+    recent = [entry for entry in summary.recent if entry['id'] != payment.pk]
+    if delta > 0:
+        recent.append(payment_entry(payment))
+        recent.sort(key=entry_key, reverse=True)
+    elif len(recent) < len(summary.recent) == RECENT_LIMIT:
+        # A full list lost an entry: older donations may need to move up
+        recent = latest_donations([payment.user_id]).get(payment.user_id, [])
+    summary.recent = recent[:RECENT_LIMIT]
+    summary.save()
+
+    if payment.animal_id:
+        # Safe without ON CONFLICT: the summary row lock serialises the donor
+        stats = DonorAnimalStats.objects.filter(
+            user_id=payment.user_id, animal_id=payment.animal_id)
+        if not stats.update(total_donated=F('total_donated') + delta * amount,
+                            donation_count=F('donation_count') + delta):
+            DonorAnimalStats.objects.create(
+                user_id=payment.user_id, animal_id=payment.animal_id,
+                total_donated=delta * amount, donation_count=delta)
+        if delta < 0:
+            stats.filter(donation_count__lte=0).delete()
+
+
+def refresh_donation(payment, previous_user_id):
+    """
+    Bring a succeeded payment's figures up to date after its donor or
+    message was filled in without a status change: move it to its new
+    donor, or rewrite its entry in the recent list.
+    """
+    from .models import DonorSummary
+    if payment.status != 'succeeded':
+        return
+    if previous_user_id != payment.user_id:
+        if previous_user_id:
+            previous = copy(payment)
+            previous.user_id = previous_user_id
+            apply_donation(previous, -1)
+        apply_donation(payment, 1)
+        return
+    summary = DonorSummary.objects.select_for_update().filter(user_id=payment.user_id).first()
+    if summary is None:
+        return
+    summary.recent = [payment_entry(payment) if entry['id'] == payment.pk else entry
+                      for entry in summary.recent]
+    summary.save(update_fields=['recent', 'updated_at'])
+
+
+def donation_summary(user):
+    """
+    Return the dashboard context: ``total_donated``, ``total_donations``,
+    ``animal_stats`` (``[{'animal', 'donation_count', 'total_donated'}]``,
+    highest total first) and ``donations`` (the recent list).
+    """
+    from .models import DonorAnimalStats, DonorSummary
+    summary = DonorSummary.objects.filter(user=user).first() or DonorSummary(user=user)
+    animal_stats = (
+        DonorAnimalStats.objects.filter(user=user)
+        .select_related('animal')
+        .only('total_donated', 'donation_count',
+              *(f'animal__{field}' for field in ANIMAL_FIELDS))
+        .order_by('-total_donated', 'animal_id')
+    )
+    return {
+        'total_donated': summary.total_donated,
+        'total_donations': summary.donation_count,
+        'animal_stats': [
+            {'animal': stats.animal, 'donation_count': stats.donation_count,
+             'total_donated': stats.total_donated}
+            for stats in animal_stats
+        ],
+        'donations': [
+            {
+                'amount': Decimal(entry['amount']),
+                'created_at': parse_datetime(entry['created_at']),
+                'animal': {'name': entry['animal']},
+                'message': entry['message'],
+            }
+            for entry in summary.recent
+        ],
+    }
+
+
+def computed_summaries():
+    """
+    Figures derived from hot and archived payments:
+    ``({user_id: (total, count, recent)}, {(user_id, animal_id): (total, count)})``.
+    """
+    from payments.archive import payment_models
+    totals = {}
+    animals = {}
+    for model in payment_models():
+        rows = (
+            model.objects.filter(status='succeeded', user__isnull=False)
+            .order_by()
+            .values('user_id', 'animal_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in rows:
+            user_id, animal_id = row['user_id'], row['animal_id']
+            total, count = totals.get(user_id, (Decimal('0.00'), 0))
+            totals[user_id] = (total + row['total'], count + row['count'])
+            if animal_id is not None:
+                total, count = animals.get((user_id, animal_id), (Decimal('0.00'), 0))
+                animals[(user_id, animal_id)] = (total + row['total'], count + row['count'])
+    latest = latest_donations()
+    summaries = {
+        user_id: (total, count, latest.get(user_id, []))
+        for user_id, (total, count) in totals.items()
+    }
+    return summaries, animals
@@ -0,0 +1,108 @@
+"""
+Precomputed "updates from animals you support" feeds.
+
+The dashboard used to need Payment -> Animal -> AnimalUpdate joined and
+sorted on every visit. Instead each supporter has a FeedEntry per
+update, written once:
+
+    - when an update is published, it is fanned out to every
+      registered user with a succeeded donation to the animal;
+    - when a user supports an animal for the first time, that animal's
+      recent updates are copied into their feed.
+
+Reading a feed is then a single index range scan on
+(user, published_at). Feeds are capped at FEED_LIMIT entries: after
+each write the oldest entries beyond the cap are trimmed, so storage
+grows with the number of users, not with users x updates.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+FEED_LIMIT = 200
+BATCH_SIZE = 1000
+
+
+def supporter_ids(animal_id):
+    """
+    Registered users with at least one succeeded donation to the animal,
+    hot or archived.
+    """
+    from payments.archive import payment_models
+    hot, archived = (
+        model.objects
+        .filter(animal_id=animal_id, status='succeeded', user__isnull=False)
+        .order_by()
+        .values_list('user_id', flat=True)
+        for model in payment_models()
+    )
+    return hot.union(archived)
+
+
+def trim_feeds(user_ids):
+    """Delete entries beyond FEED_LIMIT (oldest first) for the given users."""
+    from .models import FeedEntry
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        ranked = FeedEntry.objects.filter(
+            user_id__in=user_ids[start:start + BATCH_SIZE]
+        ).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=[F('published_at').desc(), F('id').desc()],
+            )
+        ).filter(position__gt=FEED_LIMIT)
+        stale = list(ranked.values_list('pk', flat=True))
+        if stale:
+            FeedEntry.objects.filter(pk__in=stale).delete()
+
+
+def publish_update(update):
+    """Fan a published update out to every supporter of its animal."""
+    from .models import FeedEntry
+    FeedEntry.objects.filter(update=update).update(published_at=update.published_at)
+    user_ids = list(supporter_ids(update.animal_id))
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, update=update, published_at=update.published_at)
+            for user_id in user_ids
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    trim_feeds(user_ids)
+
+
+def unpublish_update(update):
+    from .models import FeedEntry
+    FeedEntry.objects.filter(update=update).delete()
+
+
+def follow_animal(user_id, animal_id):
+    """Backfill a new supporter's feed with the animal's recent updates."""
+    from animals.models import AnimalUpdate
+    from .models import FeedEntry
+    updates = AnimalUpdate.objects.filter(
+        animal_id=animal_id, is_published=True
+    ).values_list('pk', 'published_at')[:FEED_LIMIT]
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, update_id=pk, published_at=published_at)
+            for pk, published_at in updates
+        ],
+        ignore_conflicts=True,
+    )
+    trim_feeds([user_id])
+
+
+def user_feed(user, limit=20):
+    """Newest feed entries for a user, with their update and animal."""
+    from .models import FeedEntry
+    return (
+        FeedEntry.objects
+        .filter(user=user)
+        .select_related('update__animal')
+        .only('published_at', 'update__title', 'update__body',
+              'update__animal__name', 'update__animal__slug')
+        [:limit]
+    )
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.dashboard import computed_summaries
+from accounts.models import DonorAnimalStats, DonorSummary
+from payments.locking import lock_tables
+
+
+def recent_figures(recent):
+    return [(entry['id'], entry['amount'], entry['message']) for entry in recent]
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user donation summaries from hot and archived payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help="Only compare stored summaries and report differences")
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = self.compare(self.stored(), *computed_summaries())
+            for label, have, want in mismatches:
+                self.stdout.write(f"{label}: stored {have}, expected {want}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} donor summaries are stale.")
+            self.stdout.write(self.style.SUCCESS("Donor summaries are consistent."))
+            return
+
+        # Computed under the lock, so no concurrent donation is lost (see payments.locking)
+        with transaction.atomic():
+            lock_tables(DonorSummary, DonorAnimalStats)
+            stored = self.stored()
+            DonorAnimalStats.objects.all().delete()
+            DonorSummary.objects.all().delete()
+            summaries, animals = computed_summaries()
+            mismatches = self.compare(stored, summaries, animals)
+            DonorSummary.objects.bulk_create([
+                DonorSummary(user_id=user_id, total_donated=total,
+                             donation_count=count, recent=recent)
+                for user_id, (total, count, recent) in summaries.items()
+            ], batch_size=1000)
+            DonorAnimalStats.objects.bulk_create([
+                DonorAnimalStats(user_id=user_id, animal_id=animal_id,
+                                 total_donated=total, donation_count=count)
+                for (user_id, animal_id), (total, count) in animals.items()
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt summaries for {len(summaries)} donors ({len(mismatches)} corrected)."
+        ))
+
+    def stored(self):
+        stored = {
+            f"User {summary.user_id}": (summary.total_donated, summary.donation_count,
+                                        recent_figures(summary.recent))
+            for summary in DonorSummary.objects.all()
+        }
+        stored.update({
+            f"User {user_id}, animal {animal_id}": (total, count)
+            for user_id, animal_id, total, count in DonorAnimalStats.objects.values_list(
+                'user_id', 'animal_id', 'total_donated', 'donation_count')
+        })
+        return stored
+
+    def compare(self, stored, summaries, animals):
+        """(label, stored, expected) for every figure that differs."""
+        # Animal names in recent donations are snapshots, so are not compared
+        expected = {
+            f"User {user_id}": (total, count, recent_figures(recent))
+            for user_id, (total, count, recent) in summaries.items()
+        }
+        expected.update({
+            f"User {user_id}, animal {animal_id}": figures
+            for (user_id, animal_id), figures in animals.items()
+        })
+        mismatches = []
+        for label in sorted(set(expected) | set(stored)):
+            empty = (0, 0) if ', animal' in label else (0, 0, [])
+            have, want = stored.get(label, empty), expected.get(label, empty)
+            if have != want:
+                mismatches.append((label, have, want))
+        return mismatches
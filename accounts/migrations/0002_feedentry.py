@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0007_animalupdate'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_at', models.DateTimeField()),
+                ('update', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='animals.animalupdate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Feed entries',
+                'ordering': ['-published_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-published_at', '-id'], name='feed_entry_timeline_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'update'), name='feed_entry_user_update_unique'),
+        ),
+    ]
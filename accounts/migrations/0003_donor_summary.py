@@ -0,0 +1,108 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:53
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import RowNumber
+import django.db.models.deletion
+
+RECENT_LIMIT = 10
+
+
+def backfill_donor_summaries(apps, schema_editor):
+    DonorSummary = apps.get_model('accounts', 'DonorSummary')
+    DonorAnimalStats = apps.get_model('accounts', 'DonorAnimalStats')
+    totals, animals, recent = {}, {}, {}
+    for model in ('Payment', 'PaymentArchive'):
+        succeeded = apps.get_model('payments', model).objects.filter(
+            status='succeeded', user__isnull=False).order_by()
+        rows = succeeded.values('user_id', 'animal_id').annotate(
+            total=Sum('amount'), count=Count('id'))
+        for row in rows:
+            keys = [(totals, row['user_id'])]
+            if row['animal_id'] is not None:
+                keys.append((animals, (row['user_id'], row['animal_id'])))
+            for figures, key in keys:
+                total, count = figures.get(key, (Decimal('0.00'), 0))
+                figures[key] = (total + row['total'], count + row['count'])
+        latest = (
+            succeeded.annotate(rank=Window(
+                RowNumber(), partition_by=[F('user_id')],
+                order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(rank__lte=RECENT_LIMIT)
+            .values('user_id', 'id', 'amount', 'created_at', 'message', 'animal__name')
+        )
+        for row in latest:
+            recent.setdefault(row['user_id'], []).append(row)
+
+    summaries = []
+    for user_id, (total, count) in totals.items():
+        rows = sorted(recent.get(user_id, []),
+                      key=lambda row: (row['created_at'], row['id']), reverse=True)
+        summaries.append(DonorSummary(
+            user_id=user_id,
+            total_donated=total,
+            donation_count=count,
+            recent=[
+                {
+                    'id': row['id'],
+                    'amount': str(row['amount']),
+                    'created_at': row['created_at'].isoformat(),
+                    'animal': row['animal__name'] or '',
+                    'message': row['message'][:100],
+                }
+                for row in rows[:RECENT_LIMIT]
+            ],
+        ))
+    DonorSummary.objects.bulk_create(summaries, batch_size=1000)
+    DonorAnimalStats.objects.bulk_create([
+        DonorAnimalStats(user_id=user_id, animal_id=animal_id,
+                         total_donated=total, donation_count=count)
+        for (user_id, animal_id), (total, count) in animals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0007_animalupdate'),
+        ('accounts', '0002_feedentry'),
+        ('payments', '0013_payment_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='donor_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_donated', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('recent', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Donor summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='DonorAnimalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_donated', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='animals.animal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donor_animal_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Donor animal stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donoranimalstats',
+            constraint=models.UniqueConstraint(fields=('user', 'animal'), name='donor_animal_stats_unique'),
+        ),
+        migrations.RunPython(backfill_donor_summaries, migrations.RunPython.noop),
+    ]
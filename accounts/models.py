@@ -1,8 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from payments.signals import payment_donor_changed, payment_status_changed
 
 
 class CustomUser(AbstractUser):
@@ -124,6 +125,86 @@ class UserDeletionRequest(models.Model):
         self.save()
 
 
+class FeedEntry(models.Model):
+    """
+    One AnimalUpdate in a user's "animals you support" feed.
+
+    Rows are written when an update is published or when the user first
+    supports the animal (see accounts.feeds), and trimmed to
+    FEED_LIMIT per user. ``published_at`` is copied from the update so
+    a feed is read from the (user, published_at) index alone.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    update = models.ForeignKey('animals.AnimalUpdate', on_delete=models.CASCADE,
+                               related_name='feed_entries')
+    published_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-published_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'update'],
+                                    name='feed_entry_user_update_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-published_at', '-id'],
+                         name='feed_entry_timeline_idx'),
+        ]
+        verbose_name_plural = 'Feed entries'
+
+    def __str__(self):
+        return f"Update {self.update_id} for {self.user_id}"
+
+
+class DonorSummary(models.Model):
+    """
+    A user's lifetime donation figures, kept up to date as payments
+    succeed, are refunded or corrected, so the dashboard reads one row
+    instead of aggregating their history (see accounts.dashboard).
+
+    ``recent`` holds the last RECENT_LIMIT succeeded donations, newest
+    first, as plain dicts. The per-animal breakdown is in
+    DonorAnimalStats. ``manage.py rebuild_donor_summaries`` recomputes
+    (or just verifies) both from the payments.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='donor_summary'
+    )
+    total_donated = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    recent = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Donor summaries'
+
+    def __str__(self):
+        return f"£{self.total_donated} donated by user {self.user_id}"
+
+
+class DonorAnimalStats(models.Model):
+    """One user's donation totals for one animal."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE,
+                             related_name='donor_animal_stats')
+    animal = models.ForeignKey('animals.Animal', on_delete=models.CASCADE,
+                               related_name='+')
+    total_donated = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'animal'],
+                                    name='donor_animal_stats_unique'),
+        ]
+        verbose_name_plural = 'Donor animal stats'
+
+    def __str__(self):
+        return f"£{self.total_donated} from user {self.user_id} to animal {self.animal_id}"
+
+
 # Simplified signal
 @receiver(post_save, sender=CustomUser)
 def manage_user_profile(sender, instance, created, **kwargs):
@@ -135,3 +216,53 @@ def manage_user_profile(sender, instance, created, **kwargs):
     else:
         # Update existing profile or create if missing
         UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender='animals.AnimalUpdate')
+def fan_out_animal_update(sender, instance, **kwargs):
+    """Copy a published update into its supporters' feeds."""
+    from .feeds import publish_update, unpublish_update
+    if instance.is_published:
+        publish_update(instance)
+    else:
+        unpublish_update(instance)
+
+
+@receiver(payment_status_changed)
+def follow_supported_animal(sender, payment, previous_status, **kwargs):
+    """A user's first succeeded donation to an animal subscribes them to it."""
+    if payment.status != 'succeeded' or previous_status == 'succeeded':
+        return
+    if not (payment.user_id and payment.animal_id):
+        return
+    first_donation = not sender.objects.filter(
+        user_id=payment.user_id, animal_id=payment.animal_id, status='succeeded',
+    ).exclude(pk=payment.pk).exists()
+    if first_donation:
+        from .feeds import follow_animal
+        follow_animal(payment.user_id, payment.animal_id)
+
+
+@receiver(payment_status_changed)
+def update_donor_summary(sender, payment, previous_status, previous_amount=None, **kwargs):
+    """Count a payment in or out of its donor's summary."""
+    from .dashboard import apply_donation
+    if previous_status == 'succeeded':
+        apply_donation(payment, -1, amount=previous_amount)
+    if payment.status == 'succeeded':
+        apply_donation(payment, 1)
+
+
+@receiver(post_delete, sender='payments.Payment')
+def remove_deleted_donor_donation(sender, instance, **kwargs):
+    """A deleted succeeded payment no longer counts for its donor."""
+    if instance._saved_status == 'succeeded':
+        from .dashboard import apply_donation
+        apply_donation(instance, -1, amount=instance._saved_amount)
+
+
+@receiver(payment_donor_changed)
+def refresh_donor_summary(sender, payment, previous_user_id, **kwargs):
+    """Follow a succeeded payment whose donor or message was filled in later."""
+    from .dashboard import refresh_donation
+    refresh_donation(payment, previous_user_id)
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.dashboard import RECENT_LIMIT, donation_summary
+from accounts.models import DonorAnimalStats, DonorSummary
+from animals.models import Animal
+from payments.archive import archive_chunk, archive_cutoff
+from payments.models import Payment
+from payments.testing import make_payment
+
+User = get_user_model()
+
+
+class DonorSummaryTests(TestCase):
+    """
+    Tests for materialised donor summaries.
+
+    These tests verify that:
+    - Succeeded payments are added to the donor's totals, per-animal
+      figures and recent list; other statuses and guests are not.
+    - Refunds, amount corrections and deletes are taken back out.
+    - A donor or message filled in after the payment succeeded is
+      picked up.
+    - The recent list is trimmed, and refilled from older donations.
+    - rebuild_donor_summaries --verify passes on incremental updates,
+      reports stale summaries (including messages), and a rebuild
+      fixes them.
+    - Archiving payments leaves the summaries unchanged.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='donor', password='testpass123')
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+        self.max = Animal.objects.create(name='Max', species='Goat', description='A goat')
+
+    def donate(self, amount=10, animal=None, status='succeeded', guest=False, when=None):
+        return make_payment(status, when, user=None if guest else self.user,
+                            animal=animal or self.lucky, amount=amount)
+
+    def figures(self):
+        summary = DonorSummary.objects.get(user=self.user)
+        return summary.total_donated, summary.donation_count, [
+            entry['id'] for entry in summary.recent]
+
+    def animal_figures(self):
+        return list(
+            DonorAnimalStats.objects.filter(user=self.user).order_by('animal__name')
+            .values_list('animal__name', 'donation_count', 'total_donated')
+        )
+
+    def assert_consistent(self):
+        out = StringIO()
+        call_command('rebuild_donor_summaries', verify=True, stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+    def test_success_is_counted(self):
+        first = self.donate(10)
+        second = self.donate(25, animal=self.max)
+        self.donate(99, status='failed')
+        self.donate(50, guest=True)
+
+        self.assertEqual(self.figures(), (Decimal('35.00'), 2, [second.pk, first.pk]))
+        self.assertEqual(self.animal_figures(),
+                         [('Lucky', 1, Decimal('10.00')), ('Max', 1, Decimal('25.00'))])
+        self.assertEqual(DonorSummary.objects.count(), 1)
+        self.assert_consistent()
+
+    def test_refund_correction_and_delete(self):
+        first = self.donate(10)
+        second = self.donate(20)
+        second.amount = 30
+        second.save()
+        self.assertEqual(self.figures(), (Decimal('40.00'), 2, [second.pk, first.pk]))
+        self.assertEqual(DonorSummary.objects.get().recent[0]['amount'], '30.00')
+
+        second.status = 'refunded'
+        second.save()
+        self.assertEqual(self.figures(), (Decimal('10.00'), 1, [first.pk]))
+        first.delete()
+        self.assertEqual(self.figures(), (Decimal('0.00'), 0, []))
+        self.assertEqual(self.animal_figures(), [])
+        self.assert_consistent()
+
+    def test_recent_list_is_trimmed_and_refilled(self):
+        start = timezone.now() - timedelta(days=30)
+        payments = [self.donate(when=start + timedelta(days=day))
+                    for day in range(RECENT_LIMIT + 2)]
+        newest_first = [payment.pk for payment in reversed(payments)]
+        self.assertEqual(self.figures()[2], newest_first[:RECENT_LIMIT])
+
+        # Refunding a listed donation brings the next older one up
+        payments[-1].status = 'refunded'
+        payments[-1].save()
+        self.assertEqual(self.figures()[2], newest_first[1:RECENT_LIMIT + 1])
+        self.assert_consistent()
+
+    def test_verify_reports_stale_summaries(self):
+        self.donate(10)
+        DonorSummary.objects.update(total_donated=Decimal('5.00'))
+        DonorAnimalStats.objects.update(donation_count=3)
+        with self.assertRaisesMessage(CommandError, '2 donor summaries are stale'):
+            call_command('rebuild_donor_summaries', verify=True, stdout=StringIO())
+
+        call_command('rebuild_donor_summaries', stdout=StringIO())
+        self.assertEqual(self.figures()[:2], (Decimal('10.00'), 1))
+        self.assert_consistent()
+
+    def test_details_filled_in_after_success(self):
+        # The webhook worker records the payments before the form is posted
+        own = Payment.objects.create(
+            user=self.user, animal=self.lucky, amount=10, email='donor@example.com',
+            status='succeeded', stripe_payment_intent_id='pi_own')
+        guest = Payment.objects.create(
+            animal=self.lucky, amount=15, email='donor@example.com',
+            status='succeeded', stripe_payment_intent_id='pi_guest')
+        self.assertEqual(self.figures(), (Decimal('10.00'), 1, [own.pk]))
+
+        self.client.login(username='donor', password='testpass123')
+        url = reverse('payments:process_donation', args=[self.lucky.slug])
+        for intent_id in ('pi_own', 'pi_guest'):
+            self.client.post(url, {'amount': '10', 'payment_intent_id': intent_id,
+                                   'message': 'Go Lucky!'})
+        self.assertEqual(self.figures(), (Decimal('25.00'), 2, [guest.pk, own.pk]))
+        self.assertEqual([entry['message'] for entry in DonorSummary.objects.get().recent],
+                         ['Go Lucky!', 'Go Lucky!'])
+        self.assert_consistent()
+
+        # --verify compares messages too
+        Payment.objects.filter(pk=own.pk).update(message='Edited')
+        with self.assertRaisesMessage(CommandError, '1 donor summaries are stale'):
+            call_command('rebuild_donor_summaries', verify=True, stdout=StringIO())
+
+    def test_archived_payments_stay_counted(self):
+        old = self.donate(10, when=timezone.now() - timedelta(days=200))
+        new = self.donate(20)
+        archive_chunk(archive_cutoff())
+        self.assertFalse(Payment.objects.filter(pk=old.pk).exists())
+
+        self.assertEqual(self.figures(), (Decimal('30.00'), 2, [new.pk, old.pk]))
+        self.assert_consistent()
+        summary = donation_summary(self.user)
+        self.assertEqual([donation['animal']['name'] for donation in summary['donations']],
+                         ['Lucky', 'Lucky'])
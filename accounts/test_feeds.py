@@ -0,0 +1,99 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import feeds
+from accounts.models import FeedEntry
+from animals.models import Animal, AnimalUpdate
+from payments.models import Payment
+
+User = get_user_model()
+
+
+class SupporterFeedTests(TestCase):
+    """
+    Tests for precomputed supporter feeds.
+
+    These tests verify that:
+    - Publishing an update fans it out to the animal's donors only.
+    - A first donation backfills the animal's earlier updates.
+    - Drafts and unpublished updates are kept out of feeds.
+    - Feeds are trimmed to FEED_LIMIT, oldest first.
+    - The dashboard and the animal page show the updates.
+    """
+    def setUp(self):
+        self.donor = User.objects.create_user(username='donor', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse'
+        )
+
+    def donate(self, user, animal=None):
+        return Payment.objects.create(
+            user=user, animal=animal or self.animal, amount=10,
+            email=f'{user.username}@example.com', status='succeeded',
+            stripe_payment_intent_id=f'pi_{Payment.objects.count()}',
+        )
+
+    def post_update(self, title='New shoes', **kwargs):
+        return AnimalUpdate.objects.create(
+            animal=self.animal, title=title, body='Lucky got new shoes.', **kwargs
+        )
+
+    def test_publish_fans_out_to_supporters(self):
+        self.donate(self.donor)
+        self.donate(self.donor)
+        update = self.post_update()
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user__username', 'update')),
+            [('donor', update.pk)],
+        )
+
+    def test_first_donation_backfills_feed(self):
+        update = self.post_update()
+        self.post_update(title='Draft', is_published=False)
+        self.donate(self.donor)
+        self.assertEqual(
+            list(FeedEntry.objects.filter(user=self.donor).values_list('update', flat=True)),
+            [update.pk],
+        )
+
+    def test_unpublishing_removes_entries(self):
+        self.donate(self.donor)
+        update = self.post_update()
+        update.is_published = False
+        update.save()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_feeds_are_trimmed(self):
+        self.donate(self.donor)
+        start = timezone.now()
+        with mock.patch.object(feeds, 'FEED_LIMIT', 3):
+            for day in range(5):
+                self.post_update(title=f'Day {day}', published_at=start + timedelta(days=day))
+        self.assertEqual(
+            [entry.update.title for entry in feeds.user_feed(self.donor)],
+            ['Day 4', 'Day 3', 'Day 2'],
+        )
+
+    def test_dashboard_reads_feed(self):
+        self.donate(self.donor)
+        self.post_update()
+        self.client.login(username='donor', password='testpass123')
+        with self.assertNumQueries(1):
+            entries = list(feeds.user_feed(self.donor))
+            self.assertEqual(entries[0].update.animal.name, 'Lucky')
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertContains(response, 'Updates from animals you support')
+        self.assertContains(response, 'New shoes')
+
+    def test_animal_page_lists_updates(self):
+        url = reverse('animals:detail', args=[self.animal.slug])
+        etag = self.client.get(url)['ETag']
+        self.post_update()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'New shoes')
@@ -1,7 +1,14 @@
+from decimal import Decimal
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from animals.models import Animal
+from payments.models import Payment
+
 User = get_user_model()
 
 
@@ -46,3 +53,40 @@ class DashboardViewTests(TestCase):
         self.assertEqual(response.context['total_donations'], 0)
         # No animal stats yet, so should be empty list
         self.assertEqual(len(response.context['animal_stats']), 0)
+
+    def donate(self, animal, amount, count=1, status='succeeded'):
+        for _ in range(count):
+            Payment.objects.create(
+                user=self.user, animal=animal, amount=amount, email='test@example.com',
+                status=status, stripe_payment_intent_id=f'pi_{Payment.objects.count()}')
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('accounts:dashboard'))
+        return response, len(queries)
+
+    def test_dashboard_aggregates_in_database(self):
+        """Test totals per animal and a fixed number of queries"""
+        lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+        max_ = Animal.objects.create(name='Max', species='Goat', description='A goat')
+        self.client.login(username='testuser', password='testpass123')
+        self.donate(lucky, 5)
+        self.dashboard_queries()  # warm site-wide caches
+        _, baseline = self.dashboard_queries()
+
+        self.donate(lucky, 5, count=14)
+        self.donate(max_, 100)
+        self.donate(None, 3)
+        self.donate(max_, 50, status='failed')
+        response, queries = self.dashboard_queries()
+        self.assertEqual(queries, baseline)
+
+        self.assertEqual(response.context['total_donated'], Decimal('178.00'))
+        self.assertEqual(response.context['total_donations'], 17)
+        self.assertEqual(
+            [(stats['animal'].name, stats['donation_count'], stats['total_donated'])
+             for stats in response.context['animal_stats']],
+            [('Max', 1, Decimal('100.00')), ('Lucky', 15, Decimal('75.00'))],
+        )
+        self.assertEqual(len(response.context['donations']), 10)
+        self.assertContains(response, 'To Lucky')
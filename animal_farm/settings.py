@@ -39,6 +39,19 @@ STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
 
+# Payment provider client (see payments.gateway). Set
+# PAYMENT_GATEWAY=payments.gateway.FakeGateway for offline load tests.
+PAYMENT_GATEWAY = os.environ.get(
+    'PAYMENT_GATEWAY', 'payments.gateway.StripeGateway')
+PAYMENT_GATEWAY_OPTIONS = {
+    key: float(os.environ[env])
+    for key, env in (
+        ('latency', 'PAYMENT_GATEWAY_LATENCY'),
+        ('failure_rate', 'PAYMENT_GATEWAY_FAILURE_RATE'),
+    )
+    if os.environ.get(env)
+}
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '.herokuapp.com']
 
 
@@ -101,8 +114,20 @@ LOGOUT_REDIRECT_URL = "/"
 # Sites Framework (required)
 SITE_ID = 1
 
-# Email Backend (Console for Development)
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Email Backend (Console for Development). Receipts go through the
+# outbox (payments.outbox); set EMAIL_BACKEND and EMAIL_HOST* for SMTP.
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 25))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "") == "1"
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get(
+    "DEFAULT_FROM_EMAIL", "AnimalRescue <donations@animalrescue.example>"
+)
 
 ACCOUNT_ADAPTER = "accounts.adapters.CustomAccountAdapter"
 
@@ -113,6 +138,7 @@ ACCOUNT_FORMS = {
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'animals.middleware.AnimalMediaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -162,8 +188,41 @@ DATABASES = {
 if 'test' in sys.argv:
     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
 
+# Cache shared by every web worker and management command: the catalog
+# version tokens, ETags and wall/update caches must be seen by all of
+# them. Production uses Redis (set REDIS_URL); without it the database
+# cache (`manage.py createcachetable`, run in the release phase) works,
+# but turns every cache read into a query, so only use it for small or
+# local setups.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
+if 'test' in sys.argv:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 CLOUDINARY_URL = os.environ.get("CLOUDINARY_URL")
 
+# Animal photos: Cloudinary by default, or local disk for offline work
+# and benchmarks ('animals.media.LocalMediaBackend', needs Pillow),
+# served by WhiteNoise (animals.middleware) or the web server
+ANIMAL_MEDIA_BACKEND = os.environ.get(
+    'ANIMAL_MEDIA_BACKEND', 'animals.media.CloudinaryMediaBackend')
+ANIMAL_MEDIA_ROOT = os.environ.get(
+    'ANIMAL_MEDIA_ROOT', os.path.join(BASE_DIR, 'media', 'animals'))
+ANIMAL_MEDIA_URL = '/media/animals/'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -24,6 +24,7 @@ urlpatterns = [
     path('accounts/', include('allauth.urls')),
     path('admin/', admin.site.urls),
     path('animals/', include('animals.urls', namespace='animals')),
+    path('api/', include('animals.api_urls', namespace='api')),
     path('payments/', include('payments.urls')),
     path('volunteer/', volunteer_info, name='volunteer_info'),
     path('', home, name='home'),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Animal
+from .models import Category, Animal, AnimalUpdate
 
 
 # Register your models here.
@@ -14,4 +14,12 @@ class AnimalAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_active')
     search_fields = ('name', 'species', 'breed')
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(AnimalUpdate)
+class AnimalUpdateAdmin(admin.ModelAdmin):
+    list_display = ('title', 'animal', 'is_published', 'published_at')
+    list_filter = ('is_published',)
+    search_fields = ('title', 'animal__name')
+    autocomplete_fields = ('animal',)
+    date_hierarchy = 'published_at'
@@ -0,0 +1,161 @@
+"""
+Read-only JSON API over the animal catalog.
+
+Endpoints (mounted under /api/):
+    animals/                 keyset-paginated list
+    animals/<slug>/          single animal
+    categories/              all categories
+
+Query parameters for the list:
+    category=<slug>   species=<name>   limit=<1-100>
+    after=<cursor>    before=<cursor>
+    fields=name,slug,...   sparse fieldset (defaults skip long text)
+
+Rows are read with ``values()``, so only the requested columns are
+selected and the category is joined in the same query. No model
+instances are built. Responses carry an ETag derived from the catalog
+generation and a Cache-Control suitable for a shared cache.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .cache import catalog_generation
+from .conditional import make_etag
+from .models import Animal, Category
+from .pagination import InvalidCursor, KeysetPaginator
+
+# Public field name -> ORM lookup
+ANIMAL_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'slug': 'slug',
+    'species': 'species',
+    'breed': 'breed',
+    'category': 'category__slug',
+    'category_name': 'category__name',
+    'images': 'image_variants',
+    'updated_at': 'updated_at',
+    'description': 'description',
+    'story': 'story',
+}
+LIST_FIELDS = [name for name in ANIMAL_FIELDS if name not in ('description', 'story')]
+CATEGORY_FIELDS = ['name', 'slug', 'description']
+
+ORDERING = ('name', 'id')
+DEFAULT_LIMIT = 24
+MAX_LIMIT = 100
+
+MAX_AGE = 60
+SHARED_MAX_AGE = 300
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def json_response(data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    response = HttpResponse(body, status=status, content_type='application/json')
+    if status == 200:
+        patch_cache_control(response, public=True, max_age=MAX_AGE, s_maxage=SHARED_MAX_AGE)
+    return response
+
+
+def api_etag(request, *args, **kwargs):
+    return make_etag('api', request.get_full_path(), catalog_generation())
+
+
+def requested_fields(request, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in ANIMAL_FIELDS]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def serialize(rows, fields):
+    return [
+        {name: row[ANIMAL_FIELDS[name]] for name in fields}
+        for row in rows
+    ]
+
+
+def limit_param(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest("limit must be a number")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def page_link(request, name, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[name] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+@require_GET
+@condition(etag_func=api_etag)
+def animal_list(request):
+    try:
+        fields = requested_fields(request, LIST_FIELDS)
+        limit = limit_param(request)
+
+        qs = Animal.objects.filter(is_active=True)
+        if request.GET.get('category'):
+            qs = qs.filter(category__slug=request.GET['category'])
+        if request.GET.get('species'):
+            qs = qs.filter(species__iexact=request.GET['species'])
+
+        # The sort key is always selected so cursors can be built
+        columns = {ANIMAL_FIELDS[name] for name in fields} | set(ORDERING)
+        paginator = KeysetPaginator(qs.values(*columns), ORDERING, limit)
+        page = paginator.page(
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+        results = serialize(page, fields)
+    except (BadRequest, InvalidCursor) as error:
+        return json_response({'error': str(error) or "Invalid cursor"}, status=400)
+
+    return json_response({
+        'results': results,
+        'next': page_link(request, 'after', page.next_cursor),
+        'previous': page_link(request, 'before', page.previous_cursor),
+    })
+
+
+@require_GET
+@condition(etag_func=api_etag)
+def animal_detail(request, slug):
+    try:
+        fields = requested_fields(request, list(ANIMAL_FIELDS))
+    except BadRequest as error:
+        return json_response({'error': str(error)}, status=400)
+
+    row = Animal.objects.filter(slug=slug).values(
+        *{ANIMAL_FIELDS[name] for name in fields}
+    ).first()
+    if row is None:
+        return json_response({'error': "Not found"}, status=404)
+    return json_response(serialize([row], fields)[0])
+
+
+@require_GET
+@condition(etag_func=api_etag)
+def category_list(request):
+    categories = list(Category.objects.values(*CATEGORY_FIELDS))
+    for category in categories:
+        category['animals'] = reverse('api:animal_list') + f"?category={category['slug']}"
+    return json_response({'results': categories})
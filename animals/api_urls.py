@@ -0,0 +1,10 @@
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('animals/', api.animal_list, name='animal_list'),
+    path('animals/<slug:slug>/', api.animal_detail, name='animal_detail'),
+    path('categories/', api.category_list, name='category_list'),
+]
@@ -0,0 +1,141 @@
+"""
+Cache versioning for catalog data.
+
+Cached data is stamped with a version token kept in the shared Django
+cache (Redis or the database cache, see settings.CACHES). Anything that
+changes the data bumps the token, so every process notices on its next
+check that its copy is stale. No process needs to know about the
+others, as long as the cache really is shared: with a per-process
+backend such as LocMemCache a bump is only seen by its own process.
+
+Tokens are random rather than counters. If the shared key is ever
+evicted, a fresh token cannot accidentally match an old copy.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+NAV_VERSION_KEY = 'animals:nav:version'
+CATALOG_VERSION_KEY = 'animals:catalog:generation'
+NAV_CHECK_INTERVAL = 5  # seconds a process trusts its nav copy unchecked
+
+
+def get_version(key):
+    """Return the current version token for ``key``, creating one if needed."""
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    """
+    Invalidate everything stamped with the current token for ``key``.
+
+    The token is bumped at once and again on commit. Without the second
+    bump, another process could reload the old rows between the two
+    moments and keep them under the new token.
+    """
+    cache.set(key, uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+class CategoryNav:
+    """
+    Per-process copy of the category navigation.
+
+    Each process keeps its own list of categories. At most every
+    NAV_CHECK_INTERVAL seconds it checks that list against the shared
+    version token, and reloads only when the token has changed, so most
+    renders cost no cache read and no queries. Other processes may show
+    a changed category for up to that interval; the process that made
+    the change drops its copy at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self._categories = []
+
+    def load(self):
+        from .models import Category
+        queryset = Category.objects.only('name', 'slug')
+        # Optional per-category active animal counts
+        if getattr(settings, 'CATEGORY_NAV_COUNTS', False):
+            queryset = queryset.annotate(
+                active_count=Count('animals', filter=Q(animals__is_active=True))
+            )
+        return list(queryset)
+
+    def get(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < NAV_CHECK_INTERVAL:
+            return self._categories
+        version = get_version(NAV_VERSION_KEY)
+        if version != self._version:
+            categories = self.load()
+            with self._lock:
+                self._version, self._categories = version, categories
+        self._checked_at = now
+        return self._categories
+
+    def clear(self):
+        with self._lock:
+            self._version, self._checked_at, self._categories = None, None, []
+
+
+category_nav = CategoryNav()
+
+
+def invalidate_category_nav():
+    bump_version(NAV_VERSION_KEY)
+    category_nav.clear()
+
+
+def catalog_generation():
+    """Token that changes whenever any catalog card could look different."""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def invalidate_catalog():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def animal_detail_key(animal_id):
+    """Version key for per-animal extras shown on the detail page."""
+    return f'animals:detail:{animal_id}:version'
+
+
+def invalidate_animal_detail(animal_ids):
+    for animal_id in set(animal_ids):
+        if animal_id is not None:
+            bump_version(animal_detail_key(animal_id))
+
+
+UPDATES_ON_PAGE = 5
+
+
+def recent_updates(animal_id):
+    """
+    Latest published updates for the animal page, cached under the
+    animal's detail version (bumped whenever an update is saved).
+    """
+    key = f'animals:updates:{animal_id}:{get_version(animal_detail_key(animal_id))}'
+    updates = cache.get(key)
+    if updates is None:
+        from .models import AnimalUpdate
+        updates = list(
+            AnimalUpdate.objects
+            .filter(animal_id=animal_id, is_published=True)
+            .values('title', 'body', 'published_at')[:UPDATES_ON_PAGE]
+        )
+        cache.set(key, updates, 60 * 60)
+    return updates
@@ -0,0 +1,65 @@
+"""
+Validators for conditional GET on animal pages.
+
+Each function takes the view arguments and returns an ETag or a
+Last-Modified value. Django's ``condition`` decorator then answers
+``304 Not Modified`` before any template is rendered.
+
+Pages also show the category nav and the visitor's login state, so
+ETags include the nav version and the user id alongside the content
+version.
+"""
+import hashlib
+
+from .cache import NAV_VERSION_KEY, animal_detail_key, catalog_generation, get_version
+from .models import Animal
+
+
+def make_etag(*parts):
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anonymous'
+
+
+def animal_versions(request, slug):
+    """
+    Id of the animal, plus ``updated_at`` of the animal and of its
+    donation totals, read without loading the rest of either row.
+    Cached on the request so the ETag and Last-Modified checks share
+    one query.
+    """
+    if not hasattr(request, '_animal_versions'):
+        request._animal_versions = Animal.objects.filter(slug=slug).values_list(
+            'id', 'updated_at', 'donation_stats__updated_at'
+        ).first()
+    return request._animal_versions
+
+
+def animal_last_modified(request, slug):
+    versions = animal_versions(request, slug)
+    if versions is None:
+        return None
+    return max(version for version in versions[1:] if version is not None)
+
+
+def animal_etag(request, slug):
+    versions = animal_versions(request, slug)
+    if versions is None:
+        return None
+    animal_id, *timestamps = versions
+    return make_etag(
+        'animal', slug, request.GET.urlencode(),
+        *[timestamp and timestamp.isoformat() for timestamp in timestamps],
+        get_version(animal_detail_key(animal_id)),
+        get_version(NAV_VERSION_KEY), viewer(request),
+    )
+
+
+def catalog_etag(request, slug=None):
+    """Catalog pages change whenever the catalog generation advances."""
+    return make_etag(
+        'catalog', slug or '', request.GET.urlencode(),
+        catalog_generation(), get_version(NAV_VERSION_KEY), viewer(request),
+    )
@@ -1,10 +1,19 @@
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+from .cache import category_nav
+
 
 def categories_context(request):
-    """Make categories available to all templates."""
-    try:
-        categories = Category.objects.all()
-        return {'categories': categories}
-    except Exception:
-        # If database isn't ready yet (e.g., during migrations)
-        return {'categories': []}
+    """
+    Make categories available to all templates.
+
+    Served from the per-process navigation cache, and only resolved
+    when a template actually renders the category links.
+    """
+    def get_categories():
+        try:
+            return category_nav.get()
+        except Exception:
+            # If database isn't ready yet (e.g., during migrations)
+            return []
+
+    return {'categories': SimpleLazyObject(get_categories)}
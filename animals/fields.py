@@ -0,0 +1,20 @@
+from cloudinary.models import CloudinaryField
+from django.core.files.uploadedfile import UploadedFile
+
+from .media import get_media_backend
+
+
+class AnimalImageField(CloudinaryField):
+    """
+    CloudinaryField whose uploads go through the configured media
+    backend, so admin uploads land on local disk when
+    ``ANIMAL_MEDIA_BACKEND`` is the local backend.
+    """
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if isinstance(value, UploadedFile):
+            resource = get_media_backend().store(value)
+            setattr(model_instance, self.attname, resource)
+            return self.get_prep_value(resource)
+        return super().pre_save(model_instance, add)
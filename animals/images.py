@@ -0,0 +1,54 @@
+"""
+Responsive image renditions for animal photos.
+
+Each animal photo is offered in a few named sizes. Every rendition also
+has a double-width "_2x" version for high-density screens. Building the
+URLs is pure string work, but it ran on every card of every render.
+The URLs are now built once, when the image changes, and stored on
+``Animal.image_variants``; the media backend (``animals.media``)
+decides what they are. The ``{% animal_image %}`` template tag reads
+them back as ``src``/``srcset``/``sizes``.
+"""
+from functools import lru_cache
+
+from django.templatetags.static import static
+
+PLACEHOLDER = 'images/animal_placeholder.jpg'
+
+VARIANTS = {
+    'thumb': {'width': 160, 'height': 160, 'crop': 'fill', 'gravity': 'auto'},
+    'card': {'width': 400, 'height': 300, 'crop': 'fill', 'gravity': 'auto'},
+    'detail': {'width': 800, 'height': 600, 'crop': 'limit'},
+}
+
+# Layout hints for the browser, matching the Tailwind grids that use them.
+SIZES = {
+    'thumb': '160px',
+    'card': ('(min-width: 1280px) 20vw, (min-width: 1024px) 25vw, '
+             '(min-width: 768px) 33vw, (min-width: 640px) 50vw, 100vw'),
+    'detail': '(min-width: 768px) 448px, 100vw',
+}
+
+
+@lru_cache(maxsize=None)
+def placeholder_url():
+    """Static URL of the placeholder image, resolved once per process."""
+    return static(PLACEHOLDER)
+
+
+def build_variants(image):
+    """
+    Return ``{'original': url, '<name>': url, '<name>_2x': url, ...}``
+    for an image, or an empty dict if there is no image. URLs come from
+    the configured media backend (see ``animals.media``).
+    """
+    if not image:
+        return {}
+    from .media import get_media_backend
+    return get_media_backend().variants(image)
+
+
+def srcset(variants, name):
+    """Return the ``srcset`` value for a rendition, using width descriptors."""
+    width = VARIANTS[name]['width']
+    return f"{variants[name]} {width}w, {variants[f'{name}_2x']} {width * 2}w"
@@ -0,0 +1,221 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from animals.cache import invalidate_catalog, invalidate_category_nav
+from animals.images import build_variants
+from animals.media import ImageUnavailable, get_media_backend
+from animals.models import Animal, Category, ImportProgress
+from animals.search import index_animals
+from animals.slugs import allocate_slugs
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def read_csv(handle):
+    yield from csv.DictReader(handle)
+
+
+def read_jsonl(handle):
+    for line in handle:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import animals from a CSV or JSONL file. Rows are streamed "
+        "and inserted in batches; images are queued to a manifest and "
+        "uploaded in a separate pass with --images."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV/JSONL file, or the image manifest with --images")
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help="Input format (default: from the file extension)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip rows already committed by a previous run")
+        parser.add_argument('--images', action='store_true',
+                            help="Upload queued images from a manifest written by an import")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if not os.path.exists(options['path']):
+            raise CommandError(f"No such file: {options['path']}")
+        if options['images']:
+            self.upload_images(options['path'], options['resume'])
+        else:
+            self.import_rows(options)
+
+    # Progress tracking
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as handle:
+                return int(handle.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, path, done):
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as handle:
+            handle.write(str(done))
+        os.replace(tmp, path)
+
+    def report(self, label, done, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f"{label}: {done} rows ({done / elapsed:.0f} rows/sec)")
+
+    # Phase 1: rows
+    def import_rows(self, options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in READERS:
+            raise CommandError("Cannot tell the input format; pass --format.")
+        source = os.path.abspath(path)
+        manifest = f'{path}.images.jsonl'
+
+        if options['resume']:
+            skip = ImportProgress.objects.filter(source=source).values_list(
+                'rows_done', flat=True).first() or 0
+        else:
+            skip = 0
+            ImportProgress.objects.filter(source=source).delete()
+            if os.path.exists(manifest):
+                os.remove(manifest)
+
+        self.categories = {}
+        done = imported = skipped = 0
+        started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as handle, \
+                open(manifest, 'a') as images_file:
+            rows = READERS[fmt](handle)
+            if skip:
+                self.stdout.write(f"Resuming after {skip} rows.")
+                for _ in islice(rows, skip):
+                    pass
+            done = skip
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                done += len(batch)
+                created, invalid = self.import_batch(batch, source, done, images_file)
+                imported += created
+                skipped += invalid
+                self.report("Imported", done - skip, started)
+
+        invalidate_catalog()
+        invalidate_category_nav()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {imported} animals imported, {skipped} rows skipped."
+        ))
+        if os.path.getsize(manifest):
+            self.stdout.write(f"Images queued in {manifest}; run again with --images to upload.")
+        else:
+            os.remove(manifest)
+
+    def resolve_categories(self, names):
+        """Map category names to ids, creating missing ones in bulk."""
+        missing = {name for name in names if name and name not in self.categories}
+        if missing:
+            Category.objects.bulk_create(
+                [Category(name=name, slug=slugify(name)) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.categories.update(
+                Category.objects.filter(name__in=missing).values_list('name', 'pk')
+            )
+            unresolved = missing - set(self.categories)
+            if unresolved:
+                raise CommandError(
+                    f"Could not create categories (slug clash?): {', '.join(sorted(unresolved))}"
+                )
+        return self.categories
+
+    def import_batch(self, batch, source, done, images_file):
+        """
+        Insert the valid rows of ``batch`` and record ``done`` rows as
+        imported, in one transaction. Their images are queued to the
+        manifest before the commit, so a crash can leave an entry for
+        an animal that was rolled back (updating nothing later) but
+        never lose one. Returns (created, invalid).
+        """
+        rows = [row for row in batch if row.get('name') and row.get('species')]
+
+        with transaction.atomic():
+            animals = []
+            if rows:
+                categories = self.resolve_categories(
+                    {(row.get('category') or '').strip() for row in rows}
+                )
+                slugs = allocate_slugs([row['name'] for row in rows])
+                animals = [
+                    Animal(
+                        name=row['name'].strip(),
+                        slug=slug,
+                        species=row['species'].strip(),
+                        breed=row.get('breed') or None,
+                        description=row.get('description') or '',
+                        story=row.get('story') or None,
+                        category_id=categories.get((row.get('category') or '').strip()),
+                        is_active=str(row.get('is_active', 'true')).strip().lower() in TRUE_VALUES,
+                    )
+                    for row, slug in zip(rows, slugs)
+                ]
+                Animal.objects.bulk_create(animals)
+                index_animals([animal.pk for animal in animals])
+
+            for animal, row in zip(animals, rows):
+                if row.get('image'):
+                    images_file.write(json.dumps(
+                        {'animal_id': animal.pk, 'source': row['image']}) + '\n')
+            images_file.flush()
+            os.fsync(images_file.fileno())
+            ImportProgress.objects.update_or_create(
+                source=source, defaults={'rows_done': done})
+        return len(animals), len(batch) - len(rows)
+
+    # Phase 2: images
+    def upload_images(self, manifest, resume):
+        backend = get_media_backend()
+        checkpoint = f'{manifest}.progress'
+        skip = self.read_checkpoint(checkpoint) if resume else 0
+        done = unavailable = failed = 0
+        started = time.monotonic()
+
+        with open(manifest) as handle:
+            for entry in islice(read_jsonl(handle), skip, None):
+                try:
+                    resource = backend.store(entry['source'])
+                    Animal.objects.filter(pk=entry['animal_id']).update(
+                        image=resource, image_variants=build_variants(resource),
+                    )
+                except ImageUnavailable as error:
+                    unavailable += 1
+                    self.stderr.write(f"Animal {entry['animal_id']}: skipped, {error}")
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f"Animal {entry['animal_id']}: {error}")
+                done += 1
+                self.write_checkpoint(checkpoint, skip + done)
+                if done % 50 == 0:
+                    self.report("Uploaded", done, started)
+
+        invalidate_catalog()
+        self.report("Uploaded", done, started)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {done - unavailable - failed} images, {unavailable} skipped, {failed} failed."
+        ))
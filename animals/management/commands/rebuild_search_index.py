@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from animals.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the animal full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        if rebuild_index():
+            self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                "This database has no full-text backend; "
+                "search falls back to icontains filtering."
+            ))
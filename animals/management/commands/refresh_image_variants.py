@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from animals.cache import invalidate_catalog
+from animals.images import build_variants
+from animals.media import get_media_backend
+from animals.models import Animal
+
+
+class Command(BaseCommand):
+    help = (
+        "Build stored image rendition URLs for animals that have an image "
+        "but no renditions yet (or for every animal with --all). With the "
+        "local media backend this is also the worker that renders the "
+        "derivative files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Rebuild renditions even where they exist")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        animals = Animal.objects.exclude(image__isnull=True).exclude(image='')
+        if not options['all']:
+            animals = animals.filter(~Q(image_variants__has_key='card'))
+
+        backend = get_media_backend()
+        batch, updated = [], 0
+        for animal in animals.only('pk', 'image').iterator(chunk_size=options['batch_size']):
+            try:
+                backend.generate(animal.image)
+            except OSError as error:
+                self.stderr.write(f"Animal {animal.pk}: {error}")
+                continue
+            animal.image_variants = build_variants(animal.image)
+            batch.append(animal)
+            if len(batch) >= options['batch_size']:
+                updated += self.flush(batch)
+        updated += self.flush(batch)
+
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed renditions for {updated} animals."))
+
+    def flush(self, batch):
+        count = len(batch)
+        Animal.objects.bulk_update(batch, ['image_variants'])
+        batch.clear()
+        return count
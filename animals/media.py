@@ -0,0 +1,185 @@
+"""
+Pluggable storage for animal photos.
+
+``settings.ANIMAL_MEDIA_BACKEND`` picks where originals live and how
+renditions are produced:
+
+    - ``CloudinaryMediaBackend`` (default): originals are uploaded to
+      Cloudinary, which renders renditions on demand from URL
+      transformations.
+    - ``LocalMediaBackend``: originals are written under
+      ``ANIMAL_MEDIA_ROOT``. ``manage.py refresh_image_variants`` renders
+      derivatives ahead of time (requires Pillow). Each derivative has a
+      content hash in its name, so the URL never changes meaning and can
+      be served with an immutable Cache-Control by WhiteNoise
+      (animals.middleware) or by the web server. Useful for offline development and load testing.
+
+Both backends store the same "image/upload/v<version>/<public_id>.<fmt>"
+identifier in ``Animal.image``, so switching only affects URLs.
+"""
+import hashlib
+import json
+import os
+import time
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from django.utils.text import slugify
+
+DEFAULT_BACKEND = 'animals.media.CloudinaryMediaBackend'
+FETCH_TIMEOUT = 10  # seconds to wait on a remote image
+
+
+class ImageUnavailable(Exception):
+    """A remote image could not be fetched; the animal keeps no photo."""
+
+
+def get_media_backend():
+    return import_string(getattr(settings, 'ANIMAL_MEDIA_BACKEND', DEFAULT_BACKEND))()
+
+
+class CloudinaryMediaBackend:
+    """Originals and renditions served by Cloudinary."""
+
+    serves_files = False
+
+    def store(self, source, folder='animals'):
+        from cloudinary.uploader import upload_resource
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return upload_resource(source, folder=folder, type='upload', resource_type='image')
+
+    def original_url(self, image):
+        return image.url
+
+    def generate(self, image):
+        """Nothing to prepare: Cloudinary renders transformations on request."""
+
+    def variants(self, image):
+        from .images import VARIANTS
+        urls = {'original': image.url}
+        for name, options in VARIANTS.items():
+            common = {'fetch_format': 'auto', 'quality': 'auto', **options}
+            urls[name] = image.build_url(**common)
+            urls[f'{name}_2x'] = image.build_url(**{
+                **common,
+                'width': options['width'] * 2,
+                'height': options['height'] * 2,
+            })
+        return urls
+
+
+class LocalMediaBackend:
+    """Originals and pre-rendered derivatives on the local filesystem."""
+
+    serves_files = True
+    output_format = 'jpg'
+
+    def __init__(self):
+        self.root = str(getattr(settings, 'ANIMAL_MEDIA_ROOT', ''))
+        self.url = getattr(settings, 'ANIMAL_MEDIA_URL', '/media/animals/')
+        if not self.root:
+            raise ImproperlyConfigured("LocalMediaBackend requires ANIMAL_MEDIA_ROOT.")
+
+    # Paths
+    def original_name(self, image):
+        return f'originals/{image.public_id}.{image.format}'
+
+    def derivative_name(self, image, name, digest):
+        return f'derivatives/{image.public_id}.{name}.{digest}.{self.output_format}'
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split('/'))
+
+    def read_original(self, image):
+        with open(self.path(self.original_name(image)), 'rb') as handle:
+            return handle.read()
+
+    def digest(self, data, spec):
+        """Content hash of the original plus the rendition spec."""
+        sha = hashlib.sha256(data)
+        sha.update(json.dumps(spec, sort_keys=True).encode())
+        return sha.hexdigest()[:12]
+
+    def renditions(self, image):
+        """Yield (key, spec, derivative name) for every rendition of an image."""
+        from .images import VARIANTS
+        data = self.read_original(image)
+        for name, options in VARIANTS.items():
+            for key, scale in ((name, 1), (f'{name}_2x', 2)):
+                spec = {**options, 'width': options['width'] * scale,
+                        'height': options['height'] * scale}
+                yield key, spec, self.derivative_name(image, key, self.digest(data, spec))
+
+    # Backend API
+    def store(self, source, folder='animals'):
+        if hasattr(source, 'read'):
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            data, filename = source.read(), getattr(source, 'name', 'image')
+        elif '://' in str(source):
+            try:
+                with urlopen(source, timeout=FETCH_TIMEOUT) as response:
+                    data, filename = response.read(), str(source).split('?')[0]
+            except (URLError, TimeoutError) as error:
+                raise ImageUnavailable(f"{source}: {error}") from error
+        else:
+            with open(source, 'rb') as handle:
+                data, filename = handle.read(), str(source)
+
+        stem, ext = os.path.splitext(os.path.basename(filename))
+        digest = hashlib.sha256(data).hexdigest()[:8]
+        image = CloudinaryResource(
+            f'{folder}/{slugify(stem) or "image"}-{digest}',
+            format=ext.lstrip('.').lower() or 'jpg',
+            version=int(time.time()),
+            type='upload',
+            resource_type='image',
+        )
+        target = self.path(self.original_name(image))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as handle:
+            handle.write(data)
+        return image
+
+    def original_url(self, image):
+        return f'{self.url}{self.original_name(image)}'
+
+    def generate(self, image):
+        """Render every missing derivative of an image."""
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            raise ImproperlyConfigured("LocalMediaBackend needs Pillow to render derivatives.")
+
+        source = None
+        for key, spec, name in self.renditions(image):
+            target = self.path(name)
+            if os.path.exists(target):
+                continue
+            if source is None:
+                source = Image.open(self.path(self.original_name(image)))
+                source = ImageOps.exif_transpose(source).convert('RGB')
+            size = (spec['width'], spec['height'])
+            if spec['crop'] == 'fill':
+                rendered = ImageOps.fit(source, size)
+            else:
+                rendered = source.copy()
+                rendered.thumbnail(size)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            rendered.save(target, 'JPEG', quality=82, optimize=True, progressive=True)
+
+    def variants(self, image):
+        """URLs of the original and of every derivative rendered so far."""
+        urls = {'original': self.original_url(image)}
+        try:
+            renditions = list(self.renditions(image))
+        except FileNotFoundError:
+            return urls
+        if all(os.path.exists(self.path(name)) for _, _, name in renditions):
+            urls.update({key: f'{self.url}{name}' for key, _, name in renditions})
+        return urls
@@ -0,0 +1,40 @@
+"""
+Serving of local animal media (LocalMediaBackend) through WhiteNoise.
+
+WhiteNoise's own middleware serves the static files it listed at
+startup. Animal media is written later, by uploads and by the
+``refresh_image_variants`` worker, so this second WhiteNoise instance
+looks files up under ANIMAL_MEDIA_ROOT on each request instead: a stat
+per media request, nothing for any other URL. Every media file name
+carries a content hash, so responses are marked immutable.
+
+With the Cloudinary backend the middleware removes itself. Behind a
+web server, serving ANIMAL_MEDIA_ROOT at ANIMAL_MEDIA_URL directly
+takes these requests off the app altogether.
+"""
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .media import get_media_backend
+
+
+class AnimalMediaMiddleware(WhiteNoise):
+
+    def __init__(self, get_response):
+        backend = get_media_backend()
+        if not backend.serves_files:
+            raise MiddlewareNotUsed
+        super().__init__(application=None, autorefresh=True)
+        self.get_response = get_response
+        self.add_files(backend.root, prefix=backend.url)
+
+    def immutable_file_test(self, path, url):
+        # Originals and derivatives alike are named by content hash
+        return True
+
+    def __call__(self, request):
+        media_file = self.find_file(request.path_info)
+        if media_file is not None:
+            return WhiteNoiseMiddleware.serve(media_file, request)
+        return self.get_response(request)
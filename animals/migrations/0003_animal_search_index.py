@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from animals.search import rebuild_index
+    rebuild_index(using=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from animals.search import get_backend
+    backend = get_backend(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0002_alter_category_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
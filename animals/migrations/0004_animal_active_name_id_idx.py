@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0003_animal_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='animal_active_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0004_animal_active_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
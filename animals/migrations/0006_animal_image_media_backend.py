@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:15
+
+import animals.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0005_animal_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='animal',
+            name='image',
+            field=animals.fields.AnimalImageField(blank=True, max_length=255, null=True, verbose_name='animal_image'),
+        ),
+    ]
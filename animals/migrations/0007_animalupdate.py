@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0006_animal_image_media_backend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150)),
+                ('body', models.TextField()),
+                ('is_published', models.BooleanField(default=True)),
+                ('published_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='updates', to='animals.animal')),
+            ],
+            options={
+                'ordering': ['-published_at', '-id'],
+                'indexes': [models.Index(fields=['animal', 'is_published', 'published_at'], name='animal_update_timeline_idx')],
+            },
+        ),
+    ]
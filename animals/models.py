@@ -1,7 +1,13 @@
-from django.db import models
-from cloudinary.models import CloudinaryField
-from django.utils.text import slugify
-from django.templatetags.static import static
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .fields import AnimalImageField
+from .images import build_variants, placeholder_url
+from .slugs import allocate_slug
+
+# Attempts at saving with a freshly allocated slug before giving up.
+SLUG_RETRIES = 5
 
 
 # Create your models here.
@@ -34,7 +40,10 @@ class Animal(models.Model):
     Key features:
         - Linked to a Category (optional: if Category deleted, animal is kept).
         - Automatically generates a unique slug based on the name.
-        - Stores optional Cloudinary image.
+        - Stores optional image (Cloudinary, or local disk via
+          ANIMAL_MEDIA_BACKEND).
+        - Stores precomputed responsive image URLs, refreshed when the
+          image changes.
         - Provides a fallback local static placeholder if no image exists.
         - Includes story, breed and activity status.
         - Tracks creation and update timestamps.
@@ -55,12 +64,15 @@ class Animal(models.Model):
     description = models.TextField()
     story = models.TextField(blank=True, null=True)
 
-    image = CloudinaryField(
+    image = AnimalImageField(
         'animal_image',
         blank=True,
         null=True
     )
 
+    # Rendition URLs built from the image, see animals.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
     is_active = models.BooleanField(default=True)
     date_deceased = models.DateField(blank=True, null=True)
 
@@ -69,35 +81,202 @@ class Animal(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Supports keyset pagination of the public catalog.
+            models.Index(fields=["is_active", "name", "id"],
+                         name="animal_active_name_id_idx"),
+        ]
+
+    # Image the stored variants were built from ('' for none)
+    _variants_source = ''
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'image' in field_names:
+            instance._variants_source = instance._image_key()
+        return instance
+
+    def _image_key(self):
+        if not self.image:
+            return ''
+        field = self._meta.get_field('image')
+        return field.get_prep_value(field.to_python(self.image)) or ''
+
     @property
     def image_or_placeholder(self):
         """
-        Returns the Cloudinary image URL if available,
+        Returns the image URL from the media backend if available,
         otherwise returns a local static placeholder image.
 
         Use this in templates:
             <img src="{{ animal.image_or_placeholder }}" ...>
+        Prefer {% animal_image %} for responsive markup.
+        """
+        if self.image_variants.get('original'):
+            return self.image_variants['original']
+        if self.image:
+            from .media import get_media_backend
+            field = self._meta.get_field('image')
+            return get_media_backend().original_url(field.to_python(self.image))
+        return placeholder_url()
+
+    def refresh_image_variants(self):
+        """
+        Rebuild the stored rendition URLs if the image has changed.
+        Runs after saving because CloudinaryField uploads new files
+        during the save itself.
         """
-        if self.image and getattr(self.image, 'url', None):
-            return self.image.url
-        return static('images/animal_placeholder.jpg')
+        key = self._image_key()
+        if key == self._variants_source and (self.image_variants or not key):
+            return
+        from .cache import invalidate_catalog
+        self.image_variants = build_variants(
+            self._meta.get_field('image').to_python(self.image) if key else None
+        )
+        Animal.objects.filter(pk=self.pk).update(image_variants=self.image_variants)
+        self._variants_source = key
+        invalidate_catalog()
 
     def save(self, *args, **kwargs):
         """
         Auto-generate a unique slug from the name if not provided.
-        Ensures slugs remain unique even when names repeat.
+        Ensures slugs remain unique even when names repeat: the next free
+        suffix is found in one query, and a concurrent save that grabs
+        the same slug first triggers a retry with a fresh allocation.
         """
-        if not self.slug:
-            base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            while Animal.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_new_slug(*args, **kwargs)
+        self.refresh_image_variants()
+
+    def _save_with_new_slug(self, *args, **kwargs):
+        for attempt in range(SLUG_RETRIES):
+            self.slug = allocate_slug(self.name, exclude_pk=self.pk)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                slug_taken = Animal.objects.filter(
+                    slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = None
+                if not slug_taken or attempt == SLUG_RETRIES - 1:
+                    raise
+
+
+class AnimalUpdate(models.Model):
+    """
+    News about an animal for its supporters ("how your money helps").
+
+    Published updates appear on the animal page and are copied into the
+    dashboard feed of everyone who has donated to the animal (see
+    accounts.feeds). Drafts are visible only in the admin.
+
+    Relationships:
+        - Each AnimalUpdate belongs to one Animal (related_name="updates").
+    """
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.CASCADE,
+        related_name="updates"
+    )
+    title = models.CharField(max_length=150)
+    body = models.TextField()
+    is_published = models.BooleanField(default=True)
+    published_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-published_at", "-id"]
+        indexes = [
+            models.Index(fields=["animal", "is_published", "published_at"],
+                         name="animal_update_timeline_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.animal} – {self.title}"
+
+
+class ImportProgress(models.Model):
+    """
+    How many rows of an import file ``manage.py import_animals`` has
+    committed. Updated in the same transaction as each batch of animals,
+    so ``--resume`` never inserts a committed row twice.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    rows_done = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.rows_done} rows"
+
+
+# Search index maintenance
+@receiver(post_save, sender=Animal)
+def index_saved_animal(sender, instance, **kwargs):
+    """Keep the full-text index in step with the saved animal."""
+    from .search import index_animals
+    index_animals([instance.pk])
+
+
+@receiver(post_delete, sender=Animal)
+def unindex_deleted_animal(sender, instance, **kwargs):
+    """Drop a deleted animal from the full-text index."""
+    from .search import remove_animals
+    remove_animals([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_animals(sender, instance, created, **kwargs):
+    """A renamed category changes the indexed text of all its animals."""
+    if not created:
+        from .search import index_category
+        index_category(instance.pk)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_animals(sender, instance, **kwargs):
+    """Note which animals lose their category before SET_NULL runs."""
+    instance._animal_ids = list(
+        instance.animals.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def reindex_uncategorised_animals(sender, instance, **kwargs):
+    """Reindex animals whose category was just removed."""
+    from .search import index_animals
+    index_animals(getattr(instance, '_animal_ids', []))
+
+
+# Category navigation cache
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Animal)
+def invalidate_navigation(sender, **kwargs):
+    """Categories or their animal counts changed: refresh the nav."""
+    from .cache import invalidate_category_nav
+    invalidate_category_nav()
+
+
+# Catalog fragment cache
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Animal)
+def advance_catalog_generation(sender, **kwargs):
+    """Saving, deactivating or deleting changes the rendered card grid."""
+    from .cache import invalidate_catalog
+    invalidate_catalog()
+
+
+# Updates shown on the animal page
+@receiver([post_save, post_delete], sender=AnimalUpdate)
+def invalidate_animal_updates(sender, instance, **kwargs):
+    """The animal page lists its updates, so its ETag must change."""
+    from .cache import invalidate_animal_detail
+    invalidate_animal_detail([instance.animal_id])
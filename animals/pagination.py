@@ -0,0 +1,184 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET/LIMIT plus a COUNT(*), each page remembers the sort key
+of its first and last row. The next page is "rows after the last key",
+the previous page is "rows before the first key". Every page costs one
+indexed range scan of ``per_page + 1`` rows, however deep the visitor
+has scrolled.
+
+Cursors are opaque, URL-safe strings encoding the sort key values.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded or does not fit the ordering."""
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    data = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by a unique ordering, e.g. ``('name', 'id')``.
+
+    Prefix a field with ``-`` for descending order. The last field must
+    be unique (normally the primary key) so that every row has a
+    distinct position. Works with model instances and ``values()`` rows.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def page(self, after=None, before=None):
+        """Return the page after or before a cursor (the first page by default)."""
+        if after:
+            return KeysetPage(self, self.clean_cursor(after), forward=True)
+        if before:
+            return KeysetPage(self, self.clean_cursor(before), forward=False)
+        return KeysetPage(self, None, forward=True)
+
+    def clean_cursor(self, cursor):
+        """Decode ``cursor`` into values of the ordering fields' types."""
+        values = []
+        for name, value in zip(self.fields, decode_cursor(cursor, len(self.fields))):
+            try:
+                value = self.model_field(name).to_python(value)
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(cursor)
+            if value is None:
+                raise InvalidCursor(cursor)
+            values.append(value)
+        return values
+
+    def model_field(self, name):
+        """The model field behind an ordering name such as ``category__name``."""
+        opts = self.queryset.model._meta
+        for part in name.split('__'):
+            field = opts.get_field(part)
+            if field.is_relation:
+                opts = field.related_model._meta
+        return field.target_field if field.is_relation else field
+
+    def key(self, row):
+        """Return the sort key values of a row."""
+        if isinstance(row, dict):
+            return [row[field] for field in self.fields]
+        return [getattr(row, field.replace('__', '.')) for field in self.fields]
+
+    def seek(self, values, forward):
+        """Build the filter selecting rows strictly past ``values``."""
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = self.fields[position]
+            descending = field.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[position]})
+            for previous, value in zip(self.fields[:position], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def reversed_ordering(self):
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+
+class KeysetPage:
+    """
+    A single page of results. Rows are fetched lazily, on first use,
+    so a page that is never iterated never touches the database.
+    """
+
+    def __init__(self, paginator, cursor, forward):
+        self.paginator = paginator
+        self.cursor = cursor
+        self.forward = forward
+        self._rows = None
+        self._has_more = False
+
+    def _fetch(self):
+        if self._rows is not None:
+            return
+        paginator = self.paginator
+        qs = paginator.queryset
+        if self.cursor is not None:
+            qs = qs.filter(paginator.seek(self.cursor, self.forward))
+        ordering = paginator.ordering if self.forward else paginator.reversed_ordering()
+        rows = list(qs.order_by(*ordering)[:paginator.per_page + 1])
+        self._has_more = len(rows) > paginator.per_page
+        rows = rows[:paginator.per_page]
+        if not self.forward:
+            rows.reverse()
+        self._rows = rows
+
+    @property
+    def object_list(self):
+        self._fetch()
+        return self._rows
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        self._fetch()
+        return self._has_more if self.forward else self.cursor is not None
+
+    def has_previous(self):
+        self._fetch()
+        return self.cursor is not None if self.forward else self._has_more
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key(self.object_list[0]))
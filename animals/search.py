@@ -0,0 +1,224 @@
+"""
+Full-text search over the animal catalog.
+
+The index lives outside the Animal table so the model stays portable:
+
+    - PostgreSQL: ``animals_animal_search`` holds a weighted ``tsvector``
+      per animal, backed by a GIN index.
+    - SQLite: ``animals_animal_fts`` is an FTS5 virtual table keyed on
+      the animal id (used locally and by the test suite).
+
+Any other database falls back to plain ``icontains`` filtering.
+
+The index covers name, species, breed, description, story and the
+category name. Every search term is matched as a prefix, so "lu"
+finds "Lucky". Rows are kept up to date by the Animal/Category signals
+in ``animals.models``; ``manage.py rebuild_search_index`` rebuilds
+everything from scratch.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a raw search string into lowercase word tokens."""
+    return [token.lower() for token in TOKEN_RE.findall(query or '')]
+
+
+class PostgresSearchBackend:
+    """tsvector/GIN backed search for production."""
+
+    table = 'animals_animal_search'
+
+    document_sql = (
+        "setweight(to_tsvector('simple', coalesce(a.name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(a.species, '') || ' ' || "
+        "coalesce(a.breed, '') || ' ' || coalesce(c.name, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(a.description, '') || ' ' || "
+        "coalesce(a.story, '')), 'C')"
+    )
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            " animal_id bigint PRIMARY KEY"
+            " REFERENCES animals_animal (id) ON DELETE CASCADE,"
+            " document tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin "
+            f"ON {self.table} USING gin (document)"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, where_sql, params):
+        cursor.execute(
+            f"INSERT INTO {self.table} (animal_id, document) "
+            f"SELECT a.id, {self.document_sql} FROM animals_animal a "
+            f"LEFT JOIN animals_category c ON c.id = a.category_id "
+            f"WHERE {where_sql} "
+            f"ON CONFLICT (animal_id) DO UPDATE SET document = EXCLUDED.document",
+            params,
+        )
+
+    def remove(self, cursor, animal_ids):
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE animal_id = ANY(%s)",
+            [list(animal_ids)],
+        )
+
+    def match_query(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def match_sql(self):
+        return (
+            f"SELECT animal_id FROM {self.table} "
+            f"WHERE document @@ to_tsquery('simple', %s)"
+        )
+
+
+class SQLiteSearchBackend:
+    """FTS5 backed search for local development and tests."""
+
+    table = 'animals_animal_fts'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            "name, species, breed, description, story, category, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, where_sql, params):
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN "
+            f"(SELECT a.id FROM animals_animal a WHERE {where_sql})",
+            params,
+        )
+        cursor.execute(
+            f"INSERT INTO {self.table} "
+            f"(rowid, name, species, breed, description, story, category) "
+            f"SELECT a.id, a.name, a.species, coalesce(a.breed, ''), "
+            f"a.description, coalesce(a.story, ''), coalesce(c.name, '') "
+            f"FROM animals_animal a "
+            f"LEFT JOIN animals_category c ON c.id = a.category_id "
+            f"WHERE {where_sql}",
+            params,
+        )
+
+    def remove(self, cursor, animal_ids):
+        animal_ids = list(animal_ids)
+        placeholders = ', '.join(['%s'] * len(animal_ids))
+        cursor.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})",
+            animal_ids,
+        )
+
+    def match_query(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def match_sql(self):
+        return f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend(using=None):
+    """Return the search backend for the current database, or None."""
+    vendor = (using or connection).vendor
+    backend_class = BACKENDS.get(vendor)
+    return backend_class() if backend_class else None
+
+
+def _where_ids(animal_ids):
+    animal_ids = list(animal_ids)
+    placeholders = ', '.join(['%s'] * len(animal_ids))
+    return f"a.id IN ({placeholders})", animal_ids
+
+
+def index_animals(animal_ids):
+    """(Re)index the given animals. Unknown ids are ignored."""
+    animal_ids = list(animal_ids)
+    backend = get_backend()
+    if backend is None or not animal_ids:
+        return
+    where_sql, params = _where_ids(animal_ids)
+    with connection.cursor() as cursor:
+        backend.index(cursor, where_sql, params)
+
+
+def index_category(category_id):
+    """Reindex every animal in a category (e.g. after a rename)."""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.index(cursor, "a.category_id = %s", [category_id])
+
+
+def remove_animals(animal_ids):
+    """Drop the given animals from the index."""
+    animal_ids = list(animal_ids)
+    backend = get_backend()
+    if backend is None or not animal_ids:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, animal_ids)
+
+
+def rebuild_index(using=None):
+    """Drop and rebuild the whole index. Returns False if unsupported."""
+    conn = using or connection
+    backend = get_backend(conn)
+    if backend is None:
+        return False
+    with conn.cursor() as cursor:
+        backend.drop(cursor)
+        backend.create(cursor)
+        backend.index(cursor, "1 = 1", [])
+    return True
+
+
+def _fallback_filter(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(name__icontains=token) |
+            Q(species__icontains=token) |
+            Q(breed__icontains=token) |
+            Q(description__icontains=token) |
+            Q(story__icontains=token) |
+            Q(category__name__icontains=token)
+        )
+    return queryset
+
+
+def matching(queryset, query):
+    """
+    Restrict an Animal queryset to every search hit for ``query``,
+    leaving the ordering alone. An empty query returns the queryset
+    unchanged.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    backend = get_backend()
+    if backend is None:
+        return _fallback_filter(queryset, tokens)
+    return queryset.filter(
+        pk__in=RawSQL(backend.match_sql(), [backend.match_query(tokens)])
+    )
+
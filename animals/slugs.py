@@ -0,0 +1,83 @@
+"""
+Unique slug allocation for animals.
+
+Popular names ("Bella", "Max") collect many numbered slugs: bella,
+bella-1, bella-2, ... Rather than probing one candidate per query, the
+allocator loads every slug sharing the base in a single indexed prefix
+query and picks the first free suffix locally.
+
+Allocation does not reserve anything, so two concurrent saves can still
+pick the same slug; ``Animal.save()`` retries on the unique constraint.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Leave room for a "-NNNNN" suffix inside the 50 character SlugField.
+MAX_BASE_LENGTH = 44
+
+
+def base_slug(name):
+    """Slugify a name, falling back to "animal" for names with no ASCII."""
+    base = slugify(name)[:MAX_BASE_LENGTH].strip('-')
+    return base or 'animal'
+
+
+def _prefix_filter(bases):
+    return reduce(or_, (
+        Q(slug=base) | Q(slug__startswith=f'{base}-') for base in bases
+    ))
+
+
+def _suffix(slug, base):
+    """Return 0 for the bare base, N for "base-N", None otherwise."""
+    if slug == base:
+        return 0
+    rest = slug[len(base) + 1:]
+    return int(rest) if rest.isdigit() else None
+
+
+def _taken_by_base(bases, exclude_pk=None):
+    from .models import Animal
+    bases = set(bases)
+    taken = {base: set() for base in bases}
+    slugs = Animal.objects.filter(_prefix_filter(bases))
+    if exclude_pk is not None:
+        slugs = slugs.exclude(pk=exclude_pk)
+    for slug in slugs.values_list('slug', flat=True):
+        for base in bases:
+            if slug == base or slug.startswith(f'{base}-'):
+                suffix = _suffix(slug, base)
+                if suffix is not None:
+                    taken[base].add(suffix)
+    return taken
+
+
+def _claim(base, taken):
+    suffix = 0
+    while suffix in taken:
+        suffix += 1
+    taken.add(suffix)
+    return f'{base}-{suffix}' if suffix else base
+
+
+def allocate_slug(name, exclude_pk=None):
+    """Return the first free slug for ``name`` using one query."""
+    base = base_slug(name)
+    return _claim(base, _taken_by_base([base], exclude_pk)[base])
+
+
+def allocate_slugs(names):
+    """
+    Allocate slugs for a batch of new animals with one query.
+
+    Duplicate names within the batch get consecutive suffixes, so the
+    result can be passed straight to ``bulk_create``.
+    """
+    bases = [base_slug(name) for name in names]
+    if not bases:
+        return []
+    taken = _taken_by_base(bases)
+    return [_claim(base, taken[base]) for base in bases]
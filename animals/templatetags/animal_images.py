@@ -0,0 +1,33 @@
+from django import template
+from django.utils.html import format_html
+
+from animals.images import SIZES, placeholder_url, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def animal_image(animal, variant='card', css_class='', loading='lazy'):
+    """
+    Render a responsive <img> for an animal from its stored renditions.
+
+    Usage:
+        {% load animal_images %}
+        {% animal_image animal "card" css_class="w-full h-full object-cover" %}
+
+    Falls back to the full image URL, then to the placeholder, when no
+    renditions have been stored yet.
+    """
+    variants = animal.image_variants or {}
+    if variant in variants:
+        return format_html(
+            '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" '
+            'loading="{}" decoding="async">',
+            variants[variant], srcset(variants, variant), SIZES[variant],
+            animal.name, css_class, loading,
+        )
+    return format_html(
+        '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+        animal.image_or_placeholder if animal.image else placeholder_url(),
+        animal.name, css_class, loading,
+    )
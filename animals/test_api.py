@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.urls import reverse
+from .models import Animal, Category
+from .pagination import encode_cursor
+
+
+class CatalogApiTest(TestCase):
+    """
+    Tests for the read-only JSON catalog API.
+
+    These tests verify that:
+    - Lists are keyset-paginated and skip long text by default.
+    - Sparse fieldsets and category/species filters work.
+    - Responses are cacheable and revalidate with ETags.
+    """
+    def setUp(self):
+        self.goats = Category.objects.create(name="Goats", slug="goats")
+        self.horses = Category.objects.create(name="Horses", slug="horses")
+        for index in range(3):
+            Animal.objects.create(
+                name=f"Goat {index}", species="Goat", category=self.goats,
+                description="Curious", story="Found in a field",
+            )
+        Animal.objects.create(
+            name="Lucky", species="Horse", category=self.horses,
+            description="Friendly",
+        )
+        self.url = reverse('api:animal_list')
+
+    def test_list_defaults(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = response.json()
+        self.assertEqual([row['name'] for row in data['results']],
+                         ["Goat 0", "Goat 1", "Goat 2", "Lucky"])
+        self.assertNotIn('description', data['results'][0])
+        self.assertEqual(data['results'][3]['category_name'], "Horses")
+        self.assertIsNone(data['next'])
+
+    def test_pagination(self):
+        data = self.client.get(self.url, {'limit': 2}).json()
+        self.assertEqual([row['name'] for row in data['results']], ["Goat 0", "Goat 1"])
+        second = self.client.get(data['next']).json()
+        self.assertEqual([row['name'] for row in second['results']], ["Goat 2", "Lucky"])
+        self.assertIsNone(second['next'])
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], data['results'])
+
+    def test_sparse_fields_and_filters(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {'fields': 'slug,story', 'category': 'goats'}
+            )
+        self.assertEqual(response.json()['results'][0],
+                         {'slug': 'goat-0', 'story': "Found in a field"})
+        data = self.client.get(self.url, {'species': 'horse', 'fields': 'name'}).json()
+        self.assertEqual(data['results'], [{'name': "Lucky"}])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(self.url, {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'after': 'junk'}).status_code, 400)
+        after = encode_cursor(['Lucky', 'x'])
+        self.assertEqual(self.client.get(self.url, {'after': after}).status_code, 400)
+
+    def test_detail_and_categories(self):
+        data = self.client.get(reverse('api:animal_detail', args=['lucky'])).json()
+        self.assertEqual(data['description'], "Friendly")
+        self.assertEqual(
+            self.client.get(reverse('api:animal_detail', args=['nobody'])).status_code, 404
+        )
+        categories = self.client.get(reverse('api:category_list')).json()['results']
+        self.assertEqual([c['slug'] for c in categories], ['goats', 'horses'])
+
+    def test_caching_headers(self):
+        response = self.client.get(self.url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        Animal.objects.filter(name="Lucky").first().save()
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 200)
@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .cache import NAV_CHECK_INTERVAL, NAV_VERSION_KEY, category_nav
+from .models import Animal, Category
+
+
+class CategoryNavCacheTest(TestCase):
+    """
+    Tests for the cached category navigation.
+
+    These tests verify that:
+    - A warm navigation is served without database queries.
+    - Category and Animal changes invalidate the cached copy.
+    - Changes made by another process are picked up once the check
+      interval has passed.
+    - Active animal counts are included when enabled.
+    """
+    def setUp(self):
+        cache.clear()
+        category_nav.clear()
+        self.cat = Category.objects.create(name="Horses", slug="horses")
+
+    def test_warm_nav_costs_no_queries(self):
+        category_nav.get()
+        with self.assertNumQueries(0):
+            categories = category_nav.get()
+        self.assertEqual([c.name for c in categories], ["Horses"])
+
+    def test_category_save_invalidates(self):
+        category_nav.get()
+        Category.objects.create(name="Goats", slug="goats")
+        self.assertEqual([c.name for c in category_nav.get()], ["Goats", "Horses"])
+
+    def test_category_delete_invalidates(self):
+        category_nav.get()
+        self.cat.delete()
+        self.assertEqual(category_nav.get(), [])
+
+    def test_other_process_change_seen_after_interval(self):
+        category_nav.get()
+        # Another process renames the category and bumps the shared token
+        Category.objects.filter(pk=self.cat.pk).update(name="Ponies")
+        cache.set(NAV_VERSION_KEY, 'bumped elsewhere', None)
+        with self.assertNumQueries(0):
+            self.assertEqual([c.name for c in category_nav.get()], ["Horses"])
+
+        category_nav._checked_at -= NAV_CHECK_INTERVAL
+        self.assertEqual([c.name for c in category_nav.get()], ["Ponies"])
+
+    @override_settings(CATEGORY_NAV_COUNTS=True)
+    def test_active_counts(self):
+        Animal.objects.create(name="Lucky", species="Horse",
+                              category=self.cat, description="A horse")
+        Animal.objects.create(name="Old Tom", species="Horse", is_active=False,
+                              category=self.cat, description="A horse")
+        self.assertEqual(category_nav.get()[0].active_count, 1)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, "Horses (1)")
+
+    def test_nav_rendered_from_cache(self):
+        self.client.get(reverse('volunteer_info'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('volunteer_info'))
+        self.assertContains(response, "Horses")
+
+
+class CatalogFragmentCacheTest(TestCase):
+    """
+    Tests for the cached animal card grid.
+
+    These tests verify that:
+    - A warm catalog page renders the grid without querying animals.
+    - Saving, deactivating or deleting an animal refreshes the grid.
+    - Different search terms are cached separately.
+    """
+    def setUp(self):
+        cache.clear()
+        category_nav.clear()
+        self.cat = Category.objects.create(name="Horses", slug="horses")
+        self.animal = Animal.objects.create(
+            name="Lucky", species="Horse", category=self.cat,
+            description="A friendly horse",
+        )
+
+    def test_warm_grid_runs_no_queries(self):
+        self.client.get(reverse('animals:list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('animals:list'))
+        self.assertContains(response, "Lucky")
+
+    def test_save_refreshes_grid(self):
+        self.client.get(reverse('animals:list'))
+        self.animal.name = "Lucky Star"
+        self.animal.save()
+        self.assertContains(self.client.get(reverse('animals:list')), "Lucky Star")
+
+    def test_deactivate_and_delete_refresh_grid(self):
+        self.client.get(reverse('animals:list'))
+        self.animal.is_active = False
+        self.animal.save()
+        self.assertNotContains(self.client.get(reverse('animals:list')), "Lucky")
+        self.animal.is_active = True
+        self.animal.save()
+        self.assertContains(self.client.get(reverse('animals:list')), "Lucky")
+        self.animal.delete()
+        self.assertNotContains(self.client.get(reverse('animals:list')), "Lucky")
+
+    def test_search_terms_cached_separately(self):
+        self.client.get(reverse('animals:list'), {'q': 'lucky'})
+        response = self.client.get(reverse('animals:list'), {'q': 'goat'})
+        self.assertContains(response, "No animals found")
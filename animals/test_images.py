@@ -0,0 +1,148 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock, skipUnless
+from urllib.error import URLError
+
+import cloudinary
+from cloudinary import CloudinaryResource
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from .media import FETCH_TIMEOUT
+from .models import Animal
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ImageVariantsTest(TestCase):
+    """
+    Tests for precomputed responsive image renditions.
+
+    These tests verify that:
+    - Rendition URLs are stored when an image is set and cleared with it.
+    - Saving without touching the image does not rebuild them.
+    - The animal_image tag renders srcset/sizes and lazy loading.
+    """
+    def setUp(self):
+        self.previous_cloud = cloudinary.config().cloud_name
+        cloudinary.config(cloud_name='demo')
+        self.addCleanup(cloudinary.config, cloud_name=self.previous_cloud)
+        self.animal = Animal.objects.create(
+            name="Bella", species="Goat", description="Loves apples",
+        )
+
+    def set_image(self, public_id):
+        self.animal.image = CloudinaryResource(
+            public_id, format='jpg', version=1, type='upload', resource_type='image',
+        )
+        self.animal.save()
+
+    def test_no_image_uses_placeholder(self):
+        self.assertEqual(self.animal.image_variants, {})
+        self.assertTrue(self.animal.image_or_placeholder.endswith('animal_placeholder.jpg'))
+
+    def test_variants_stored_on_image_change(self):
+        self.set_image('animals/bella')
+        stored = Animal.objects.get(pk=self.animal.pk).image_variants
+        self.assertIn('c_fill', stored['card'])
+        self.assertIn('w_800', stored['card_2x'])
+        self.assertTrue(stored['original'].endswith('/v1/animals/bella.jpg'))
+
+        self.set_image('animals/bella-new')
+        stored = Animal.objects.get(pk=self.animal.pk).image_variants
+        self.assertIn('bella-new', stored['thumb'])
+
+        self.animal.image = None
+        self.animal.save()
+        self.assertEqual(Animal.objects.get(pk=self.animal.pk).image_variants, {})
+
+    def test_unchanged_image_is_not_rebuilt(self):
+        self.set_image('animals/bella')
+        animal = Animal.objects.get(pk=self.animal.pk)
+        animal.name = "Bella Rose"
+        # The UPDATE plus two search index statements, no variants UPDATE
+        with self.assertNumQueries(3):
+            animal.save()
+
+    def test_template_tag(self):
+        self.set_image('animals/bella')
+        html = Template(
+            '{% load animal_images %}{% animal_image animal "card" css_class="rounded" %}'
+        ).render(Context({'animal': self.animal}))
+        self.assertIn('srcset="', html)
+        self.assertIn(' 400w, ', html)
+        self.assertIn(' 800w"', html)
+        self.assertIn('sizes="', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('class="rounded"', html)
+
+
+@skipUnless(Image, "Pillow is required for the local media backend")
+class LocalMediaBackendTest(TestCase):
+    """
+    Tests for the local filesystem media backend.
+
+    These tests verify that:
+    - Originals are stored on disk and served locally.
+    - The worker renders content-hashed derivatives and stores their URLs.
+    - Media is served by WhiteNoise with an immutable Cache-Control
+      header, and unknown paths give a 404.
+    - Remote images are fetched with a timeout, and unreachable ones are
+      skipped by the image import.
+    """
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        settings = override_settings(
+            ANIMAL_MEDIA_BACKEND='animals.media.LocalMediaBackend',
+            ANIMAL_MEDIA_ROOT=root.name,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        photo = io.BytesIO()
+        Image.new('RGB', (1200, 900), 'green').save(photo, 'JPEG')
+        upload = SimpleUploadedFile('Bella Photo.jpg', photo.getvalue(), 'image/jpeg')
+        self.animal = Animal.objects.create(
+            name="Bella", species="Goat", description="Loves apples", image=upload,
+        )
+
+    def test_original_stored_and_served(self):
+        url = self.animal.image_or_placeholder
+        self.assertRegex(url, r'^/media/animals/originals/animals/bella-photo-[0-9a-f]{8}\.jpg$')
+        self.assertEqual(set(self.animal.image_variants), {'original'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        for missing in ('/media/animals/originals/nope.jpg', '/media/animals/../settings.py'):
+            self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_worker_renders_hashed_derivatives(self):
+        call_command('refresh_image_variants', stdout=io.StringIO())
+        variants = Animal.objects.get(pk=self.animal.pk).image_variants
+        self.assertRegex(variants['card'], r'\.card\.[0-9a-f]{12}\.jpg$')
+        self.assertRegex(variants['card_2x'], r'\.card_2x\.[0-9a-f]{12}\.jpg$')
+
+        response = self.client.get(variants['thumb'])
+        self.assertIn('immutable', response['Cache-Control'])
+        rendered = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(rendered.size, (160, 160))
+
+    def test_unreachable_image_is_skipped(self):
+        manifest = os.path.join(self.root, 'animals.csv.images.jsonl')
+        with open(manifest, 'w') as handle:
+            handle.write(json.dumps({'animal_id': self.animal.pk,
+                                     'source': 'https://example.com/slow.jpg'}) + '\n')
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch('animals.media.urlopen', side_effect=URLError('timed out')) as fetch:
+            call_command('import_animals', manifest, '--images', stdout=out, stderr=err)
+        fetch.assert_called_once_with('https://example.com/slow.jpg', timeout=FETCH_TIMEOUT)
+        self.assertIn("0 images, 1 skipped, 0 failed", out.getvalue())
+        self.assertIn("skipped", err.getvalue())
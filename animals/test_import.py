@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from .models import Animal, Category, ImportProgress
+from .search import matching
+
+CSV_ROWS = """name,species,breed,description,category,image
+Bella,Goat,,Loves apples,Goats,
+Bella,Goat,Pygmy,Also loves apples,Goats,https://example.com/bella.jpg
+Lucky,Horse,,A friendly horse,Horses,
+,Cat,,Missing a name,Cats,
+"""
+
+
+class ImportAnimalsCommandTest(TestCase):
+    """
+    Tests for the import_animals management command.
+
+    These tests verify that:
+    - CSV and JSONL rows are inserted in batches with unique slugs.
+    - Categories are resolved or created, and imports are searchable.
+    - Images are queued to a manifest and --resume skips committed rows.
+    - A batch and its recorded progress commit together, so resuming
+      after a crash imports no row twice.
+    """
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        Category.objects.create(name="Horses", slug="horses")
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w') as handle:
+            handle.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_animals', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv_import(self):
+        path = self.write('animals.csv', CSV_ROWS)
+        output = self.run_import(path, '--batch-size', '2')
+        self.assertIn("3 animals imported, 1 rows skipped", output)
+        self.assertIn("rows/sec", output)
+        self.assertEqual(
+            sorted(Animal.objects.values_list('slug', flat=True)),
+            ["bella", "bella-1", "lucky"],
+        )
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(Animal.objects.get(slug='lucky').category.slug, "horses")
+        self.assertQuerysetEqual(matching(Animal.objects.all(), "pygmy"),
+                                 [Animal.objects.get(slug='bella-1')])
+
+        with open(f'{path}.images.jsonl') as handle:
+            queued = [json.loads(line) for line in handle]
+        self.assertEqual(queued, [{
+            'animal_id': Animal.objects.get(slug='bella-1').pk,
+            'source': 'https://example.com/bella.jpg',
+        }])
+
+    def test_jsonl_import_and_resume(self):
+        rows = [
+            {'name': f'Hen {index}', 'species': 'Chicken', 'description': 'Clucks'}
+            for index in range(5)
+        ]
+        path = self.write('hens.jsonl', '\n'.join(json.dumps(row) for row in rows))
+        ImportProgress.objects.create(source=path, rows_done=3)
+        output = self.run_import(path, '--resume')
+        self.assertIn("Resuming after 3 rows", output)
+        self.assertEqual(
+            sorted(Animal.objects.values_list('name', flat=True)), ['Hen 3', 'Hen 4']
+        )
+        self.assertEqual(ImportProgress.objects.get(source=path).rows_done, 5)
+
+    def test_resume_after_crash(self):
+        path = self.write('animals.csv', CSV_ROWS)
+        with mock.patch('animals.management.commands.import_animals.index_animals',
+                        side_effect=[None, RuntimeError('killed')]):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Animal.objects.count(), 2)
+        self.assertEqual(ImportProgress.objects.get(source=path).rows_done, 2)
+
+        output = self.run_import(path, '--batch-size', '2', '--resume')
+        self.assertIn("1 animals imported, 1 rows skipped", output)
+        self.assertEqual(
+            sorted(Animal.objects.values_list('slug', flat=True)),
+            ["bella", "bella-1", "lucky"],
+        )
+        with open(f'{path}.images.jsonl') as handle:
+            self.assertEqual(len(handle.readlines()), 1)
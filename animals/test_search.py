@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.urls import reverse
+from .models import Animal, Category
+from .search import matching
+
+
+class AnimalSearchTest(TestCase):
+    """
+    Tests for the full-text search index behind the catalog search box.
+
+    These tests verify that:
+    - Saved animals are indexed across name, species, breed, story and category.
+    - Terms match as prefixes, and every term must match.
+    - Renaming or deleting records keeps the index in step.
+    """
+    def setUp(self):
+        self.horses = Category.objects.create(name="Horses", slug="horses")
+        self.lucky = Animal.objects.create(
+            name="Lucky",
+            species="Horse",
+            breed="Shetland",
+            category=self.horses,
+            description="A friendly pony",
+        )
+        self.bella = Animal.objects.create(
+            name="Bella",
+            species="Goat",
+            description="Loves apples",
+            story="Bella was found next to Lucky the pony",
+        )
+
+    def hits(self, query):
+        return sorted(matching(Animal.objects.all(), query).values_list('pk', flat=True))
+
+    def test_prefix_match(self):
+        self.assertEqual(self.hits("shet"), [self.lucky.pk])
+
+    def test_matches_breed_story_and_category(self):
+        self.assertEqual(self.hits("shetland"), [self.lucky.pk])
+        self.assertEqual(self.hits("found"), [self.bella.pk])
+        self.assertEqual(self.hits("horses"), [self.lucky.pk])
+
+    def test_matches_every_field(self):
+        self.assertEqual(self.hits("lucky"), [self.lucky.pk, self.bella.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.hits("bella apples"), [self.bella.pk])
+        self.assertEqual(self.hits("bella shetland"), [])
+
+    def test_category_rename_reindexes_animals(self):
+        self.horses.name = "Equines"
+        self.horses.save()
+        self.assertEqual(self.hits("equines"), [self.lucky.pk])
+        self.assertEqual(self.hits("horses"), [])
+
+    def test_deleted_animal_is_removed(self):
+        self.bella.delete()
+        self.assertEqual(self.hits("apples"), [])
+
+    def test_matching_keeps_queryset_filters_and_order(self):
+        qs = matching(Animal.objects.filter(is_active=True).order_by('-name'), "pony")
+        self.assertEqual(list(qs), [self.lucky, self.bella])
+        self.assertEqual(list(matching(Animal.objects.filter(pk=self.bella.pk), "")),
+                         [self.bella])
+
+    def test_list_view_uses_search(self):
+        response = self.client.get(reverse('animals:list'), {'q': 'goat'})
+        self.assertContains(response, "Bella")
+        self.assertNotContains(response, "Shetland")
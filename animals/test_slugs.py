@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import TestCase
+from .models import Animal
+from .slugs import allocate_slug, allocate_slugs
+
+
+class SlugAllocationTest(TestCase):
+    """
+    Tests for unique slug allocation.
+
+    These tests verify that:
+    - Repeated names get the first free numbered suffix in one query.
+    - A batch of new names is allocated without clashes.
+    - Saving retries when another save takes the slug first.
+    """
+    def make(self, name, slug=None):
+        return Animal.objects.create(
+            name=name, slug=slug, species="Dog", description="A good dog"
+        )
+
+    def test_repeated_names_get_suffixes(self):
+        slugs = [self.make("Bella").slug for _ in range(3)]
+        self.assertEqual(slugs, ["bella", "bella-1", "bella-2"])
+
+    def test_single_query_and_gap_filling(self):
+        for slug in ["bella", "bella-1", "bella-3", "bella-rose"]:
+            self.make("Bella", slug=slug)
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_slug("Bella"), "bella-2")
+
+    def test_batch_allocation(self):
+        self.make("Max")
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(["Max", "Bella", "Max", "Ünïcödé"])
+        self.assertEqual(slugs, ["max-1", "bella", "max-2", "unicode"])
+
+    def test_name_without_ascii(self):
+        self.assertEqual(allocate_slug("小狗"), "animal")
+
+    def test_retry_on_unique_conflict(self):
+        self.make("Bella")
+        with mock.patch("animals.models.allocate_slug",
+                        side_effect=["bella", "bella-1"]):
+            animal = self.make("Bella")
+        self.assertEqual(animal.slug, "bella-1")
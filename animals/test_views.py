@@ -1,6 +1,8 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
 from .models import Animal, Category
+from .pagination import encode_cursor
 
 class AnimalViewsTest(TestCase):
     """
@@ -33,4 +35,112 @@ class AnimalViewsTest(TestCase):
     def test_animal_detail_view(self):
         response = self.client.get(reverse('animals:detail', args=[self.animal.slug]))
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, "A friendly horse")
\ No newline at end of file
+        self.assertContains(response, "A friendly horse")
+
+class AnimalPaginationTest(TestCase):
+    """
+    Tests for keyset pagination of the animal catalog.
+
+    These tests verify that:
+    - Pages are ordered by name and linked by next/previous cursors.
+    - Walking forward then back returns the same pages.
+    - Search filters are carried across pages and bad cursors, including
+      cursors with values of the wrong type, give a 404.
+    """
+    def setUp(self):
+        self.cat = Category.objects.create(name="Goats", slug="goats")
+        for index in range(30):
+            Animal.objects.create(
+                name=f"Goat {index:02d}",
+                species="Goat",
+                category=self.cat,
+                description="A curious goat",
+            )
+
+    def test_first_page_and_next_cursor(self):
+        response = self.client.get(reverse('animals:list'))
+        page = response.context['page_obj']
+        names = [animal.name for animal in response.context['animals']]
+        self.assertEqual(names, [f"Goat {index:02d}" for index in range(24)])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        self.assertContains(response, f"after={page.next_cursor}")
+
+    def test_walk_forward_and_back(self):
+        first = self.client.get(reverse('animals:list')).context['page_obj']
+        second = self.client.get(
+            reverse('animals:list'), {'after': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual([a.name for a in second],
+                         [f"Goat {index:02d}" for index in range(24, 30)])
+        self.assertFalse(second.has_next())
+        back = self.client.get(
+            reverse('animals:list'), {'before': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_search_query_kept_in_links(self):
+        response = self.client.get(reverse('animals:list'), {'q': 'goat'})
+        self.assertContains(response, "?q=goat&after=")
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('animals:list'), {'after': 'nope'})
+        self.assertEqual(response.status_code, 404)
+        # Well-formed cursors whose values do not fit the ordering
+        for values in (['a', 'x'], ['Goat 01', None], [None, 1]):
+            response = self.client.get(reverse('animals:list'),
+                                       {'after': encode_cursor(values)})
+            self.assertEqual(response.status_code, 404, values)
+
+
+class ConditionalGetTest(TestCase):
+    """
+    Tests for conditional GET on animal pages.
+
+    These tests verify that:
+    - Pages carry ETag/Last-Modified validators.
+    - Repeat requests get 304 Not Modified without rendering.
+    - Changing the animal or the catalog produces a fresh page.
+    """
+    def setUp(self):
+        self.cat = Category.objects.create(name="Horses", slug="horses")
+        self.animal = Animal.objects.create(
+            name="Lucky", species="Horse", category=self.cat,
+            description="A friendly horse",
+        )
+        self.detail_url = reverse('animals:detail', args=[self.animal.slug])
+
+    def test_detail_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        with self.assertTemplateNotUsed('animals/animal_detail.html'):
+            again = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+    def test_detail_changes_after_save(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.animal.description = "A very friendly horse"
+        self.animal.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_etag_varies_by_user(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        get_user_model().objects.create_user(username='donor', password='pass12345')
+        self.client.login(username='donor', password='pass12345')
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_animal_still_404(self):
+        response = self.client.get(reverse('animals:detail', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_catalog_not_modified_until_deactivation(self):
+        url = reverse('animals:by_category', args=['horses'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.animal.is_active = False
+        self.animal.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
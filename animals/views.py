@@ -1,7 +1,16 @@
 from django.views.generic import ListView, DetailView
+from django.http import Http404
 from django.shortcuts import render
-from django.db.models import Q
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .cache import catalog_generation, recent_updates
+from .conditional import animal_etag, animal_last_modified, catalog_etag
 from .models import Animal, Category
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import matching
+from payments.wall import message_wall
 
 
 def home(request):
@@ -10,21 +19,20 @@ def home(request):
     return render(request, 'home.html', {'animals': animals})
 
 
+# Browsers keep pages but revalidate every time, getting a 304 if unchanged
+revalidate = cache_control(private=True, no_cache=True)
+
+
+@method_decorator([revalidate, condition(etag_func=catalog_etag)], name='dispatch')
 class AnimalListView(ListView):
     model = Animal
     template_name = 'animals/animal_list.html'
     context_object_name = 'animals'
+    paginate_by = 24
+    ordering = ('name', 'id')
 
     def get_queryset(self):
-        qs = Animal.objects.filter(is_active=True)
-
-        search = self.request.GET.get('q', '')
-        if search:
-            qs = qs.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(category__name__icontains=search)
-            )
+        qs = Animal.objects.filter(is_active=True).select_related('category')
 
         category_slug = self.kwargs.get('slug')
         if category_slug:
@@ -34,10 +42,60 @@ class AnimalListView(ListView):
         if category:
             qs = qs.filter(category__name__iexact=category)
 
+        search = self.request.GET.get('q', '')
+        if search:
+            qs = matching(qs, search)
+
         return qs
 
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Keyset pagination on (name, id): ?after=<cursor> / ?before=<cursor>.
+        Backed by the (is_active, name, id) index, no COUNT(*) needed.
+        """
+        paginator = KeysetPaginator(queryset, self.ordering, page_size)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        # The page is lazy: a cached card grid never runs the query.
+        is_paginated = SimpleLazyObject(page.has_other_pages)
+        return paginator, page, page, is_paginated
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Query string to carry search/category filters across pages
+        params = self.request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        context['page_query'] = params.urlencode()
+        context['catalog_generation'] = catalog_generation()
+        return context
+
 
+@method_decorator([
+    revalidate,
+    condition(etag_func=animal_etag, last_modified_func=animal_last_modified),
+], name='dispatch')
 class AnimalDetailView(DetailView):
     model = Animal
     template_name = 'animals/animal_detail.html'
     context_object_name = 'animal'
+
+    def get_queryset(self):
+        # Donation totals are denormalised, so this is a single join
+        return Animal.objects.select_related('category', 'donation_stats')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['updates'] = recent_updates(self.object.pk)
+        try:
+            context['message_wall'] = message_wall(
+                self.object.pk, after=self.request.GET.get('messages_after'),
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        return context
@@ -1,5 +1,152 @@
+from datetime import date, timedelta
+
 from django.contrib import admin
-from .models import Payment
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import (
+    AdoptionSubscription, DonationRollup, OutboundEmail, Payment, PaymentArchive, StripeEvent,
+)
+from .moderation import moderate
+from .rollups import GROUPS, PERIODS, report
+
+
+def date_param(request, name, default):
+    """A YYYY-MM-DD query parameter, or ``default`` if missing or invalid."""
+    try:
+        return parse_date(request.GET.get(name) or '') or default
+    except ValueError:
+        return default
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'animal', 'status', 'message_status', 'created_at')
+    list_filter = ('status', 'message_status')
+    search_fields = ('donor_name', 'email', 'stripe_payment_intent_id')
+    list_select_related = ('animal', 'user')
+    raw_id_fields = ('user', 'animal')
+    readonly_fields = ('stripe_payment_intent_id', 'stripe_customer_id',
+                       'created_at', 'updated_at')
+    date_hierarchy = 'created_at'
+    actions = ('approve_messages', 'reject_messages')
+
+    @admin.action(description="Approve selected messages")
+    def approve_messages(self, request, queryset):
+        changed = moderate(queryset.values_list('pk', flat=True), 'approve')
+        self.message_user(request, f"{changed} messages approved.")
+
+    @admin.action(description="Reject selected messages")
+    def reject_messages(self, request, queryset):
+        changed = moderate(queryset.values_list('pk', flat=True), 'reject')
+        self.message_user(request, f"{changed} messages rejected.")
+
+
+@admin.register(PaymentArchive)
+class PaymentArchiveAdmin(admin.ModelAdmin):
+    """Read-only view of archived payments (see payments.archive)."""
+    list_display = ('__str__', 'animal', 'status', 'created_at', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('email', 'stripe_payment_intent_id')
+    list_select_related = ('animal',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AdoptionSubscription)
+class AdoptionSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'status', 'next_renewal_at', 'last_renewed_at', 'failed_attempts')
+    list_filter = ('status',)
+    search_fields = ('user__username', 'user__email', 'animal__name', 'stripe_customer_id')
+    list_select_related = ('user', 'animal')
+    raw_id_fields = ('user', 'animal')
+    readonly_fields = ('claimed_until', 'failed_attempts', 'last_error', 'last_renewed_at',
+                       'canceled_at', 'created_at', 'updated_at')
+    actions = ('cancel_adoptions',)
+
+    @admin.action(description="Cancel selected adoptions")
+    def cancel_adoptions(self, request, queryset):
+        changed = queryset.exclude(status='canceled').update(
+            status='canceled', canceled_at=timezone.now(), updated_at=timezone.now())
+        self.message_user(request, f"{changed} adoptions canceled.")
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'received_at', 'processed_at', 'attempts',
+                    'next_attempt_at')
+    list_filter = ('type',)
+    search_fields = ('event_id',)
+    readonly_fields = ('event_id', 'type', 'payload', 'received_at',
+                       'processed_at', 'attempts', 'last_error')
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to_email', 'subject')
+    raw_id_fields = ('payment',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ('retry_now',)
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        changed = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{changed} emails queued for retry.")
+
+
+@admin.register(DonationRollup)
+class DonationRollupAdmin(admin.ModelAdmin):
+    """
+    The changelist is a donation report read only from the rollups:
+    totals per day or month, overall or per category or animal.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        period = request.GET.get('period') if request.GET.get('period') in PERIODS else 'month'
+        group = request.GET.get('group') if request.GET.get('group') in GROUPS else 'total'
+        today = timezone.localdate()
+        end = date_param(request, 'end', today)
+        default_start = (
+            date(today.year - 1, today.month, 1) if period == 'month'
+            else today - timedelta(days=30)
+        )
+        start = date_param(request, 'start', default_start)
 
-# Register your models here.
-admin.site.register(Payment)
\ No newline at end of file
+        rows = report(period, start, end, group)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Donation report',
+            'opts': self.model._meta,
+            'rows': rows,
+            'grand_total': sum(row['total_amount'] for row in rows),
+            'grand_count': sum(row['donations'] for row in rows),
+            'period': period,
+            'group': group,
+            'start': start,
+            'end': end,
+            'periods': PERIODS,
+            'groups': list(GROUPS),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, 'admin/payments/donationrollup/report.html', context)
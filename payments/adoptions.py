@@ -0,0 +1,213 @@
+"""
+Renewals of virtual adoptions (monthly AdoptionSubscriptions).
+
+``renew_batch()``, run in a loop by ``manage.py run_adoption_renewals``,
+handles one chunk of due subscriptions:
+
+    1. Claim: in one short transaction, pick due subscriptions with
+       SELECT ... FOR UPDATE SKIP LOCKED and stamp ``claimed_until``.
+       Rows claimed by another scheduler are skipped, so several
+       schedulers can run side by side; a scheduler that dies only
+       delays its rows until the claim expires.
+    2. Charge: call the gateway from a bounded thread pool. The threads
+       only do network I/O, never touch the database. Each charge has an
+       idempotency key derived from the subscription and its due date,
+       so a renewal retried after a crash cannot charge twice.
+    3. Record: in one transaction, lock the subscriptions (a cancel
+       made while they were being charged is kept), bulk-create the
+       renewal Payments, run the payment status hook for each (donation
+       stats, rollups, feeds, receipts), and bulk-update the
+       subscriptions.
+
+A declined card makes the subscription past due and retries on the
+RETRY_AFTER schedule, then cancels it. Provider errors are not counted
+against the donor: the renewal is simply retried after TRANSIENT_RETRY.
+"""
+import calendar
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .archive import payment_models
+from .gateway import ChargeDeclined, GatewayError, get_gateway
+from .signals import payment_status_changed
+
+BATCH_SIZE = 200
+WORKERS = 8
+CLAIM_TIMEOUT = timedelta(minutes=15)
+TRANSIENT_RETRY = timedelta(minutes=30)
+# Delay before each retry of a declined renewal; cancel after the last
+RETRY_AFTER = (timedelta(days=1), timedelta(days=3), timedelta(days=7))
+
+
+def add_month(moment, day):
+    """The same time one month later, on ``day`` or the month's last day."""
+    year, month = divmod(moment.year * 12 + moment.month, 12)
+    month += 1
+    return moment.replace(year=year, month=month,
+                          day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def idempotency_key(subscription):
+    return f"adoption-{subscription.pk}-{subscription.next_renewal_at:%Y%m%d}"
+
+
+def due_subscriptions(now):
+    from .models import AdoptionSubscription
+    return AdoptionSubscription.objects.filter(
+        status__in=['active', 'past_due'], next_renewal_at__lte=now,
+    ).exclude(claimed_until__gt=now)
+
+
+def claim_batch(batch_size, now):
+    from .models import AdoptionSubscription
+    with transaction.atomic():
+        ids = list(
+            due_subscriptions(now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_renewal_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        AdoptionSubscription.objects.filter(pk__in=ids).update(
+            claimed_until=now + CLAIM_TIMEOUT)
+    return list(
+        AdoptionSubscription.objects.filter(pk__in=ids)
+        .select_related('user', 'animal').order_by('next_renewal_at', 'id')
+    )
+
+
+def charge(subscription):
+    """Charge one renewal. Returns (subscription, intent, error)."""
+    try:
+        intent = get_gateway().charge(
+            int(subscription.amount * 100),
+            subscription.stripe_customer_id,
+            subscription.stripe_payment_method_id,
+            idempotency_key(subscription),
+            metadata={'subscription_id': subscription.pk,
+                      'animal_id': subscription.animal_id,
+                      'user_id': subscription.user_id},
+        )
+    except GatewayError as error:
+        return subscription, None, error
+    return subscription, intent, None
+
+
+def renewal_payment(subscription, intent):
+    from .models import Payment
+    user = subscription.user
+    payment = Payment(
+        user=user,
+        animal=subscription.animal,
+        subscription=subscription,
+        amount=Decimal(intent.amount) / 100,
+        email=user.email,
+        donor_name=user.get_full_name() or user.username,
+        status='succeeded',
+        stripe_payment_intent_id=intent.id,
+        stripe_customer_id=subscription.stripe_customer_id,
+    )
+    payment._saved_status, payment._saved_amount = payment.status, payment.amount
+    return payment
+
+
+def record(results, now):
+    """Write the outcome of a batch of charges."""
+    from .models import AdoptionSubscription, Payment
+
+    payments = []
+    with transaction.atomic():
+        # Staff may have canceled a subscription while it was being
+        # charged: keep it canceled (the charge itself is still recorded)
+        canceled = dict(
+            AdoptionSubscription.objects.select_for_update()
+            .filter(pk__in=[subscription.pk for subscription, _, _ in results],
+                    status='canceled')
+            .values_list('pk', 'canceled_at')
+        )
+        for subscription, intent, error in results:
+            subscription.claimed_until = None
+            if subscription.pk in canceled:
+                subscription.status = 'canceled'
+                subscription.canceled_at = canceled[subscription.pk]
+            if intent is not None:
+                payments.append(renewal_payment(subscription, intent))
+            if subscription.status == 'canceled':
+                continue
+            if intent is not None:
+                subscription.status = 'active'
+                subscription.failed_attempts = 0
+                subscription.last_error = ''
+                subscription.last_renewed_at = now
+                subscription.next_renewal_at = add_month(
+                    subscription.next_renewal_at, subscription.started_at.day)
+            elif isinstance(error, ChargeDeclined):
+                subscription.failed_attempts += 1
+                subscription.last_error = str(error)
+                if subscription.failed_attempts > len(RETRY_AFTER):
+                    subscription.status = 'canceled'
+                    subscription.canceled_at = now
+                else:
+                    subscription.status = 'past_due'
+                    subscription.next_renewal_at = now + RETRY_AFTER[subscription.failed_attempts - 1]
+            else:
+                # Keep the due date (and so the idempotency key) for the retry
+                subscription.last_error = str(error)
+                subscription.claimed_until = now + TRANSIENT_RETRY
+
+        # A renewal charged before a crash comes back with the same intent
+        intent_ids = [payment.stripe_payment_intent_id for payment in payments]
+        recorded = {
+            intent_id
+            for model in payment_models()
+            for intent_id in model.objects.filter(
+                stripe_payment_intent_id__in=intent_ids,
+            ).values_list('stripe_payment_intent_id', flat=True)
+        }
+        payments = [payment for payment in payments
+                    if payment.stripe_payment_intent_id not in recorded]
+        Payment.objects.bulk_create(payments)
+        # bulk_create skips save(), so run the status hook explicitly
+        for payment in payments:
+            payment_status_changed.send(
+                sender=Payment, payment=payment, previous_status=None, previous_amount=None,
+            )
+        AdoptionSubscription.objects.bulk_update(
+            [subscription for subscription, _, _ in results],
+            ['status', 'failed_attempts', 'last_error', 'last_renewed_at',
+             'next_renewal_at', 'claimed_until', 'canceled_at', 'updated_at'],
+        )
+    return payments
+
+
+def renew_batch(batch_size=BATCH_SIZE, workers=WORKERS):
+    """
+    Renew one chunk of due subscriptions. Returns (renewed, failed,
+    canceled), all 0 when nothing is due; ``canceled`` counts adoptions
+    of animals that have left the rescue.
+    """
+    now = timezone.now()
+    subscriptions = claim_batch(batch_size, now)
+    if not subscriptions:
+        return 0, 0, 0
+    for subscription in subscriptions:
+        subscription.updated_at = now
+
+    # Animals that left the rescue are not charged again
+    gone = [subscription for subscription in subscriptions if not subscription.animal.is_active]
+    for subscription in gone:
+        subscription.status = 'canceled'
+        subscription.canceled_at = now
+        subscription.last_error = 'Animal is no longer at the rescue.'
+    chargeable = [subscription for subscription in subscriptions
+                  if subscription.animal.is_active]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chargeable) or 1))) as pool:
+        results = list(pool.map(charge, chargeable))
+    results += [(subscription, None, None) for subscription in gone]
+    record(results, now)
+    renewed = sum(1 for _, intent, _ in results if intent is not None)
+    return renewed, len(chargeable) - renewed, len(gone)
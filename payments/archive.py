@@ -0,0 +1,134 @@
+"""
+Cold archive for old payments.
+
+Payment is append-only, and everything that shows recent activity
+(dashboards, moderation, the supporters' wall, the webhook worker)
+reads it newest first. ``archive_chunk()``, run in a loop by
+``manage.py archive_payments``, moves settled payments from closed
+months (older than HOT_MONTHS) into PaymentArchive in chunks: copy,
+detach outbox rows, delete, all in one transaction per chunk. Rows
+are copied with their ids, and the delete skips the Payment delete
+signal, because an archived payment still counts in the donation
+stats and rollups.
+
+Payments still needed by hot paths are not archived: pending ones,
+and those whose message is waiting for moderation or shown on the wall.
+
+On PostgreSQL PaymentArchive is declared ``PARTITION BY RANGE
+(created_at)`` with one partition per month, created before the first
+row of that month is moved (``ensure_partitions()``), so date-range
+reads prune to the months they cover. Other databases get a plain
+table with the same columns and indexes.
+
+Historical reads go through ``payment_models()`` (aggregates over hot
+and cold rows) or ``restore()``: a late webhook or refund for an
+archived intent moves the payment back to the hot table first.
+"""
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+HOT_MONTHS = 3
+CHUNK_SIZE = 1000
+
+
+def payment_models():
+    """Payment, then PaymentArchive: hot and cold rows of the same data."""
+    from .models import Payment, PaymentArchive
+    return Payment, PaymentArchive
+
+
+def month_start(day):
+    return datetime.combine(day.replace(day=1), time.min, tzinfo=dt_timezone.utc)
+
+
+def next_month(start):
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def archive_cutoff(hot_months=HOT_MONTHS, now=None):
+    """Start of the oldest month kept hot; everything before is closed."""
+    today = (now or timezone.now()).astimezone(dt_timezone.utc).date()
+    year, month = divmod(today.year * 12 + today.month - hot_months, 12)
+    return datetime(year, month + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def archivable(cutoff):
+    from .models import Payment
+    return (
+        Payment.objects.filter(created_at__lt=cutoff)
+        .exclude(status='pending')
+        .exclude(~Q(message='') & Q(message_status__in=['pending', 'approved']))
+    )
+
+
+def partition_name(start):
+    from .models import PaymentArchive
+    return f"{PaymentArchive._meta.db_table}_{start:%Y%m}"
+
+
+def ensure_partitions(moments):
+    """Create the monthly partitions covering ``moments`` (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return
+    from .models import PaymentArchive
+    quote = connection.ops.quote_name
+    starts = {month_start(moment.astimezone(dt_timezone.utc).date()) for moment in moments}
+    with connection.cursor() as cursor:
+        for start in sorted(starts):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(partition_name(start))} "
+                f"PARTITION OF {quote(PaymentArchive._meta.db_table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, next_month(start)],
+            )
+
+
+def archive_chunk(cutoff, chunk_size=CHUNK_SIZE):
+    """Move up to ``chunk_size`` closed payments to the archive. Returns the count."""
+    from .models import OutboundEmail, Payment, PaymentArchive
+
+    fields = [field.attname for field in PaymentArchive._meta.concrete_fields
+              if field.attname != 'archived_at']
+    with transaction.atomic():
+        ids = list(
+            archivable(cutoff).select_for_update(skip_locked=True)
+            .order_by('created_at', 'id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0
+        rows = list(Payment.objects.filter(pk__in=ids).values(*fields))
+        ensure_partitions(row['created_at'] for row in rows)
+        now = timezone.now()
+        PaymentArchive.objects.bulk_create(
+            [PaymentArchive(archived_at=now, **row) for row in rows])
+        OutboundEmail.objects.filter(payment_id__in=ids).update(payment=None)
+        # Not .delete(): its post_delete hook would uncount the donations
+        Payment.objects.filter(pk__in=ids)._raw_delete(Payment.objects.db)
+    return len(ids)
+
+
+def restore(intent_id):
+    """
+    Move the archived payment for ``intent_id`` back to the hot table.
+    Returns the Payment, or None if the intent was never archived.
+    """
+    from .models import Payment, PaymentArchive
+
+    with transaction.atomic():
+        archived = PaymentArchive.objects.filter(
+            stripe_payment_intent_id=intent_id).select_for_update().first()
+        if archived is None:
+            return None
+        fields = {field.attname: getattr(archived, field.attname)
+                  for field in PaymentArchive._meta.concrete_fields
+                  if field.attname != 'archived_at'}
+        # bulk_create skips the status hook (the payment is already
+        # counted) but applies auto_now_add, so the dates are put back
+        Payment.objects.bulk_create([Payment(**fields)])
+        Payment.objects.filter(pk=archived.pk).update(
+            created_at=fields['created_at'], updated_at=fields['updated_at'])
+        archived.delete()
+    return Payment.objects.get(pk=fields['id'])
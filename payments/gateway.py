@@ -0,0 +1,341 @@
+"""
+Payment gateway: the only place that talks to the payment provider.
+
+``settings.PAYMENT_GATEWAY`` picks the implementation and
+``settings.PAYMENT_GATEWAY_OPTIONS`` is passed to its constructor:
+
+    - ``StripeGateway`` (default): a ``StripeClient`` over one pooled,
+      keep-alive HTTP session, with explicit connect/read timeouts and a
+      bounded number of network retries. No module-global API key.
+    - ``FakeGateway``: an in-process, deterministic stand-in with
+      configurable latency and failure rate (seeded), for load tests
+      and benchmarks of the donation flow without the Stripe API.
+
+Both return ``Intent`` tuples and raise ``GatewayError`` (or
+``IntentNotModifiable``, ``ChargeDeclined``), so callers never handle
+SDK exceptions.
+Webhook parsing is shared: Stripe's signature scheme is a local HMAC,
+so the fake checks signatures too.
+
+The gateway is built once per process (it owns the HTTP pool) and
+rebuilt if the settings change.
+"""
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+DEFAULT_GATEWAY = 'payments.gateway.StripeGateway'
+
+Intent = namedtuple('Intent', 'id client_secret amount status metadata')
+
+
+class GatewayError(Exception):
+    """The provider could not complete the request."""
+
+    def __init__(self, message, user_message=None):
+        super().__init__(message)
+        self.user_message = user_message or 'The payment provider is unavailable.'
+
+
+class IntentNotModifiable(GatewayError):
+    """The intent exists but is past the state where it can change."""
+
+
+class ChargeDeclined(GatewayError):
+    """The card was declined; retrying at once will not help."""
+
+
+class InvalidSignature(GatewayError):
+    """A webhook payload failed verification."""
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    gateway = import_string(getattr(settings, 'PAYMENT_GATEWAY', DEFAULT_GATEWAY))
+    return gateway(**getattr(settings, 'PAYMENT_GATEWAY_OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def reset_gateway(setting, **kwargs):
+    if setting in ('PAYMENT_GATEWAY', 'PAYMENT_GATEWAY_OPTIONS', 'STRIPE_SECRET_KEY'):
+        get_gateway.cache_clear()
+
+
+class PaymentGateway:
+    """Interface shared by all gateways. Amounts are in pence."""
+
+    webhook_tolerance = 300
+
+    def create_intent(self, amount, currency='gbp', metadata=None):
+        raise NotImplementedError
+
+    def retrieve_intent(self, intent_id):
+        raise NotImplementedError
+
+    def update_intent(self, intent_id, amount):
+        raise NotImplementedError
+
+    def cancel_intent(self, intent_id):
+        raise NotImplementedError
+
+    def list_intents(self, created_after=None, page_size=100):
+        """Yield pages (lists of Intent) of intents, newest first."""
+        raise NotImplementedError
+
+    def charge(self, amount, customer, payment_method, idempotency_key,
+               currency='gbp', metadata=None):
+        """
+        Charge a saved card off-session and return the confirmed intent.
+        The same ``idempotency_key`` never charges twice. Raises
+        ChargeDeclined for a declined card.
+        """
+        raise NotImplementedError
+
+    def parse_webhook(self, payload, signature):
+        """
+        Verify a webhook body against its Stripe-Signature header and
+        return the event as a dict. Raises InvalidSignature.
+        """
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise InvalidSignature("STRIPE_WEBHOOK_SECRET is not configured.")
+        try:
+            stripe.WebhookSignature.verify_header(
+                payload.decode('utf-8'), signature or '', secret, self.webhook_tolerance,
+            )
+            event = json.loads(payload)
+            if not (event['id'] and event['type'] and isinstance(event['data']['object'], dict)):
+                raise ValueError("Incomplete event")
+        except (stripe.SignatureVerificationError, UnicodeDecodeError,
+                ValueError, KeyError, TypeError) as error:
+            raise InvalidSignature(str(error))
+        return event
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe over a pooled keep-alive session with timeouts and retries."""
+
+    def __init__(self, api_key=None, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, pool_size=10):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        self.client = stripe.StripeClient(
+            api_key or settings.STRIPE_SECRET_KEY or '',
+            http_client=stripe.RequestsClient(
+                timeout=(connect_timeout, read_timeout), session=session,
+            ),
+            # Retries reuse Stripe's idempotency keys, so a retried create
+            # cannot charge twice.
+            max_network_retries=max_retries,
+        )
+
+    @staticmethod
+    def _intent(obj):
+        return Intent(obj.id, obj.client_secret, obj.amount, obj.status,
+                      dict(obj.metadata or {}))
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            return self._intent(method(*args, **kwargs))
+        except stripe.StripeError as error:
+            raise GatewayError(str(error), error.user_message)
+
+    def _modify(self, method, *args, **kwargs):
+        """
+        Like _call, for changes to an existing intent. Only Stripe's
+        "unexpected state" error means the intent can no longer change;
+        other invalid requests (bad parameters, unknown intent) are
+        plain GatewayErrors.
+        """
+        try:
+            return self._intent(method(*args, **kwargs))
+        except stripe.InvalidRequestError as error:
+            if error.code != 'payment_intent_unexpected_state':
+                raise GatewayError(str(error), error.user_message)
+            raise IntentNotModifiable(str(error), error.user_message)
+        except stripe.StripeError as error:
+            raise GatewayError(str(error), error.user_message)
+
+    def create_intent(self, amount, currency='gbp', metadata=None):
+        return self._call(self.client.v1.payment_intents.create, params={
+            'amount': amount,
+            'currency': currency,
+            'metadata': metadata or {},
+            'automatic_payment_methods': {'enabled': True},
+        })
+
+    def retrieve_intent(self, intent_id):
+        return self._call(self.client.v1.payment_intents.retrieve, intent_id)
+
+    def update_intent(self, intent_id, amount):
+        return self._modify(self.client.v1.payment_intents.update, intent_id,
+                            params={'amount': amount})
+
+    def cancel_intent(self, intent_id):
+        return self._modify(self.client.v1.payment_intents.cancel, intent_id)
+
+    def list_intents(self, created_after=None, page_size=100):
+        params = {'limit': page_size}
+        if created_after is not None:
+            params['created'] = {'gte': int(created_after.timestamp())}
+        while True:
+            try:
+                page = self.client.v1.payment_intents.list(params=params)
+            except stripe.StripeError as error:
+                raise GatewayError(str(error), error.user_message)
+            intents = [self._intent(obj) for obj in page.data]
+            if intents:
+                yield intents
+            if not page.has_more or not intents:
+                return
+            params['starting_after'] = intents[-1].id
+
+    def charge(self, amount, customer, payment_method, idempotency_key,
+               currency='gbp', metadata=None):
+        try:
+            return self._intent(self.client.v1.payment_intents.create(params={
+                'amount': amount,
+                'currency': currency,
+                'customer': customer,
+                'payment_method': payment_method,
+                'off_session': True,
+                'confirm': True,
+                'metadata': metadata or {},
+            }, options={'idempotency_key': idempotency_key}))
+        except stripe.CardError as error:
+            raise ChargeDeclined(str(error), error.user_message)
+        except stripe.StripeError as error:
+            raise GatewayError(str(error), error.user_message)
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-memory gateway. Every call sleeps ``latency`` seconds (plus up to
+    ``jitter``) and fails with probability ``failure_rate``; both draw
+    from a ``seed``ed generator, so runs are repeatable. ``stats``
+    counts calls by operation.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.ids = itertools.count(1)
+        self.intents = {}
+        self.charges = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def _call(self, operation):
+        with self.lock:
+            self.stats[operation] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail = self.random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise GatewayError(f"Simulated {operation} failure")
+
+    def _get(self, intent_id):
+        try:
+            return self.intents[intent_id]
+        except KeyError:
+            raise GatewayError(f"No such payment_intent: {intent_id}")
+
+    def create_intent(self, amount, currency='gbp', metadata=None):
+        self._call('create')
+        with self.lock:
+            intent_id = f'pi_fake_{next(self.ids)}'
+            intent = Intent(intent_id, f'{intent_id}_secret', amount,
+                            'requires_payment_method',
+                            {key: str(value) for key, value in (metadata or {}).items()})
+            self.intents[intent_id] = intent
+        return intent
+
+    def retrieve_intent(self, intent_id):
+        self._call('retrieve')
+        return self._get(intent_id)
+
+    def _replace(self, intent_id, **changes):
+        with self.lock:
+            intent = self._get(intent_id)
+            if intent.status in ('succeeded', 'canceled'):
+                raise IntentNotModifiable(f"Payment intent is {intent.status}")
+            intent = self.intents[intent_id] = intent._replace(**changes)
+        return intent
+
+    def update_intent(self, intent_id, amount):
+        self._call('update')
+        return self._replace(intent_id, amount=amount)
+
+    def cancel_intent(self, intent_id):
+        self._call('cancel')
+        return self._replace(intent_id, status='canceled')
+
+    def list_intents(self, created_after=None, page_size=100):
+        """Pages of stored intents, newest first (``created_after`` is ignored)."""
+        self._call('list')
+        with self.lock:
+            intents = list(reversed(self.intents.values()))
+        for start in range(0, len(intents), page_size):
+            yield intents[start:start + page_size]
+
+    def charge(self, amount, customer, payment_method, idempotency_key,
+               currency='gbp', metadata=None):
+        """Succeeds unless ``payment_method`` is Stripe's 'pm_card_chargeDeclined'."""
+        self._call('charge')
+        if payment_method == 'pm_card_chargeDeclined':
+            raise ChargeDeclined("Your card was declined.", "Your card was declined.")
+        with self.lock:
+            intent_id = self.charges.get(idempotency_key)
+            if intent_id is None:
+                intent_id = self.charges[idempotency_key] = f'pi_fake_{next(self.ids)}'
+                self.intents[intent_id] = Intent(
+                    intent_id, f'{intent_id}_secret', amount, 'succeeded',
+                    {key: str(value) for key, value in (metadata or {}).items()})
+            return self.intents[intent_id]
+
+    # Helpers for load tests
+    def succeed(self, intent_id):
+        """Mark an intent paid, as a card confirmation would."""
+        return self._replace(intent_id, status='succeeded')
+
+    def event(self, intent_id, event_type='payment_intent.succeeded'):
+        """Build a webhook event for an intent."""
+        intent = self._get(intent_id)
+        return {
+            'id': f'evt_{intent_id}_{event_type}',
+            'object': 'event',
+            'type': event_type,
+            'data': {'object': {
+                'id': intent.id, 'object': 'payment_intent', 'amount': intent.amount,
+                'amount_received': intent.amount, 'status': intent.status,
+                'metadata': intent.metadata,
+            }},
+        }
+
+    @staticmethod
+    def sign(payload, secret=None, timestamp=None):
+        """Stripe-Signature header for a payload, as Stripe would send it."""
+        secret = secret or settings.STRIPE_WEBHOOK_SECRET
+        timestamp = timestamp or int(time.time())
+        digest = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(),
+                          hashlib.sha256).hexdigest()
+        return f't={timestamp},v1={digest}'
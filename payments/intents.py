@@ -0,0 +1,137 @@
+"""
+PaymentIntent reuse for the donation form.
+
+Each (donor, animal) pair has at most one open DonationIntent. Picking
+an amount reuses it:
+
+    - same amount            no Stripe request at all;
+    - different amount       PaymentIntent.modify on the same intent,
+                             so the page keeps its client secret;
+    - no open intent, or the open one can no longer be changed
+                             PaymentIntent.create, stored for next time.
+
+The intent is closed when the donation form is submitted or the
+webhook worker records its outcome, and
+``manage.py cancel_stale_intents`` cancels intents abandoned for longer
+than STALE_AFTER, in batches.
+"""
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .gateway import GatewayError, IntentNotModifiable, get_gateway
+
+MIN_AMOUNT = Decimal('1')
+MAX_AMOUNT = Decimal('10000')
+STALE_AFTER = timedelta(hours=24)
+SWEEP_BATCH_SIZE = 100
+
+
+class InvalidAmount(ValueError):
+    pass
+
+
+def parse_amount(value):
+    """Return a Decimal amount in pounds, or raise InvalidAmount."""
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        raise InvalidAmount('Invalid amount')
+    if not amount.is_finite() or amount < MIN_AMOUNT:
+        raise InvalidAmount('Amount must be at least £1')
+    if amount > MAX_AMOUNT:
+        raise InvalidAmount('Amount is too large')
+    return amount
+
+
+def pence(amount):
+    return int(amount * 100)
+
+
+def _create(user, animal, amount):
+    from .models import DonationIntent
+    intent = get_gateway().create_intent(
+        pence(amount), metadata={'animal_id': animal.id, 'user_id': user.id},
+    )
+    try:
+        with transaction.atomic():
+            return DonationIntent.objects.create(
+                user=user, animal=animal, amount=amount,
+                stripe_payment_intent_id=intent.id,
+                client_secret=intent.client_secret,
+            )
+    except IntegrityError:
+        # A parallel request stored its intent first: use that one
+        get_gateway().cancel_intent(intent.id)
+        return DonationIntent.objects.get(user=user, animal=animal, status='open')
+
+
+def intent_for(user, animal, amount):
+    """Return the open DonationIntent for ``amount``, reusing when possible."""
+    from .models import DonationIntent, Payment
+    current = DonationIntent.objects.filter(
+        user=user, animal=animal, status='open').first()
+    if current is None:
+        return _create(user, animal, amount)
+    if Payment.objects.filter(stripe_payment_intent_id=current.stripe_payment_intent_id,
+                              status='succeeded').exists():
+        # Paid, but the form post that closes it never arrived
+        close_intent(current.stripe_payment_intent_id)
+        return _create(user, animal, amount)
+    if current.amount == amount:
+        return current
+    try:
+        get_gateway().update_intent(current.stripe_payment_intent_id, pence(amount))
+    except IntentNotModifiable:
+        # Already confirmed or canceled on Stripe's side
+        close_intent(current.stripe_payment_intent_id, status='canceled')
+        return _create(user, animal, amount)
+    current.amount = amount
+    current.save(update_fields=['amount', 'updated_at'])
+    return current
+
+
+def close_intent(payment_intent_id, status='used'):
+    from .models import DonationIntent
+    DonationIntent.objects.filter(
+        stripe_payment_intent_id=payment_intent_id, status='open',
+    ).update(status=status, updated_at=timezone.now())
+
+
+def cancel_stale_intents(older_than=STALE_AFTER, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Cancel open intents untouched for ``older_than``. Returns
+    (canceled, failed). Intents Stripe refuses to cancel (already
+    succeeded, say) are closed locally as used.
+    """
+    from .models import DonationIntent
+    cutoff = timezone.now() - older_than
+    gateway = get_gateway()
+    canceled = failed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            DonationIntent.objects
+            .filter(status='open', updated_at__lt=cutoff, pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'stripe_payment_intent_id')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        done, used = [], []
+        for pk, intent_id in batch:
+            try:
+                gateway.cancel_intent(intent_id)
+                done.append(pk)
+            except IntentNotModifiable:
+                used.append(pk)
+            except GatewayError:
+                failed += 1
+        now = timezone.now()
+        DonationIntent.objects.filter(pk__in=done).update(status='canceled', updated_at=now)
+        DonationIntent.objects.filter(pk__in=used).update(status='used', updated_at=now)
+        canceled += len(done)
+    return canceled, failed
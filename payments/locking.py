@@ -0,0 +1,33 @@
+"""
+Table locks for the ``rebuild_*`` commands.
+
+A rebuild recomputes a derived table (donation stats, rollups, donor
+summaries) from the payments and replaces its rows, while the payment
+status hook keeps applying increments to it. If a payment's increment
+landed between the recomputation and the replacement, it would be
+deleted with the old rows and lost. So a rebuild locks the table first
+and computes inside the same transaction: writers that already changed
+the table commit before the lock is granted (and so are included), and
+later ones wait and apply their increment to the rebuilt rows.
+"""
+from django.db import connection
+
+
+def lock_tables(*models):
+    """
+    Block writes to the tables of ``models`` until the current
+    transaction ends. Call inside ``transaction.atomic()``.
+
+    PostgreSQL takes a SHARE ROW EXCLUSIVE lock, which lets readers
+    through. Elsewhere the existing rows are locked with SELECT ... FOR
+    UPDATE where supported; SQLite has a single writer anyway, from the
+    rebuild's first write onwards.
+    """
+    if connection.vendor == 'postgresql':
+        tables = ', '.join(connection.ops.quote_name(model._meta.db_table)
+                           for model in models)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE")
+        return
+    for model in models:
+        list(model.objects.select_for_update().values_list('pk', flat=True))
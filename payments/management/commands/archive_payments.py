@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.archive import CHUNK_SIZE, HOT_MONTHS, archivable, archive_chunk, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move settled payments from closed months into the payment "
+        "archive, in chunks. Donation stats and rollups are unaffected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hot-months', type=int, default=HOT_MONTHS,
+                            help="Months kept in the hot table, including the current one")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the payments that would be archived")
+
+    def handle(self, *args, **options):
+        if options['hot_months'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--hot-months and --chunk-size must be at least 1.")
+        cutoff = archive_cutoff(options['hot_months'])
+
+        if options['dry_run']:
+            count = archivable(cutoff).count()
+            self.stdout.write(f"{count} payments before {cutoff:%Y-%m-%d} would be archived.")
+            return
+
+        total = 0
+        started = time.monotonic()
+        while True:
+            moved = archive_chunk(cutoff, options['chunk_size'])
+            if not moved:
+                break
+            total += moved
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"Archived {total} payments ({total / elapsed:.0f} rows/sec)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {total} payments before {cutoff:%Y-%m-%d} archived."
+        ))
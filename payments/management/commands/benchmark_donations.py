@@ -0,0 +1,127 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from animals.models import Animal
+from payments.gateway import FakeGateway, get_gateway
+from payments.models import DonationIntent, Payment, StripeEvent
+from payments.webhooks import process_events
+
+BENCHMARK_SECRET = 'whsec_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure donation throughput end to end (form, amount change, "
+        "submit, webhook) against the in-process FakeGateway. Creates "
+        "temporary donors and removes everything they wrote afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donations', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--animal', help="Slug of the animal to donate to (default: first)")
+
+    def handle(self, *args, **options):
+        gateway = get_gateway()
+        if not isinstance(gateway, FakeGateway):
+            raise CommandError(
+                "Refusing to benchmark against a real provider; "
+                "set PAYMENT_GATEWAY=payments.gateway.FakeGateway."
+            )
+        animals = Animal.objects.filter(is_active=True)
+        if options['animal']:
+            animals = animals.filter(slug=options['animal'])
+        self.animal = animals.first()
+        if self.animal is None:
+            raise CommandError("No animal to donate to.")
+
+        self.gateway = gateway
+        self.local = threading.local()
+        self.donors = []
+        self.lock = threading.Lock()
+        try:
+            with override_settings(STRIPE_WEBHOOK_SECRET=BENCHMARK_SECRET):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(options['concurrency']) as pool:
+                    timings = list(pool.map(self.donate, range(options['donations'])))
+                while any(process_events()):
+                    pass
+                elapsed = time.perf_counter() - started
+            self.report(timings, elapsed)
+        finally:
+            self.cleanup()
+
+    def client(self):
+        """
+        One logged-in client per thread, each with its own donor, so
+        threads never share an open intent.
+        """
+        if not hasattr(self.local, 'client'):
+            donor = get_user_model().objects.create_user(
+                username=f'benchmark-{threading.get_ident()}-{time.time_ns()}',
+                email='benchmark@example.com',
+            )
+            with self.lock:
+                self.donors.append(donor)
+            self.local.donor = donor
+            self.local.client = Client(HTTP_HOST='localhost')
+            self.local.client.force_login(donor)
+        return self.local.client
+
+    def donate(self, number):
+        """One donor journey; returns its duration in seconds, or None."""
+        client = self.client()
+        started = time.perf_counter()
+        try:
+            form_url = reverse('payments:create_donation', args=[self.animal.slug])
+            client.get(form_url, {'amount': '5'})
+            client.post(reverse('payments:update_donation_amount', args=[self.animal.slug]),
+                        {'amount': '10'})
+            intent = DonationIntent.objects.filter(
+                user=self.local.donor, animal=self.animal, status='open').first()
+            if intent is None:
+                return None
+            self.gateway.succeed(intent.stripe_payment_intent_id)
+            client.post(reverse('payments:process_donation', args=[self.animal.slug]), {
+                'amount': '10', 'payment_intent_id': intent.stripe_payment_intent_id,
+            })
+            payload = json.dumps(self.gateway.event(intent.stripe_payment_intent_id))
+            client.post(reverse('payments:stripe_webhook'), payload,
+                        content_type='application/json',
+                        HTTP_STRIPE_SIGNATURE=self.gateway.sign(payload, BENCHMARK_SECRET))
+            return time.perf_counter() - started
+        finally:
+            close_old_connections()
+
+    def report(self, timings, elapsed):
+        done = sorted(timing for timing in timings if timing is not None)
+        failed = len(timings) - len(done)
+        self.stdout.write(f"Donations: {len(done)} completed, {failed} failed")
+        self.stdout.write(f"Throughput: {len(done) / elapsed:.1f} donations/sec")
+        if len(done) >= 2:
+            cuts = statistics.quantiles(done, n=100)
+            self.stdout.write(
+                f"Latency: p50 {cuts[49] * 1000:.0f} ms, p95 {cuts[94] * 1000:.0f} ms"
+            )
+        self.stdout.write(f"Gateway calls: {dict(self.gateway.stats)}")
+
+    def cleanup(self):
+        payments = Payment.objects.filter(user__in=self.donors)
+        StripeEvent.objects.filter(event_id__in=[
+            f'evt_{intent_id}_payment_intent.succeeded'
+            for intent_id in payments.values_list('stripe_payment_intent_id', flat=True)
+        ]).delete()
+        # One by one, so donation totals are adjusted by the usual signals
+        for payment in payments:
+            payment.delete()
+        for donor in self.donors:
+            donor.delete()
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.intents import STALE_AFTER, SWEEP_BATCH_SIZE, cancel_stale_intents
+
+
+class Command(BaseCommand):
+    help = "Cancel Stripe PaymentIntents left open by abandoned donation forms."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float,
+                            default=STALE_AFTER.total_seconds() / 3600,
+                            help="Cancel intents untouched for this many hours")
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        canceled, failed = cancel_stale_intents(
+            timedelta(hours=options['hours']), options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Canceled {canceled} stale intents ({failed} failed, will retry)."
+        ))
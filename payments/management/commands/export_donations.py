@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.export import CHUNK_SIZE, FORMATS, InvalidFilter, export_lines, parse_filters
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream donations to a CSV or JSONL file (or stdout) in constant "
+        "memory. Dates are inclusive, in the site time zone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--start', help="First day to include (YYYY-MM-DD)")
+        parser.add_argument('--end', help="Last day to include (YYYY-MM-DD)")
+        parser.add_argument('--status', help="Comma-separated statuses, e.g. succeeded,refunded")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--output', '-o', help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        try:
+            filters = parse_filters(options['start'], options['end'], options['status'])
+        except InvalidFilter as error:
+            raise CommandError(str(error))
+
+        lines = export_lines(options['format'], chunk_size=options['chunk_size'], **filters)
+        if options['output']:
+            count = 0
+            with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+                for count, line in enumerate(lines, start=1):
+                    handle.write(line)
+            if options['format'] == 'csv':
+                count = max(count - 1, 0)  # header
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {count} donations to {options['output']}."
+            ))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.webhooks import BATCH_SIZE, process_events
+
+
+class Command(BaseCommand):
+    help = "Apply queued Stripe webhook events to payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--watch', action='store_true',
+                            help="Keep polling for new events instead of exiting")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to wait between polls with --watch")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        total_processed = total_failed = 0
+        while True:
+            processed, failed = process_events(options['batch_size'])
+            total_processed += processed
+            total_failed += failed
+            if processed or failed:
+                # Failed events back off, so the next batch holds later ones
+                continue
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {total_processed} events ({total_failed} failed, will retry)."
+        ))
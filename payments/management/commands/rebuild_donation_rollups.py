@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from payments.locking import lock_tables
+from payments.models import DonationRollup
+from payments.rollups import computed_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the donation reporting rollups from hot and archived payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help="Only compare stored rollups and report differences")
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = self.compare(self.stored(), computed_rollups())
+            for key, have, should in mismatches:
+                self.stdout.write(f"{key}: stored {have}, expected {should}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup rows are stale.")
+            self.stdout.write(self.style.SUCCESS("Donation rollups are consistent."))
+            return
+
+        # Computed under the lock, so no concurrent increment is lost (see payments.locking)
+        with transaction.atomic():
+            lock_tables(DonationRollup)
+            stored = self.stored()
+            DonationRollup.objects.all().delete()
+            expected = computed_rollups()
+            mismatches = self.compare(stored, expected)
+            DonationRollup.objects.bulk_create([
+                DonationRollup(key=key, period=period, period_start=start,
+                               animal_id=animal_id, category_id=category_id,
+                               total=total, donation_count=count)
+                for key, (period, start, animal_id, category_id, total, count)
+                in expected.items()
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(expected)} rollup rows ({len(mismatches)} corrected)."
+        ))
+
+    def stored(self):
+        return {
+            key: (total, count)
+            for key, total, count in DonationRollup.objects.exclude(
+                donation_count=0, total=0).values_list('key', 'total', 'donation_count')
+        }
+
+    def compare(self, stored, expected):
+        """(key, stored, expected) for every rollup row that differs."""
+        want = {key: row[4:] for key, row in expected.items()}
+        empty = (Decimal('0.00'), 0)
+        return [
+            (key, stored.get(key, empty), want.get(key, empty))
+            for key in sorted(set(want) | set(stored))
+            if stored.get(key, empty) != want.get(key, empty)
+        ]
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Lower
+
+from payments.archive import payment_models
+from payments.locking import lock_tables
+from payments.models import AnimalDonationStats
+
+
+def computed_stats():
+    """Per-animal totals aggregated from hot and archived payments."""
+    totals = {}
+    supporters = {}
+    for model in payment_models():
+        succeeded = model.objects.filter(status='succeeded', animal__isnull=False).order_by()
+        for row in succeeded.values('animal').annotate(total=Sum('amount'), count=Count('id')):
+            total, count = totals.get(row['animal'], (Decimal('0.00'), 0))
+            totals[row['animal']] = (total + row['total'], count + row['count'])
+        # Supporters are distinct across both tables, so collect them
+        for animal_id, user_id, email in succeeded.values_list(
+                'animal', 'user', Lower('email')).distinct():
+            supporters.setdefault(animal_id, set()).add(
+                ('user', user_id) if user_id else ('guest', email))
+    return {
+        animal_id: (total, count, len(supporters[animal_id]))
+        for animal_id, (total, count) in totals.items()
+    }
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-animal donation totals from hot and archived payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help="Only compare stored totals and report differences")
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = self.compare(self.stored(), computed_stats())
+            for animal_id, have, want in mismatches:
+                self.stdout.write(f"Animal {animal_id}: stored {have}, expected {want}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} animals have stale donation totals.")
+            self.stdout.write(self.style.SUCCESS("Donation totals are consistent."))
+            return
+
+        # Computed under the lock, so no concurrent increment is lost (see payments.locking)
+        with transaction.atomic():
+            lock_tables(AnimalDonationStats)
+            stored = self.stored()
+            AnimalDonationStats.objects.all().delete()
+            expected = computed_stats()
+            mismatches = self.compare(stored, expected)
+            AnimalDonationStats.objects.bulk_create([
+                AnimalDonationStats(animal_id=animal_id, total_raised=total,
+                                    donation_count=count, supporter_count=supporters)
+                for animal_id, (total, count, supporters) in expected.items()
+            ])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt totals for {len(expected)} animals ({len(mismatches)} corrected)."
+        ))
+
+    def stored(self):
+        return {
+            stats.animal_id: (stats.total_raised, stats.donation_count, stats.supporter_count)
+            for stats in AnimalDonationStats.objects.all()
+        }
+
+    def compare(self, stored, expected):
+        """(animal_id, stored, expected) for every animal whose totals differ."""
+        empty = (Decimal('0.00'), 0, 0)
+        return [
+            (animal_id, stored.get(animal_id, empty), expected.get(animal_id, empty))
+            for animal_id in sorted(set(expected) | set(stored))
+            if stored.get(animal_id, empty) != expected.get(animal_id, empty)
+        ]
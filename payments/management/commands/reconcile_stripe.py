@@ -0,0 +1,107 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from payments.archive import restore
+from payments.gateway import GatewayError, get_gateway
+from payments.models import Payment, PaymentArchive
+from payments.webhooks import STATUS_RANK, record_intent_status
+
+# Stripe intent status -> Payment status it implies
+INTENT_STATUS = {
+    'succeeded': 'succeeded',
+    'canceled': 'failed',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Stripe's PaymentIntents with Payment rows, one page at a "
+        "time, and report (or with --fix, repair) differences."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help="Only check intents created in the last N days")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--fix', action='store_true',
+                            help="Create missing payments and move statuses forward")
+
+    def handle(self, *args, **options):
+        if not 1 <= options['page_size'] <= 100:
+            raise CommandError("--page-size must be between 1 and 100.")
+        since = timezone.now() - timedelta(days=options['days'])
+        checked = mismatched = fixed = 0
+
+        try:
+            for page in get_gateway().list_intents(since, options['page_size']):
+                payments = self.recorded_payments([intent.id for intent in page])
+                for intent in page:
+                    checked += 1
+                    problem = self.compare(intent, payments.get(intent.id))
+                    if problem is None:
+                        continue
+                    mismatched += 1
+                    self.stdout.write(f"{intent.id}: {problem}")
+                    if options['fix'] and self.fix(intent, payments.get(intent.id)):
+                        fixed += 1
+        except GatewayError as error:
+            raise CommandError(f"Stripe request failed after {checked} intents: {error}")
+
+        summary = f"Checked {checked} intents: {mismatched} mismatches"
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"{summary}, {fixed} fixed."))
+        elif mismatched:
+            raise CommandError(f"{summary}. Run with --fix to repair.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{summary}."))
+
+    def recorded_payments(self, intent_ids):
+        """
+        {intent id: payment} for a page of intents. Intents not found in
+        the hot table are looked up in the archive.
+        """
+        payments = Payment.objects.in_bulk(intent_ids, field_name='stripe_payment_intent_id')
+        missing = [intent_id for intent_id in intent_ids if intent_id not in payments]
+        if missing:
+            payments.update(
+                (payment.stripe_payment_intent_id, payment)
+                for payment in PaymentArchive.objects.filter(stripe_payment_intent_id__in=missing)
+            )
+        return payments
+
+    def compare(self, intent, payment):
+        """Describe how a payment disagrees with its intent, or None."""
+        expected = INTENT_STATUS.get(intent.status)
+        if payment is None:
+            return "no payment recorded" if expected == 'succeeded' else None
+        if expected is None or payment.status == 'refunded':
+            return None
+        if payment.status != expected:
+            return f"payment is {payment.status}, Stripe says {intent.status}"
+        if expected == 'succeeded' and payment.amount != Decimal(intent.amount) / 100:
+            return f"amount £{payment.amount} != £{Decimal(intent.amount) / 100}"
+        return None
+
+    def fix(self, intent, payment):
+        """Repair forward differences; never downgrade a recorded payment."""
+        expected = INTENT_STATUS[intent.status]
+        with transaction.atomic():
+            if isinstance(payment, PaymentArchive):
+                # Corrected in the hot table, through the status hook
+                payment = restore(intent.id)
+            if payment is not None and payment.status == expected == 'succeeded':
+                payment.amount = Decimal(intent.amount) / 100
+                payment.save()
+                return True
+            if payment is not None and STATUS_RANK[expected] < STATUS_RANK[payment.status]:
+                self.stderr.write(f"{intent.id}: not downgrading {payment.status}; check manually")
+                return False
+            _, changed = record_intent_status(
+                intent.id, expected, amount=intent.amount,
+                metadata=intent.metadata, payment=payment,
+            )
+            return changed
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.adoptions import BATCH_SIZE, WORKERS, renew_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge due virtual adoption renewals. Several instances can run "
+        "at once; each claims its own chunks of subscriptions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=WORKERS,
+                            help="Concurrent charges per batch")
+        parser.add_argument('--watch', action='store_true',
+                            help="Keep polling for due renewals instead of exiting")
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help="Seconds to wait between polls with --watch")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--batch-size and --workers must be at least 1.")
+        total_renewed = total_failed = total_canceled = 0
+        started = time.monotonic()
+        while True:
+            renewed, failed, canceled = renew_batch(options['batch_size'], options['workers'])
+            total_renewed += renewed
+            total_failed += failed
+            total_canceled += canceled
+            if renewed or failed or canceled:
+                continue
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Renewed {total_renewed} adoptions ({total_failed} failed, "
+            f"{total_canceled} canceled) in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.outbox import BATCH_SIZE, send_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails (receipts) from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--watch', action='store_true',
+                            help="Keep polling for new emails instead of exiting")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to wait between polls with --watch")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_outbox(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent:
+                continue
+            # Only failures (or nothing) left: wait rather than spin
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {total_sent} emails ({total_failed} failed, will retry)."
+        ))
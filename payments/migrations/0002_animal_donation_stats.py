@@ -0,0 +1,63 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:17
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Lower
+import django.db.models.deletion
+
+
+def backfill_stats(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    AnimalDonationStats = apps.get_model('payments', 'AnimalDonationStats')
+    rows = (
+        Payment.objects.filter(status='succeeded', animal__isnull=False)
+        .order_by()
+        .values('animal')
+        .annotate(
+            total=Sum('amount'),
+            count=Count('id'),
+            users=Count('user', distinct=True),
+            guests=Count(Lower('email'), filter=Q(user__isnull=True), distinct=True),
+        )
+    )
+    AnimalDonationStats.objects.bulk_create([
+        AnimalDonationStats(
+            animal_id=row['animal'],
+            total_raised=row['total'],
+            donation_count=row['count'],
+            supporter_count=row['users'] + row['guests'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0006_animal_image_media_backend'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalDonationStats',
+            fields=[
+                ('animal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='donation_stats', serialize=False, to='animals.animal')),
+                ('total_raised', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('donation_count', models.PositiveIntegerField(default=0)),
+                ('supporter_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Animal Donation Stats',
+                'verbose_name_plural': 'Animal Donation Stats',
+            },
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
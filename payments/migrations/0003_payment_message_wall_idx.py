@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_animal_donation_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_pa_animal__cadc47_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['animal', 'message_status', 'message_approved_at'], name='payment_message_wall_idx'),
+        ),
+    ]
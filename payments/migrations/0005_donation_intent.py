@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('animals', '0007_animalupdate'),
+        ('payments', '0004_stripe_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_payment_intent_id', models.CharField(max_length=255, unique=True)),
+                ('client_secret', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('used', 'Used'), ('canceled', 'Canceled')], default='open', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='animals.animal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'open')), fields=['updated_at'], name='donation_intent_open_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donationintent',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('user', 'animal'), name='donation_intent_one_open'),
+        ),
+    ]
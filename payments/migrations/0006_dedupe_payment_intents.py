@@ -0,0 +1,76 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Lower
+
+STATUS_RANK = {'pending': 0, 'failed': 1, 'succeeded': 2, 'refunded': 3}
+
+
+def dedupe_payment_intents(apps, schema_editor):
+    """
+    Prepare for a unique stripe_payment_intent_id.
+
+    Rows without an intent id get a unique placeholder. For each
+    duplicated id the most advanced row is kept (earliest first on a
+    tie), inheriting a message if it has none, and the others are
+    deleted. Donation totals of the affected animals are recomputed.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    AnimalDonationStats = apps.get_model('payments', 'AnimalDonationStats')
+
+    for pk in Payment.objects.filter(stripe_payment_intent_id='').values_list('pk', flat=True):
+        Payment.objects.filter(pk=pk).update(stripe_payment_intent_id=f'legacy-{pk}')
+
+    duplicated = (
+        Payment.objects.order_by().values('stripe_payment_intent_id')
+        .annotate(rows=Count('id')).filter(rows__gt=1)
+        .values_list('stripe_payment_intent_id', flat=True)
+    )
+    animals = set()
+    for intent_id in list(duplicated):
+        rows = sorted(
+            Payment.objects.filter(stripe_payment_intent_id=intent_id),
+            key=lambda row: (-STATUS_RANK.get(row.status, 0), row.pk),
+        )
+        keep, extra = rows[0], rows[1:]
+        if not keep.message:
+            for row in extra:
+                if row.message:
+                    keep.message = row.message
+                    keep.message_status = row.message_status
+                    keep.message_approved_at = row.message_approved_at
+                    keep.save()
+                    break
+        animals.update(row.animal_id for row in rows if row.animal_id)
+        Payment.objects.filter(pk__in=[row.pk for row in extra]).delete()
+
+    totals = (
+        Payment.objects.filter(status='succeeded', animal_id__in=animals)
+        .order_by().values('animal')
+        .annotate(
+            total=Sum('amount'),
+            count=Count('id'),
+            users=Count('user', distinct=True),
+            guests=Count(Lower('email'), filter=Q(user__isnull=True), distinct=True),
+        )
+    )
+    AnimalDonationStats.objects.filter(animal_id__in=animals).delete()
+    AnimalDonationStats.objects.bulk_create([
+        AnimalDonationStats(
+            animal_id=row['animal'],
+            total_raised=row['total'],
+            donation_count=row['count'],
+            supporter_count=row['users'] + row['guests'],
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_donation_intent'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_payment_intents, migrations.RunPython.noop),
+    ]
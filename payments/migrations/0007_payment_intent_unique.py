@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_dedupe_payment_intents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='stripe_payment_intent_id',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_intent_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('message_status', 'pending'), models.Q(('message', ''), _negated=True)), fields=['created_at', 'id'], name='payment_moderation_queue_idx'),
+        ),
+    ]
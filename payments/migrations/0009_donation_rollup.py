@@ -0,0 +1,63 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:38
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    DonationRollup = apps.get_model('payments', 'DonationRollup')
+    rollups = []
+    for period in ('day', 'month'):
+        rows = (
+            Payment.objects.filter(status='succeeded')
+            .annotate(start=Trunc('created_at', period, output_field=DateField()))
+            .order_by()
+            .values('start', 'animal_id', 'animal__category_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in rows:
+            animal_id, category_id = row['animal_id'], row['animal__category_id']
+            rollups.append(DonationRollup(
+                key=f"{period}:{row['start'].isoformat()}:{animal_id or '-'}:{category_id or '-'}",
+                period=period,
+                period_start=row['start'],
+                animal_id=animal_id,
+                category_id=category_id,
+                total=row['total'],
+                donation_count=row['count'],
+            ))
+    DonationRollup.objects.bulk_create(rollups, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0007_animalupdate'),
+        ('payments', '0008_payment_moderation_queue_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('animal', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='animals.animal')),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='animals.category')),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['period', 'period_start'], name='donation_rollup_period_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
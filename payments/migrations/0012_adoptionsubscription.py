@@ -0,0 +1,51 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('animals', '0007_animalupdate'),
+        ('payments', '0011_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdoptionSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('past_due', 'Past due'), ('canceled', 'Canceled')], default='active', max_length=20)),
+                ('stripe_customer_id', models.CharField(max_length=255)),
+                ('stripe_payment_method_id', models.CharField(max_length=255)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('next_renewal_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('failed_attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_renewed_at', models.DateTimeField(blank=True, null=True)),
+                ('canceled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adoptions', to='animals.animal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adoptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='subscription',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='payments.adoptionsubscription'),
+        ),
+        migrations.AddIndex(
+            model_name='adoptionsubscription',
+            index=models.Index(condition=models.Q(('status__in', ['active', 'past_due'])), fields=['next_renewal_at', 'id'], name='adoption_renewal_due_idx'),
+        ),
+    ]
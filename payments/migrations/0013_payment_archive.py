@@ -0,0 +1,79 @@
+# Generated by Django 4.2.27 on 2026-10-18 04:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_archive_table(apps, schema_editor):
+    """
+    Create the payment archive. On PostgreSQL it is partitioned by
+    month on created_at (partitions are added by the archiver), so the
+    primary key has to include created_at; elsewhere it is a plain
+    table.
+    """
+    PaymentArchive = apps.get_model('payments', 'PaymentArchive')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(PaymentArchive)
+        return
+
+    quote = schema_editor.quote_name
+    columns = []
+    for field in PaymentArchive._meta.local_concrete_fields:
+        definition, _ = schema_editor.column_sql(PaymentArchive, field)
+        columns.append(f"{quote(field.column)} {definition.replace(' PRIMARY KEY', '')}")
+    schema_editor.execute(
+        f"CREATE TABLE {quote(PaymentArchive._meta.db_table)} ("
+        f"{', '.join(columns)}, PRIMARY KEY ({quote('id')}, {quote('created_at')})"
+        f") PARTITION BY RANGE ({quote('created_at')})"
+    )
+    for index in PaymentArchive._meta.indexes:
+        schema_editor.add_index(PaymentArchive, index)
+
+
+def drop_archive_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions too
+    schema_editor.delete_model(apps.get_model('payments', 'PaymentArchive'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('animals', '0007_animalupdate'),
+        ('payments', '0012_adoptionsubscription'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PaymentArchive',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                        ('email', models.EmailField(max_length=254)),
+                        ('status', models.CharField(choices=[('pending', 'Pending'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('refunded', 'Refunded')], max_length=20)),
+                        ('donor_name', models.CharField(blank=True, max_length=100)),
+                        ('message', models.TextField(blank=True)),
+                        ('message_status', models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                        ('message_approved_at', models.DateTimeField(blank=True, null=True)),
+                        ('stripe_payment_intent_id', models.CharField(max_length=255)),
+                        ('stripe_customer_id', models.CharField(blank=True, max_length=255)),
+                        ('created_at', models.DateTimeField()),
+                        ('updated_at', models.DateTimeField()),
+                        ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('animal', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='animals.animal')),
+                        ('subscription', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='payments.adoptionsubscription')),
+                        ('user', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'ordering': ['-created_at'],
+                        'indexes': [models.Index(fields=['created_at', 'id'], name='payment_archive_created_idx'), models.Index(fields=['user', 'created_at'], name='payment_archive_user_idx'), models.Index(fields=['animal', 'status'], name='payment_archive_animal_idx'), models.Index(fields=['stripe_payment_intent_id'], name='payment_archive_intent_idx')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -1,6 +1,14 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.conf import settings
 from animals.models import Animal
+from .signals import payment_status_changed
 
 
 class Payment(models.Model):
@@ -22,6 +30,8 @@ class Payment(models.Model):
         A donation may be made by a registered user or anonymously.
     - Optional ForeignKey to Animal
         Allows donations to be linked to a specific rescued animal.
+    - Optional ForeignKey to AdoptionSubscription
+        Set on the monthly renewals of a virtual adoption.
 
     Stripe:
     - Payments are created via Stripe PaymentIntents
@@ -32,6 +42,7 @@ class Payment(models.Model):
         ('pending', 'Pending'),
         ('succeeded', 'Succeeded'),
         ('failed', 'Failed'),
+        ('refunded', 'Refunded'),
     )
 
     MESSAGE_STATUS_CHOICES = (
@@ -54,6 +65,14 @@ class Payment(models.Model):
         blank=True
     )
 
+    subscription = models.ForeignKey(
+        'AdoptionSubscription',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payments'
+    )
+
     # Donation details
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     email = models.EmailField()  # For receipt
@@ -71,7 +90,7 @@ class Payment(models.Model):
     message_approved_at = models.DateTimeField(blank=True, null=True)
 
     # Stripe fields
-    stripe_payment_intent_id = models.CharField(max_length=255)
+    stripe_payment_intent_id = models.CharField(max_length=255, unique=True)
     stripe_customer_id = models.CharField(max_length=255, blank=True)
 
     # Timestamps
@@ -81,12 +100,59 @@ class Payment(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['animal', 'message_status']),
+            # Date-range exports, streamed in (created_at, id) order
+            models.Index(fields=['created_at', 'id'], name='payment_created_idx'),
+            # Serves the supporters' wall (see payments.wall)
+            models.Index(fields=['animal', 'message_status', 'message_approved_at'],
+                         name='payment_message_wall_idx'),
+            # Moderation queue: only pending, non-empty messages
+            models.Index(fields=['created_at', 'id'], name='payment_moderation_queue_idx',
+                         condition=models.Q(message_status='pending') & ~models.Q(message='')),
         ]
 
+    # Status and amount as last loaded from / saved to the database
+    _saved_status = None
+    _saved_amount = None
+
     def __str__(self):
         return f"£{self.amount} from {self.donor_name or 'Anonymous'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred fields stay deferred: reading them here would cost a
+        # query per row
+        if 'status' in field_names:
+            instance._saved_status = instance.status
+        if 'amount' in field_names:
+            instance._saved_amount = instance.amount
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Save and, if the status changed (or a succeeded amount was
+        corrected), send payment_status_changed in the same transaction
+        so denormalised totals never drift.
+        """
+        if not self._state.adding and (self._saved_status is None or self._saved_amount is None):
+            # Loaded with status or amount deferred: fetch what was saved
+            self._saved_status, self._saved_amount = Payment.objects.filter(
+                pk=self.pk).values_list('status', 'amount').first() or (None, None)
+        amount_changed = (
+            self._saved_amount is not None
+            and Decimal(str(self.amount)) != self._saved_amount
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.status != self._saved_status or (
+                    amount_changed and self._saved_status == 'succeeded'):
+                payment_status_changed.send(
+                    sender=Payment, payment=self, previous_status=self._saved_status,
+                    previous_amount=self._saved_amount,
+                )
+        self._saved_status = self.status
+        self._saved_amount = Decimal(str(self.amount))
+
     @property
     def display_name(self):
         """
@@ -111,13 +177,429 @@ class Payment(models.Model):
         Approve the donor message.
         """
         from django.utils import timezone
+        from .wall import invalidate_wall
         self.message_status = 'approved'
         self.message_approved_at = timezone.now()
-        self.save()
+        self.save(update_fields=['message_status', 'message_approved_at', 'updated_at'])
+        invalidate_wall([self.animal_id])
 
     def reject_message(self):
         """
         Reject the donor message.
         """
+        from .wall import invalidate_wall
         self.message_status = 'rejected'
-        self.save()
+        self.message_approved_at = None
+        self.save(update_fields=['message_status', 'message_approved_at', 'updated_at'])
+        invalidate_wall([self.animal_id])
+
+
+class PaymentArchive(models.Model):
+    """
+    Cold storage for payments from closed months.
+
+    ``manage.py archive_payments`` moves settled payments older than the
+    hot window here, keeping their ids, so the Payment table that recent
+    activity reads from stays small. On PostgreSQL the table is
+    partitioned by month on ``created_at``; elsewhere it is a plain
+    table (see payments.archive). Archived payments still count in the
+    donation stats and rollups.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    subscription = models.ForeignKey(
+        'AdoptionSubscription',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=Payment.STATUS_CHOICES)
+    donor_name = models.CharField(max_length=100, blank=True)
+    message = models.TextField(blank=True)
+    message_status = models.CharField(max_length=20, choices=Payment.MESSAGE_STATUS_CHOICES)
+    message_approved_at = models.DateTimeField(blank=True, null=True)
+    stripe_payment_intent_id = models.CharField(max_length=255)
+    stripe_customer_id = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        # Every index includes or leads with what lookups filter on; on
+        # PostgreSQL each is created per partition
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='payment_archive_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='payment_archive_user_idx'),
+            models.Index(fields=['animal', 'status'], name='payment_archive_animal_idx'),
+            models.Index(fields=['stripe_payment_intent_id'], name='payment_archive_intent_idx'),
+        ]
+
+    def __str__(self):
+        return f"£{self.amount} from {self.donor_name or 'Anonymous'} (archived)"
+
+
+class AnimalDonationStats(models.Model):
+    """
+    Running donation totals for one animal.
+
+    Kept up to date incrementally whenever a Payment starts or stops
+    counting as succeeded, so detail pages can show "raised so far"
+    without aggregating over Payment. ``manage.py rebuild_donation_stats``
+    recomputes (or just verifies) the figures from the Payment table.
+
+    Supporters are counted once per registered user, or per email
+    address for guest donations.
+    """
+    animal = models.OneToOneField(
+        Animal,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='donation_stats'
+    )
+    total_raised = models.DecimalField(max_digits=12, decimal_places=2,
+                                       default=Decimal('0.00'))
+    donation_count = models.PositiveIntegerField(default=0)
+    supporter_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Animal Donation Stats'
+        verbose_name_plural = 'Animal Donation Stats'
+
+    def __str__(self):
+        return f"£{self.total_raised} raised for animal {self.animal_id}"
+
+    @staticmethod
+    def supporter_filter(payment):
+        if payment.user_id:
+            return {'user_id': payment.user_id}
+        return {'user__isnull': True, 'email__iexact': payment.email}
+
+    @classmethod
+    def apply(cls, payment, delta, amount=None):
+        """
+        Add (delta=1) or remove (delta=-1) a succeeded payment, counting
+        ``amount`` instead of its current amount if given.
+        The stats row is locked first so concurrent donations by the
+        same supporter cannot both count as their first.
+        """
+        if not payment.animal_id:
+            return
+        cls.objects.get_or_create(animal_id=payment.animal_id)
+        rows = cls.objects.select_for_update().filter(animal_id=payment.animal_id)
+        list(rows)
+
+        supporter = {'animal_id': payment.animal_id, 'status': 'succeeded',
+                     **cls.supporter_filter(payment)}
+        other_donations = (
+            Payment.objects.filter(**supporter).exclude(pk=payment.pk).exists()
+            or PaymentArchive.objects.filter(**supporter).exclude(pk=payment.pk).exists()
+        )
+
+        rows.update(
+            total_raised=F('total_raised') + delta * Decimal(str(
+                payment.amount if amount is None else amount)),
+            donation_count=F('donation_count') + delta,
+            supporter_count=F('supporter_count') + (0 if other_donations else delta),
+            updated_at=Now(),
+        )
+
+
+class DonationRollup(models.Model):
+    """
+    Succeeded donations summed per period, animal and category.
+
+    One row per (period, period_start, animal, category), maintained
+    incrementally from payment_status_changed (see payments.rollups),
+    so finance reports never aggregate over Payment. ``key`` is the
+    grouping as one unique string, because animal and category may be
+    NULL and NULLs never collide in a unique constraint.
+    ``manage.py rebuild_donation_rollups`` rebuilds or verifies them.
+    """
+    PERIOD_CHOICES = (
+        ('day', 'Day'),
+        ('month', 'Month'),
+    )
+
+    key = models.CharField(max_length=64, unique=True)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    animal = models.ForeignKey(Animal, on_delete=models.DO_NOTHING, null=True,
+                               blank=True, db_constraint=False, related_name='+')
+    category = models.ForeignKey('animals.Category', on_delete=models.DO_NOTHING, null=True,
+                                 blank=True, db_constraint=False, related_name='+')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    donation_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-period_start']
+        indexes = [
+            models.Index(fields=['period', 'period_start'], name='donation_rollup_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.period_start}: £{self.total}"
+
+
+class DonationIntent(models.Model):
+    """
+    The open Stripe PaymentIntent for a donor and an animal.
+
+    The donation form reuses this intent on every visit and changes its
+    amount in place, instead of creating a new intent per page load
+    (see payments.intents). It is closed when the donation is submitted;
+    ``manage.py cancel_stale_intents`` cancels abandoned ones.
+    """
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('used', 'Used'),
+        ('canceled', 'Canceled'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE)
+    stripe_payment_intent_id = models.CharField(max_length=255, unique=True)
+    client_secret = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'animal'],
+                                    condition=models.Q(status='open'),
+                                    name='donation_intent_one_open'),
+        ]
+        indexes = [
+            # The sweeper scans open intents by age.
+            models.Index(fields=['updated_at'], name='donation_intent_open_idx',
+                         condition=models.Q(status='open')),
+        ]
+
+    def __str__(self):
+        return f"{self.stripe_payment_intent_id} ({self.status})"
+
+
+class AdoptionSubscription(models.Model):
+    """
+    A virtual adoption: a monthly donation to one animal, charged to the
+    donor's saved card.
+
+    ``manage.py run_adoption_renewals`` charges subscriptions whose
+    ``next_renewal_at`` has passed and records each renewal as a
+    succeeded Payment linked back here (see payments.adoptions). While
+    a scheduler is charging a subscription, ``claimed_until`` keeps
+    other schedulers away from it.
+    """
+    STATUS_CHOICES = (
+        ('active', 'Active'),
+        ('past_due', 'Past due'),
+        ('canceled', 'Canceled'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='adoptions'
+    )
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='adoptions')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+
+    # Saved card, set up with Stripe beforehand
+    stripe_customer_id = models.CharField(max_length=255)
+    stripe_payment_method_id = models.CharField(max_length=255)
+
+    # Renewal schedule
+    started_at = models.DateTimeField(default=timezone.now)
+    next_renewal_at = models.DateTimeField(default=timezone.now)
+    claimed_until = models.DateTimeField(blank=True, null=True)
+    failed_attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    last_renewed_at = models.DateTimeField(blank=True, null=True)
+    canceled_at = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The scheduler only scans subscriptions still being renewed
+            models.Index(fields=['next_renewal_at', 'id'], name='adoption_renewal_due_idx',
+                         condition=models.Q(status__in=['active', 'past_due'])),
+        ]
+
+    def __str__(self):
+        return f"{self.user} adopts {self.animal} (£{self.amount}/month)"
+
+    def cancel(self):
+        self.status = 'canceled'
+        self.canceled_at = timezone.now()
+        self.save(update_fields=['status', 'canceled_at', 'updated_at'])
+
+
+class StripeEvent(models.Model):
+    """
+    Inbox of Stripe webhook events.
+
+    The webhook view only verifies the signature and inserts the raw
+    event here, ignoring ids it has already seen, so Stripe gets its
+    acknowledgement at once and redeliveries are harmless.
+    ``manage.py process_stripe_events`` applies pending events to
+    Payment rows in batches (see payments.webhooks).
+    """
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Only unprocessed events are ever scanned by the worker.
+            models.Index(fields=['id'], name='stripe_event_pending_idx',
+                         condition=models.Q(processed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.type} ({self.event_id})"
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional outbox for emails such as donation receipts.
+
+    Rows are written in the same transaction as the change that causes
+    them, so an email is queued if and only if that change commits, and
+    the request never waits on SMTP. ``manage.py send_outbox`` delivers
+    pending rows in batches over one connection, retrying with backoff
+    and giving up ("dead") after a few attempts (see payments.outbox).
+    """
+    KIND_CHOICES = (
+        ('receipt', 'Donation receipt'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails'
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            # One receipt per payment, however often it succeeds
+            models.UniqueConstraint(fields=['payment', 'kind'],
+                                    name='outbound_email_once_per_payment'),
+        ]
+        indexes = [
+            # The worker only scans rows still waiting to be sent
+            models.Index(fields=['next_attempt_at', 'id'], name='outbound_email_due_idx',
+                         condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_email}"
+
+
+@receiver(payment_status_changed, sender=Payment)
+def update_donation_stats(sender, payment, previous_status, previous_amount=None, **kwargs):
+    """Count a payment in or out of its animal's totals."""
+    was_counted = previous_status == 'succeeded'
+    is_counted = payment.status == 'succeeded'
+    if was_counted:
+        AnimalDonationStats.apply(payment, -1, amount=previous_amount)
+    if is_counted:
+        AnimalDonationStats.apply(payment, 1)
+
+
+@receiver(payment_status_changed, sender=Payment)
+def update_donation_rollups(sender, payment, previous_status, previous_amount=None, **kwargs):
+    """Move a payment in or out of the reporting rollups."""
+    from .rollups import apply_rollups
+    if previous_status == 'succeeded':
+        apply_rollups(payment, -1, amount=previous_amount)
+    if payment.status == 'succeeded':
+        apply_rollups(payment, 1)
+
+
+@receiver(post_delete, sender=Payment)
+def remove_deleted_donation(sender, instance, **kwargs):
+    """A deleted succeeded payment no longer counts."""
+    if instance._saved_status == 'succeeded':
+        from .rollups import apply_rollups
+        AnimalDonationStats.apply(instance, -1, amount=instance._saved_amount)
+        apply_rollups(instance, -1, amount=instance._saved_amount)
+
+
+@receiver(payment_status_changed, sender=Payment)
+def queue_donation_receipt(sender, payment, previous_status, **kwargs):
+    """Queue a receipt, in the payment's transaction, once it succeeds."""
+    if payment.status == 'succeeded' and previous_status != 'succeeded' and payment.email:
+        from .outbox import queue_receipt
+        queue_receipt(payment)
+
+
+@receiver(payment_status_changed, sender=Payment)
+def refresh_message_wall(sender, payment, previous_status, **kwargs):
+    """The wall lists approved messages of succeeded payments only."""
+    if payment.has_approved_message and 'succeeded' in (previous_status, payment.status):
+        from .wall import invalidate_wall
+        invalidate_wall([payment.animal_id])
+
+
+@receiver(post_delete, sender=Payment)
+def remove_deleted_message(sender, instance, **kwargs):
+    """A deleted payment's message leaves the wall."""
+    if instance.has_approved_message and instance._saved_status == 'succeeded':
+        from .wall import invalidate_wall
+        invalidate_wall([instance.animal_id])
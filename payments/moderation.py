@@ -0,0 +1,61 @@
+"""
+Moderation of donor messages.
+
+The queue lists pending, non-empty messages oldest first. A partial
+index covers exactly those rows, so the queue stays cheap however many
+moderated messages pile up behind it, and pages are keyset-paginated.
+
+Bulk decisions are one ``UPDATE ... WHERE id IN (...)`` with the
+approval time taken from the database clock. Only the rows still
+pending are touched, so two moderators working the same page cannot
+overwrite each other. The wall cache of every affected animal is then
+invalidated once.
+"""
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Now
+
+from animals.pagination import KeysetPaginator
+
+from .wall import invalidate_wall
+
+PAGE_SIZE = 50
+ORDERING = ('created_at', 'id')
+ACTIONS = {
+    'approve': {'message_status': 'approved', 'message_approved_at': Now()},
+    'reject': {'message_status': 'rejected', 'message_approved_at': Value(None)},
+}
+
+
+def pending_messages():
+    from .models import Payment
+    return (
+        Payment.objects
+        .filter(message_status='pending')
+        .exclude(message='')
+        .select_related('animal', 'user')
+        .only('created_at', 'amount', 'status', 'donor_name', 'message',
+              'animal__name', 'animal__slug', 'user__username',
+              'user__first_name', 'user__last_name')
+    )
+
+
+def moderation_page(after=None, before=None, per_page=PAGE_SIZE):
+    """One keyset page of the queue. Raises InvalidCursor for a bad cursor."""
+    return KeysetPaginator(pending_messages(), ORDERING, per_page).page(
+        after=after, before=before)
+
+
+def moderate(payment_ids, action):
+    """
+    Approve or reject the still-pending messages among ``payment_ids``.
+    Returns the number of messages changed.
+    """
+    from .models import Payment
+    changes = ACTIONS[action]
+    with transaction.atomic():
+        rows = Payment.objects.filter(pk__in=payment_ids, message_status='pending')
+        animal_ids = set(rows.order_by().values_list('animal_id', flat=True).distinct())
+        changed = rows.update(**changes, updated_at=Now())
+    invalidate_wall(animal_ids)
+    return changed
@@ -0,0 +1,113 @@
+"""
+Email outbox delivery.
+
+Emails are queued as OutboundEmail rows inside the transaction that
+causes them (``queue_receipt()`` runs from the payment status hook), so
+checkout never talks to SMTP and a rolled back donation sends nothing.
+
+``send_outbox()``, run by ``manage.py send_outbox``, delivers them:
+
+    1. Claim a batch of due rows (SKIP LOCKED where supported, so
+       several workers can run) and push their next attempt past a
+       lease, in one short transaction. A worker that dies mid-batch
+       only delays its rows until the lease expires.
+    2. Send the batch over a single backend connection.
+    3. Record the outcome with one bulk UPDATE: sent, retry after an
+       exponential backoff, or dead after MAX_ATTEMPTS.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)  # doubled after every failed attempt
+LEASE = timedelta(minutes=10)
+
+
+def queue_receipt(payment):
+    """Queue the receipt for a succeeded payment, at most once."""
+    from .models import OutboundEmail
+    context = {'payment': payment, 'animal': payment.animal}
+    subject = render_to_string('payments/emails/receipt_subject.txt', context)
+    OutboundEmail.objects.bulk_create([OutboundEmail(
+        kind='receipt',
+        payment=payment,
+        to_email=payment.email,
+        subject=' '.join(subject.split()),
+        body=render_to_string('payments/emails/receipt.txt', context),
+    )], ignore_conflicts=True)
+
+
+def retry_delay(attempts):
+    return RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def claim_batch(batch_size):
+    from .models import OutboundEmail
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + LEASE
+        OutboundEmail.objects.bulk_update(emails, ['attempts', 'next_attempt_at'])
+    return emails
+
+
+def send_outbox(batch_size=BATCH_SIZE):
+    """
+    Deliver one batch of due emails. Returns (sent, failed); failed
+    emails are retried later or, after MAX_ATTEMPTS, marked dead.
+    """
+    from .models import OutboundEmail
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Nothing can be sent; the whole batch backs off
+        for email in emails:
+            email.last_error = f"{type(error).__name__}: {error}"
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, settings.DEFAULT_FROM_EMAIL,
+                    [email.to_email], connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    email.last_error = f"{type(error).__name__}: {error}"
+                else:
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    for email in emails:
+        if email.status == 'sent':
+            continue
+        if email.attempts >= MAX_ATTEMPTS:
+            email.status = 'dead'
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'sent_at', 'next_attempt_at', 'last_error'])
+    sent = sum(1 for email in emails if email.status == 'sent')
+    return sent, len(emails) - sent
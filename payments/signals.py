@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent inside the saving transaction whenever a Payment's status changes
+# (including its first save), or the amount of a succeeded Payment is
+# corrected. Arguments: payment, previous_status, previous_amount.
+payment_status_changed = Signal()
+
+# Sent inside the saving transaction when the donor details of an
+# existing Payment (user, name, message) are filled in after it was
+# created, e.g. by the webhook worker. Arguments: payment, previous_user_id.
+payment_donor_changed = Signal()
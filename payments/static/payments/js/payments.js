@@ -50,6 +50,60 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // ===== AMOUNT SELECTION =====
+    // With the payment form on the page, the open PaymentIntent is updated
+    // in place through a JSON endpoint; otherwise the page is reloaded
+    // with ?amount= so the form can be rendered.
+    function highlightAmount(amount) {
+        const amountNum = parseFloat(amount);
+        amountButtons.forEach(btn => {
+            const selected = parseFloat(btn.getAttribute('data-amount')) === amountNum;
+            btn.classList.toggle('bg-cyan-800', selected);
+            btn.classList.toggle('text-white', selected);
+            btn.classList.toggle('bg-white', !selected);
+            btn.classList.toggle('text-cyan-800', !selected);
+        });
+    }
+
+    // Set from the page below; replaced when the server had to swap
+    // the intent for a new one
+    let clientSecret = null;
+
+    function reloadWithAmount(amount) {
+        const currentUrl = window.location.origin + window.location.pathname;
+        window.location.href = currentUrl + '?amount=' + amount;
+    }
+
+    async function selectAmount(amount) {
+        if (!form) {
+            reloadWithAmount(amount);
+            return;
+        }
+        const body = new FormData();
+        body.append('amount', amount);
+        try {
+            const response = await fetch(form.dataset.amountUrl, {
+                method: 'POST',
+                body: body,
+                headers: {'X-CSRFToken': form.querySelector('[name=csrfmiddlewaretoken]').value},
+            });
+            const data = await response.json();
+            if (!response.ok) {
+                alert(data.error || 'Could not change the amount');
+                return;
+            }
+            // Usually the same intent with a new amount, but an intent
+            // that could no longer be modified is replaced by a new one
+            clientSecret = data.client_secret;
+            document.getElementById('selected-amount').value = data.amount;
+            document.getElementById('donate-amount').textContent = data.amount;
+            highlightAmount(data.amount);
+            history.replaceState(null, '', window.location.pathname + '?amount=' + data.amount);
+        } catch (err) {
+            console.error("Amount update failed:", err);
+            reloadWithAmount(amount);
+        }
+    }
+
     // Handle preset amount buttons
     amountButtons.forEach(button => {
         button.addEventListener('click', function() {
@@ -61,9 +115,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 customAmountInput.value = '';
             }
             
-            // Refresh page with selected amount
-            const currentUrl = window.location.origin + window.location.pathname;
-            window.location.href = currentUrl + '?amount=' + amount;
+            selectAmount(amount);
         });
     });
     
@@ -74,9 +126,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (amount && parseFloat(amount) >= 1) {
                 console.log("Custom amount:", amount);
                 
-                // Refresh page with custom amount
-                const currentUrl = window.location.origin + window.location.pathname;
-                window.location.href = currentUrl + '?amount=' + amount;
+                selectAmount(amount);
             } else {
                 alert('Please enter a valid amount (£1 or more)');
             }
@@ -104,7 +154,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Get Stripe keys
         const stripePublicKey = JSON.parse(document.getElementById('stripe_public_key').textContent);
-        const clientSecret = JSON.parse(document.getElementById('client_secret').textContent);
+        clientSecret = JSON.parse(document.getElementById('client_secret').textContent);
         
         // Initialize Stripe
         const stripe = Stripe(stripePublicKey);
@@ -0,0 +1,28 @@
+"""
+Shared helpers for tests that need payments from the past.
+"""
+from itertools import count
+
+from .models import Payment
+
+_intent_ids = count()
+
+
+def make_payment(status='succeeded', when=None, **fields):
+    """
+    Create a payment that reaches ``status`` the way a donation does,
+    optionally dated ``when``.
+
+    The row is created pending and backdated first, so the status hook
+    (stats, rollups, donor summaries) sees the final ``created_at``.
+    """
+    fields.setdefault('amount', 10)
+    fields.setdefault('email', 'donor@example.com')
+    fields.setdefault('stripe_payment_intent_id', f'pi_test_{next(_intent_ids)}')
+    payment = Payment.objects.create(status='pending', **fields)
+    if when:
+        Payment.objects.filter(pk=payment.pk).update(created_at=when)
+        payment.refresh_from_db()
+    payment.status = status
+    payment.save()
+    return payment
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from animals.models import Animal
+from payments.adoptions import RETRY_AFTER, add_month, record, renew_batch
+from payments.gateway import get_gateway
+from payments.models import AdoptionSubscription, AnimalDonationStats, OutboundEmail, Payment
+
+User = get_user_model()
+
+
+@override_settings(PAYMENT_GATEWAY='payments.gateway.FakeGateway')
+class AdoptionRenewalTests(TestCase):
+    """
+    Tests for virtual adoption renewals.
+
+    These tests verify that:
+    - Due subscriptions are charged and recorded as succeeded payments,
+      with stats and receipts updated through the status hook.
+    - The next renewal keeps the subscription's day of the month.
+    - Declined cards are retried on a schedule, then canceled.
+    - Provider errors and claimed rows are left for a later run.
+    - A cancel made while a renewal is being charged is kept.
+    - Adoptions canceled because the animal left are reported, and do
+      not stop the command while renewals are still due.
+    - A renewal charged twice is recorded once.
+    """
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.gateway = get_gateway()
+        self.user = User.objects.create_user(
+            username='donor', email='donor@example.com', password='testpass123')
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+
+    def adopt(self, due=None, payment_method='pm_card_visa', **kwargs):
+        due = due or timezone.now() - timedelta(minutes=1)
+        return AdoptionSubscription.objects.create(
+            user=self.user, animal=kwargs.pop('animal', self.lucky), amount=Decimal('15.00'),
+            stripe_customer_id='cus_1', stripe_payment_method_id=payment_method,
+            started_at=due, next_renewal_at=due, **kwargs)
+
+    def test_add_month(self):
+        jan31 = datetime(2026, 1, 31, 9, tzinfo=dt_timezone.utc)
+        self.assertEqual(add_month(jan31, 31), jan31.replace(month=2, day=28))
+        self.assertEqual(add_month(jan31.replace(month=2, day=28), 31), jan31.replace(month=3))
+        self.assertEqual(add_month(jan31.replace(month=12, day=15), 15),
+                         datetime(2027, 1, 15, 9, tzinfo=dt_timezone.utc))
+
+    def test_renewal(self):
+        subscriptions = [self.adopt() for _ in range(3)]
+        later = self.adopt(due=timezone.now() + timedelta(days=3))
+
+        self.assertEqual(renew_batch(batch_size=2, workers=2), (2, 0, 0))
+        self.assertEqual(renew_batch(batch_size=2, workers=2), (1, 0, 0))
+        self.assertEqual(renew_batch(), (0, 0, 0))
+
+        payments = Payment.objects.filter(subscription__isnull=False)
+        self.assertEqual(payments.count(), 3)
+        self.assertEqual(set(payments.values_list('status', 'amount', 'email')),
+                         {('succeeded', Decimal('15.00'), 'donor@example.com')})
+        stats = AnimalDonationStats.objects.get(animal=self.lucky)
+        self.assertEqual((stats.total_raised, stats.donation_count), (Decimal('45.00'), 3))
+        self.assertEqual(OutboundEmail.objects.filter(kind='receipt').count(), 3)
+
+        for subscription in subscriptions:
+            before = subscription.next_renewal_at
+            subscription.refresh_from_db()
+            self.assertEqual(subscription.next_renewal_at, add_month(before, before.day))
+            self.assertIsNone(subscription.claimed_until)
+        later.refresh_from_db()
+        self.assertIsNone(later.last_renewed_at)
+
+    def test_declined_card(self):
+        subscription = self.adopt(payment_method='pm_card_chargeDeclined')
+        for attempt, delay in enumerate(RETRY_AFTER, start=1):
+            self.assertEqual(renew_batch(), (0, 1, 0))
+            subscription.refresh_from_db()
+            self.assertEqual((subscription.status, subscription.failed_attempts),
+                             ('past_due', attempt))
+            self.assertAlmostEqual(subscription.next_renewal_at - timezone.now(), delay,
+                                   delta=timedelta(minutes=1))
+            AdoptionSubscription.objects.filter(pk=subscription.pk).update(
+                next_renewal_at=timezone.now())
+        self.assertEqual(renew_batch(), (0, 1, 0))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.status, 'canceled')
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(renew_batch(), (0, 0, 0))
+
+    def test_provider_error_and_claims(self):
+        failing = self.adopt()
+        self.gateway.failure_rate = 1.0
+        self.assertEqual(renew_batch(), (0, 1, 0))
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.failed_attempts), ('active', 0))
+        self.assertGreater(failing.claimed_until, timezone.now())
+        self.assertIn('Simulated', failing.last_error)
+
+        # Claimed (by this retry or another scheduler): skipped for now
+        self.gateway.failure_rate = 0.0
+        self.assertEqual(renew_batch(), (0, 0, 0))
+        AdoptionSubscription.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(renew_batch(), (1, 0, 0))
+
+    def test_inactive_animal_cancels(self):
+        gone = Animal.objects.create(name='Max', species='Goat', description='A goat',
+                                     is_active=False)
+        subscription = self.adopt(animal=gone)
+        self.assertEqual(renew_batch(), (0, 0, 1))
+        self.assertEqual(renew_batch(), (0, 0, 0))
+        subscription.refresh_from_db()
+        self.assertEqual(subscription.status, 'canceled')
+        self.assertEqual(self.gateway.stats['charge'], 0)
+
+    def test_cancel_during_charge_is_kept(self):
+        subscription = self.adopt()
+        due = subscription.next_renewal_at
+
+        def cancel_then_record(results, now):
+            AdoptionSubscription.objects.get(pk=subscription.pk).cancel()
+            return record(results, now)
+
+        with mock.patch('payments.adoptions.record', cancel_then_record):
+            self.assertEqual(renew_batch(), (1, 0, 0))
+        subscription.refresh_from_db()
+        self.assertEqual((subscription.status, subscription.next_renewal_at),
+                         ('canceled', due))
+        self.assertIsNotNone(subscription.canceled_at)
+        # The charge that was already made is still recorded
+        self.assertEqual(Payment.objects.filter(subscription=subscription).count(), 1)
+        self.assertEqual(renew_batch(), (0, 0, 0))
+
+    def test_charged_twice_recorded_once(self):
+        subscription = self.adopt()
+        renew_batch()
+        # As if the scheduler crashed after charging: same due date again
+        subscription.refresh_from_db()
+        AdoptionSubscription.objects.filter(pk=subscription.pk).update(
+            next_renewal_at=subscription.started_at)
+        self.assertEqual(renew_batch(), (1, 0, 0))
+        self.assertEqual(self.gateway.stats['charge'], 2)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_command(self):
+        self.adopt()
+        gone = Animal.objects.create(name='Max', species='Goat', description='A goat',
+                                     is_active=False)
+        # A batch of only canceled adoptions does not end the run early
+        self.adopt(animal=gone, due=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        call_command('run_adoption_renewals', '--workers', '4', '--batch-size', '1', stdout=out)
+        self.assertIn('Renewed 1 adoptions (0 failed, 1 canceled)', out.getvalue())
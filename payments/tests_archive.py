@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.feeds import supporter_ids
+from animals.models import Animal
+from payments.archive import archive_cutoff, archive_chunk
+from payments.export import export_lines
+from payments.models import AnimalDonationStats, OutboundEmail, Payment, PaymentArchive
+from payments.testing import make_payment
+from payments.webhooks import record_intent_status
+
+User = get_user_model()
+
+
+class PaymentArchiveTests(TestCase):
+    """
+    Tests for the cold payment archive.
+
+    These tests verify that:
+    - Only settled payments from closed months are moved, ids intact.
+    - Payments still needed by moderation or the wall stay hot.
+    - Stats, rollups and supporter counts include archived payments.
+    - A late refund restores the archived payment and updates the stats.
+    - Dashboards, exports and update feeds still see archived donations.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='donor', email='donor@example.com', password='testpass123')
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+        self.old = timezone.now() - timedelta(days=200)
+
+    def pay(self, when, status='succeeded', **kwargs):
+        return make_payment(status, when, animal=self.lucky, user=self.user, **kwargs)
+
+    def test_cutoff(self):
+        now = timezone.datetime(2026, 10, 18, 12, tzinfo=timezone.utc)
+        self.assertEqual(archive_cutoff(3, now), now.replace(month=8, day=1, hour=0))
+        self.assertEqual(archive_cutoff(1, now), now.replace(day=1, hour=0))
+        self.assertEqual(archive_cutoff(11, now), now.replace(year=2025, month=12, day=1, hour=0))
+
+    def test_archives_closed_months(self):
+        succeeded = self.pay(self.old)
+        failed = self.pay(self.old, status='failed')
+        pending = self.pay(self.old, status='pending')
+        in_review = self.pay(self.old, message='Go Lucky!')
+        on_wall = self.pay(self.old, message='Hi', message_status='approved')
+        recent = self.pay(timezone.now())
+        self.assertEqual(OutboundEmail.objects.filter(payment=succeeded).count(), 1)
+
+        out = StringIO()
+        call_command('archive_payments', '--dry-run', stdout=out)
+        self.assertIn('2 payments', out.getvalue())
+        call_command('archive_payments', '--chunk-size', '1', stdout=out)
+        self.assertIn('Done: 2 payments', out.getvalue())
+
+        self.assertEqual(set(PaymentArchive.objects.values_list('pk', flat=True)),
+                         {succeeded.pk, failed.pk})
+        self.assertEqual(set(Payment.objects.values_list('pk', flat=True)),
+                         {pending.pk, in_review.pk, on_wall.pk, recent.pk})
+        archived = PaymentArchive.objects.get(pk=succeeded.pk)
+        self.assertEqual((archived.created_at, archived.amount, archived.user_id),
+                         (succeeded.created_at, Decimal('10.00'), self.user.pk))
+        self.assertEqual(OutboundEmail.objects.filter(payment__isnull=True).count(), 1)
+
+        stats = AnimalDonationStats.objects.get(animal=self.lucky)
+        self.assertEqual((stats.total_raised, stats.donation_count, stats.supporter_count),
+                         (Decimal('40.00'), 4, 1))
+        call_command('rebuild_donation_stats', '--verify', stdout=StringIO())
+        call_command('rebuild_donation_rollups', '--verify', stdout=StringIO())
+
+        # The supporter is still counted through the archived donation
+        Payment.objects.all().delete()
+        stats.refresh_from_db()
+        self.assertEqual((stats.donation_count, stats.supporter_count), (1, 1))
+
+    def test_late_refund_restores(self):
+        payment = self.pay(self.old)
+        archive_chunk(archive_cutoff())
+        self.assertFalse(Payment.objects.exists())
+
+        restored, changed = record_intent_status(payment.stripe_payment_intent_id, 'refunded')
+        self.assertTrue(changed)
+        self.assertEqual((restored.pk, restored.created_at, restored.status),
+                         (payment.pk, payment.created_at, 'refunded'))
+        self.assertFalse(PaymentArchive.objects.exists())
+        stats = AnimalDonationStats.objects.get(animal=self.lucky)
+        self.assertEqual((stats.total_raised, stats.donation_count), (Decimal('0.00'), 0))
+
+        # A replayed success does not create a second payment either
+        archive_chunk(archive_cutoff())
+        record_intent_status(payment.stripe_payment_intent_id, 'succeeded', amount=1000)
+        self.assertEqual(Payment.objects.get().status, 'refunded')
+
+    def test_history_includes_archive(self):
+        self.pay(self.old)
+        self.pay(timezone.now())
+        archive_chunk(archive_cutoff())
+
+        self.client.login(username='donor', password='testpass123')
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertEqual(response.context['total_donations'], 2)
+        self.assertEqual(response.context['total_donated'], Decimal('20.00'))
+        self.assertEqual(len(response.context['donations']), 2)
+
+        self.assertEqual(len(list(export_lines('jsonl'))), 2)
+
+    def test_archived_supporters_get_updates(self):
+        self.pay(self.old)
+        archive_chunk(archive_cutoff())
+        self.assertEqual(list(supporter_ids(self.lucky.pk)), [self.user.pk])
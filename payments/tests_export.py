@@ -0,0 +1,99 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from animals.models import Animal
+from payments.export import InvalidFilter, export_lines, parse_filters
+from payments.models import Payment
+
+User = get_user_model()
+
+
+class DonationExportTests(TestCase):
+    """
+    Tests for the streaming donation export.
+
+    These tests verify that:
+    - Rows come from one joined query, oldest first.
+    - Date-range and status filters are applied and validated.
+    - The view streams CSV or JSONL and is staff-only.
+    - The command writes the same output to stdout or a file.
+    """
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff', password='testpass123', is_staff=True)
+        self.donor = User.objects.create_user(username='donor', password='testpass123')
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+        self.march = self.pay(10, datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc),
+                              user=self.donor, animal=self.lucky)
+        self.april = self.pay(5, datetime(2026, 4, 30, 23, tzinfo=dt_timezone.utc))
+        self.failed = self.pay(7, datetime(2026, 4, 2, tzinfo=dt_timezone.utc), status='failed')
+
+    def pay(self, amount, when, status='succeeded', **kwargs):
+        payment = Payment.objects.create(
+            amount=amount, email='guest@example.com', status=status,
+            stripe_payment_intent_id=f'pi_{Payment.objects.count()}', **kwargs)
+        Payment.objects.filter(pk=payment.pk).update(created_at=when)
+        return payment
+
+    def test_rows_and_filters(self):
+        with self.assertNumQueries(1):
+            rows = list(csv.DictReader(export_lines('csv')))
+        self.assertEqual([row['id'] for row in rows],
+                         [str(self.march.pk), str(self.failed.pk), str(self.april.pk)])
+        self.assertEqual(rows[0]['username'], 'donor')
+        self.assertEqual(rows[0]['animal'], 'Lucky')
+        self.assertEqual(rows[0]['amount'], '10.00')
+
+        filters = parse_filters('2026-04-01', '2026-04-30', 'succeeded,refunded')
+        lines = list(export_lines('jsonl', **filters))
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.april.pk])
+
+        for args in (('2026-13-01', None, None), ('soon', None, None), (None, None, 'paid')):
+            with self.assertRaises(InvalidFilter):
+                parse_filters(*args)
+
+    def test_view_streams(self):
+        url = reverse('payments:export_donations')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(url, {'status': 'succeeded'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 3)
+
+        response = self.client.get(url, {'format': 'jsonl', 'end': '2026-03-31'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['amount'], '10.00')
+        self.assertEqual(len(lines), 1)
+
+        self.assertEqual(self.client.get(url, {'format': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_donations', '--format', 'jsonl', '--status', 'failed', stdout=out)
+        self.assertEqual([json.loads(line)['id'] for line in out.getvalue().splitlines()],
+                         [self.failed.pk])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'donations.csv')
+            out = StringIO()
+            call_command('export_donations', '--output', path, '--chunk-size', '1', stdout=out)
+            self.assertIn('Exported 3 donations', out.getvalue())
+            with open(path, newline='') as handle:
+                self.assertEqual(len(list(csv.DictReader(handle))), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('export_donations', '--start', 'never', stdout=StringIO())
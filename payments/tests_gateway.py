@@ -0,0 +1,93 @@
+import json
+from unittest import mock
+
+import stripe
+from django.test import SimpleTestCase, override_settings
+
+from payments.gateway import (FakeGateway, GatewayError, IntentNotModifiable,
+                              InvalidSignature, StripeGateway, get_gateway)
+
+
+class FakeGatewayTests(SimpleTestCase):
+    """
+    Tests for the in-process gateway.
+
+    These tests verify that:
+    - Intents can be created, updated, confirmed and canceled.
+    - Simulated failures are repeatable for a given seed.
+    - Webhooks signed by the fake pass verification.
+    """
+    def test_intent_lifecycle(self):
+        gateway = FakeGateway()
+        intent = gateway.create_intent(500, metadata={'animal_id': 1})
+        self.assertEqual(intent.metadata, {'animal_id': '1'})
+        self.assertEqual(gateway.update_intent(intent.id, 1000).amount, 1000)
+        gateway.succeed(intent.id)
+        with self.assertRaises(IntentNotModifiable):
+            gateway.cancel_intent(intent.id)
+        self.assertEqual(gateway.stats, {'create': 1, 'update': 1, 'cancel': 1})
+
+    def test_failures_are_seeded(self):
+        def outcomes(seed):
+            gateway = FakeGateway(failure_rate=0.5, seed=seed)
+            results = []
+            for _ in range(20):
+                try:
+                    gateway.create_intent(100)
+                    results.append(True)
+                except GatewayError:
+                    results.append(False)
+            return results
+        self.assertEqual(outcomes(7), outcomes(7))
+        self.assertIn(False, outcomes(7))
+        self.assertIn(True, outcomes(7))
+
+    @override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+    def test_webhook_signatures(self):
+        gateway = FakeGateway()
+        intent = gateway.create_intent(500)
+        payload = json.dumps(gateway.event(intent.id))
+        event = gateway.parse_webhook(payload.encode(), gateway.sign(payload))
+        self.assertEqual(event['data']['object']['id'], intent.id)
+        with self.assertRaises(InvalidSignature):
+            gateway.parse_webhook(payload.encode(), gateway.sign(payload, 'whsec_other'))
+
+
+class StripeGatewayTests(SimpleTestCase):
+    """
+    These tests verify that:
+    - The configured gateway is built once and rebuilt when settings change.
+    - Stripe SDK errors surface as gateway errors; only an intent in an
+      unexpected state is reported as not modifiable.
+    """
+    @override_settings(PAYMENT_GATEWAY='payments.gateway.FakeGateway')
+    def test_gateway_is_shared(self):
+        self.assertIs(get_gateway(), get_gateway())
+        with override_settings(PAYMENT_GATEWAY_OPTIONS={'latency': 0.01}):
+            self.assertEqual(get_gateway().latency, 0.01)
+
+    def test_errors_are_translated(self):
+        gateway = StripeGateway(api_key='sk_test_x')
+        payment_intents = mock.Mock()
+        payment_intents.update.side_effect = stripe.InvalidRequestError(
+            'bad state', None, code='payment_intent_unexpected_state')
+        payment_intents.cancel.side_effect = stripe.APIConnectionError('timed out')
+        payment_intents.create.side_effect = stripe.InvalidRequestError(
+            'bad currency', 'currency', code='parameter_invalid_string')
+        payment_intents.retrieve.side_effect = stripe.InvalidRequestError(
+            'No such payment_intent', 'intent', code='resource_missing')
+        with mock.patch.object(gateway.client.v1, 'payment_intents', payment_intents):
+            with self.assertRaises(IntentNotModifiable):
+                gateway.update_intent('pi_1', 500)
+            # Only the unexpected-state error means "replace the intent"
+            for call in (lambda: gateway.cancel_intent('pi_1'),
+                         lambda: gateway.create_intent(500),
+                         lambda: gateway.retrieve_intent('pi_1')):
+                with self.assertRaises(GatewayError) as caught:
+                    call()
+                self.assertNotIsInstance(caught.exception, IntentNotModifiable)
+            payment_intents.update.side_effect = stripe.InvalidRequestError(
+                'No such payment_intent', 'intent', code='resource_missing')
+            with self.assertRaises(GatewayError) as caught:
+                gateway.update_intent('pi_1', 500)
+            self.assertNotIsInstance(caught.exception, IntentNotModifiable)
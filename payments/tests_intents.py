@@ -0,0 +1,116 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from animals.models import Animal
+from payments.gateway import get_gateway
+from payments.models import DonationIntent, Payment
+from payments.webhooks import record_intent_status
+
+User = get_user_model()
+
+
+@override_settings(PAYMENT_GATEWAY='payments.gateway.FakeGateway')
+class DonationIntentTests(TestCase):
+    """
+    Tests for PaymentIntent reuse on the donation form.
+
+    These tests verify that:
+    - Reloading the form with the same amount makes no Stripe request.
+    - Changing the amount modifies the open intent in place.
+    - The JSON endpoint changes the amount without a page render.
+    - Submitting the donation, or the webhook recording its outcome,
+      closes the intent; a paid intent is never offered again.
+    - The sweeper cancels only stale open intents.
+    """
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.gateway = get_gateway()
+        self.user = User.objects.create_user(username='donor', password='testpass123')
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse')
+        self.client.login(username='donor', password='testpass123')
+        self.form_url = reverse('payments:create_donation', args=[self.animal.slug])
+        self.amount_url = reverse('payments:update_donation_amount', args=[self.animal.slug])
+
+    def test_reload_reuses_intent(self):
+        self.client.get(self.form_url, {'amount': '10'})
+        response = self.client.get(self.form_url, {'amount': '10'})
+        self.assertContains(response, 'pi_fake_1_secret')
+        self.assertEqual(self.gateway.stats, {'create': 1})
+
+    def test_amount_change_modifies_intent(self):
+        self.client.get(self.form_url, {'amount': '5'})
+        response = self.client.post(self.amount_url, {'amount': '25'})
+        self.assertEqual(response.json(),
+                         {'amount': '25.00', 'client_secret': 'pi_fake_1_secret'})
+        self.assertEqual(self.gateway.stats, {'create': 1, 'update': 1})
+        self.assertEqual(self.gateway.intents['pi_fake_1'].amount, 2500)
+        self.assertEqual(DonationIntent.objects.get().amount, Decimal('25.00'))
+
+    def test_unmodifiable_intent_is_replaced(self):
+        self.client.get(self.form_url, {'amount': '5'})
+        self.gateway.succeed('pi_fake_1')
+        response = self.client.post(self.amount_url, {'amount': '10'})
+        self.assertEqual(response.json()['client_secret'], 'pi_fake_2_secret')
+        self.assertEqual(
+            dict(DonationIntent.objects.values_list('stripe_payment_intent_id', 'status')),
+            {'pi_fake_1': 'canceled', 'pi_fake_2': 'open'},
+        )
+
+    def test_invalid_amount(self):
+        response = self.client.post(self.amount_url, {'amount': '0.5'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.gateway.stats, {})
+
+    def test_submitting_closes_intent(self):
+        self.client.get(self.form_url, {'amount': '10'})
+        self.client.post(reverse('payments:process_donation', args=[self.animal.slug]), {
+            'amount': '10', 'payment_intent_id': 'pi_fake_1',
+        })
+        self.assertEqual(DonationIntent.objects.get().status, 'used')
+        self.client.get(self.form_url, {'amount': '10'})
+        self.assertEqual(self.gateway.stats, {'create': 2})
+
+    def test_webhook_success_closes_intent(self):
+        self.client.get(self.form_url, {'amount': '10'})
+        # The donor paid but the form post never arrived
+        record_intent_status('pi_fake_1', 'succeeded', amount=1000,
+                             metadata={'animal_id': self.animal.pk, 'user_id': self.user.pk})
+        self.assertEqual(DonationIntent.objects.get().status, 'used')
+        response = self.client.get(self.form_url, {'amount': '10'})
+        self.assertContains(response, 'pi_fake_2_secret')
+
+    def test_paid_open_intent_is_not_reused(self):
+        self.client.get(self.form_url, {'amount': '10'})
+        Payment.objects.create(user=self.user, animal=self.animal, amount=10,
+                               email='donor@example.com', status='succeeded',
+                               stripe_payment_intent_id='pi_fake_1')
+        response = self.client.get(self.form_url, {'amount': '10'})
+        self.assertContains(response, 'pi_fake_2_secret')
+        self.assertEqual(
+            dict(DonationIntent.objects.values_list('stripe_payment_intent_id', 'status')),
+            {'pi_fake_1': 'used', 'pi_fake_2': 'open'},
+        )
+
+    def test_sweeper_cancels_stale_intents(self):
+        for amount in ('5', '10'):
+            self.client.get(self.form_url, {'amount': amount})
+        other = Animal.objects.create(name='Max', species='Goat', description='A goat')
+        self.client.get(reverse('payments:create_donation', args=[other.slug]), {'amount': '5'})
+        DonationIntent.objects.filter(animal=self.animal).update(
+            updated_at=timezone.now() - timedelta(days=2))
+
+        call_command('cancel_stale_intents', '--batch-size=1', stdout=StringIO())
+        self.assertEqual(
+            dict(DonationIntent.objects.values_list('stripe_payment_intent_id', 'status')),
+            {'pi_fake_1': 'canceled', 'pi_fake_2': 'open'},
+        )
+        self.assertEqual(self.gateway.intents['pi_fake_1'].status, 'canceled')
+        self.assertEqual(self.gateway.stats['cancel'], 1)
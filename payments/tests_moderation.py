@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from animals.models import Animal
+from payments.models import Payment
+from payments.moderation import moderate, moderation_page
+from payments.wall import message_wall
+
+User = get_user_model()
+
+
+class ModerationQueueTests(TestCase):
+    """
+    Tests for the donor message moderation queue.
+
+    These tests verify that:
+    - Only pending, non-empty messages are queued, oldest first.
+    - Pages are keyset-paginated with animal and donor in one query.
+    - Bulk decisions are one UPDATE that skips already moderated rows.
+    - Affected walls are refreshed, and the queue is staff-only.
+    """
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff', password='testpass123', is_staff=True)
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+        self.max = Animal.objects.create(name='Max', species='Goat', description='A goat')
+
+    def pay(self, message, animal=None, **kwargs):
+        return Payment.objects.create(
+            animal=animal or self.lucky, amount=5, email='guest@example.com',
+            donor_name='Guest', message=message, status='succeeded',
+            stripe_payment_intent_id=f'pi_{Payment.objects.count()}', **kwargs)
+
+    def test_queue_contents_and_pagination(self):
+        first = self.pay('First')
+        self.pay('')
+        self.pay('Done', message_status='approved')
+        second = self.pay('Second', animal=self.max)
+        third = self.pay('Third')
+
+        with self.assertNumQueries(1):
+            page = moderation_page(per_page=2)
+            rows = [(payment.message, payment.animal.name) for payment in page]
+        self.assertEqual(rows, [('First', 'Lucky'), ('Second', 'Max')])
+        next_page = moderation_page(after=page.next_cursor, per_page=2)
+        self.assertEqual([payment.pk for payment in next_page], [third.pk])
+        self.assertEqual({first.pk, second.pk} & {p.pk for p in next_page}, set())
+
+    def test_bulk_approve_is_one_update(self):
+        payments = [self.pay(f'Message {n}', animal=animal)
+                    for n, animal in enumerate([self.lucky, self.max, self.lucky])]
+        rejected = self.pay('Rude', message_status='rejected')
+        message_wall(self.lucky.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            changed = moderate([p.pk for p in payments] + [rejected.pk], 'approve')
+        self.assertEqual(
+            [query['sql'].split()[0] for query in queries
+             if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))],
+            ['SELECT', 'UPDATE'],
+        )
+        self.assertEqual(changed, 3)
+        self.assertEqual(
+            set(Payment.objects.exclude(message_approved_at=None).values_list('pk', flat=True)),
+            {p.pk for p in payments},
+        )
+        self.assertEqual(Payment.objects.get(pk=rejected.pk).message_status, 'rejected')
+        self.assertEqual(len(message_wall(self.lucky.pk)['messages']), 2)
+
+    def test_staff_view(self):
+        payment = self.pay('Hello Lucky')
+        url = reverse('payments:moderation')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.login(username='staff', password='testpass123')
+        self.assertContains(self.client.get(url), 'Hello Lucky')
+        response = self.client.post(reverse('payments:moderate_messages'), {
+            'action': 'reject', 'payment': [payment.pk], 'next': 'https://evil.example/',
+        })
+        self.assertRedirects(response, url)
+        self.assertEqual(Payment.objects.get().message_status, 'rejected')
+        self.assertNotContains(self.client.get(url), 'Hello Lucky')
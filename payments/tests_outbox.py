@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from animals.models import Animal
+from payments.models import OutboundEmail, Payment
+from payments.outbox import MAX_ATTEMPTS, send_outbox
+
+
+class StubSMTPBackend(EmailBackend):
+    """
+    Local stand-in for an SMTP server: records connections and refuses
+    recipients listed in ``rejected`` (or everything when ``down``).
+    """
+    opened = 0
+    down = False
+    rejected = set()
+
+    def open(self):
+        if self.down:
+            raise ConnectionRefusedError("SMTP server unavailable")
+        StubSMTPBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.rejected:
+                raise OSError(f"550 rejected {message.to[0]}")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='payments.tests_outbox.StubSMTPBackend')
+class OutboxTests(TestCase):
+    """
+    Tests for the email outbox.
+
+    These tests verify that:
+    - A receipt is queued once, when a payment first succeeds.
+    - A batch is delivered over one connection.
+    - Failures back off exponentially and end up dead.
+    - An unreachable server delays the batch without losing it.
+    - A rolled back donation leaves no email behind.
+    """
+    def setUp(self):
+        StubSMTPBackend.opened = 0
+        StubSMTPBackend.down = False
+        StubSMTPBackend.rejected = set()
+        self.lucky = Animal.objects.create(name='Lucky', species='Horse', description='A horse')
+
+    def pay(self, email, status='succeeded'):
+        return Payment.objects.create(
+            animal=self.lucky, amount=12, email=email, status=status,
+            donor_name='Sam', stripe_payment_intent_id=f'pi_{Payment.objects.count()}')
+
+    def test_receipt_queued_once(self):
+        payment = self.pay('sam@example.com', status='pending')
+        self.assertFalse(OutboundEmail.objects.exists())
+        payment.status = 'succeeded'
+        payment.save()
+        payment.status = 'refunded'
+        payment.save()
+        Payment.objects.filter(pk=payment.pk).update(status='pending')
+        payment = Payment.objects.get(pk=payment.pk)
+        payment.status = 'succeeded'
+        payment.save()
+
+        receipt = OutboundEmail.objects.get()
+        self.assertEqual((receipt.kind, receipt.to_email, receipt.status),
+                         ('receipt', 'sam@example.com', 'pending'))
+        self.assertIn('£12', receipt.subject)
+        self.assertIn('help Lucky', receipt.body)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_batch_over_one_connection(self):
+        for n in range(3):
+            self.pay(f'donor{n}@example.com')
+        out = StringIO()
+        call_command('send_outbox', stdout=out)
+        self.assertIn('Sent 3 emails', out.getvalue())
+        self.assertEqual(StubSMTPBackend.opened, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['donor0@example.com', 'donor1@example.com', 'donor2@example.com'])
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(send_outbox(), (0, 0))
+
+    def test_retry_backoff_and_dead_letter(self):
+        self.pay('good@example.com')
+        self.pay('bad@example.com')
+        StubSMTPBackend.rejected = {'bad@example.com'}
+
+        self.assertEqual(send_outbox(), (1, 1))
+        bad = OutboundEmail.objects.get(to_email='bad@example.com')
+        self.assertEqual((bad.status, bad.attempts), ('pending', 1))
+        self.assertIn('550', bad.last_error)
+        self.assertEqual(send_outbox(), (0, 0))  # not due yet
+
+        delays = []
+        for attempt in range(2, MAX_ATTEMPTS + 1):
+            before = timezone.now()
+            OutboundEmail.objects.filter(pk=bad.pk).update(next_attempt_at=before)
+            self.assertEqual(send_outbox(), (0, 1))
+            bad.refresh_from_db()
+            if bad.status == 'pending':
+                delays.append(round((bad.next_attempt_at - before).total_seconds() / 60))
+        self.assertEqual(delays, [2, 4, 8])
+        self.assertEqual((bad.status, bad.attempts), ('dead', MAX_ATTEMPTS))
+
+    def test_server_down(self):
+        self.pay('sam@example.com')
+        StubSMTPBackend.down = True
+        self.assertEqual(send_outbox(), (0, 1))
+        email = OutboundEmail.objects.get()
+        self.assertIn('ConnectionRefusedError', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        StubSMTPBackend.down = False
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_outbox(), (1, 0))
+
+
+    def test_rollback_discards_receipt(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.pay('sam@example.com')
+            self.assertEqual(OutboundEmail.objects.count(), 1)
+            raise RuntimeError
+        self.assertFalse(OutboundEmail.objects.exists())
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from animals.models import Animal
+from payments.archive import archive_chunk, archive_cutoff
+from payments.gateway import get_gateway
+from payments.models import Payment, PaymentArchive
+
+User = get_user_model()
+
+
+@override_settings(PAYMENT_GATEWAY='payments.gateway.FakeGateway')
+class ReconcileStripeTests(TestCase):
+    """
+    Tests for intent-keyed payments and Stripe reconciliation.
+
+    These tests verify that:
+    - A double-submitted donation form records one payment.
+    - Reconciliation reports missing payments, stale statuses and
+      wrong amounts, and fails until they are fixed.
+    - --fix creates and updates payments without downgrading any.
+    - Archived payments count as recorded; only corrected ones are
+      brought back to the hot table.
+    - Payments are looked up per page, not per intent.
+    """
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.gateway = get_gateway()
+        self.user = User.objects.create_user(
+            username='donor', password='testpass123', email='donor@example.com')
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse')
+
+    def intent(self, amount=1000, succeed=True):
+        intent = self.gateway.create_intent(
+            amount, metadata={'animal_id': self.animal.pk, 'user_id': self.user.pk})
+        if succeed:
+            self.gateway.succeed(intent.id)
+        return intent.id
+
+    def payment(self, intent_id, status='succeeded', amount=10):
+        return Payment.objects.create(
+            user=self.user, animal=self.animal, amount=amount, email='donor@example.com',
+            status=status, stripe_payment_intent_id=intent_id)
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_stripe', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_double_submit_records_one_payment(self):
+        self.client.login(username='donor', password='testpass123')
+        url = reverse('payments:process_donation', args=[self.animal.slug])
+        for _ in range(2):
+            self.client.post(url, {'amount': '10', 'payment_intent_id': 'pi_1'})
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_consistent(self):
+        self.payment(self.intent())
+        self.intent(succeed=False)
+        self.assertIn('0 mismatches', self.reconcile())
+
+    def test_reports_and_fixes_mismatches(self):
+        missing = self.intent(amount=2500)
+        stale = self.intent()
+        wrong_amount = self.intent(amount=500)
+        self.payment(stale, status='pending')
+        self.payment(wrong_amount, amount=50)
+
+        with self.assertRaisesMessage(CommandError, '3 mismatches'):
+            self.reconcile('--page-size=2')
+
+        self.assertIn('3 fixed', self.reconcile('--fix', '--page-size=2'))
+        self.assertEqual(
+            dict(Payment.objects.values_list('stripe_payment_intent_id', 'status')),
+            {missing: 'succeeded', stale: 'succeeded', wrong_amount: 'succeeded'},
+        )
+        self.assertEqual(Payment.objects.get(stripe_payment_intent_id=missing).user, self.user)
+        self.assertEqual(self.animal.donation_stats.total_raised, Decimal('40.00'))
+        self.assertIn('0 mismatches', self.reconcile())
+
+    def test_archived_payments_are_recorded(self):
+        archived = self.payment(self.intent())
+        wrong_amount = self.payment(self.intent(amount=500), amount=50)
+        Payment.objects.update(created_at=timezone.now() - timedelta(days=200))
+        archive_chunk(archive_cutoff())
+        self.assertFalse(Payment.objects.exists())
+
+        with self.assertRaisesMessage(CommandError, '1 mismatches'):
+            self.reconcile('--days=365')
+        self.assertIn('1 fixed', self.reconcile('--fix', '--days=365'))
+        # Only the corrected payment comes back to the hot table
+        self.assertEqual(PaymentArchive.objects.get().pk, archived.pk)
+        self.assertEqual(Payment.objects.get().amount, Decimal('5.00'))
+        self.assertEqual(Payment.objects.get().pk, wrong_amount.pk)
+        self.assertEqual(self.animal.donation_stats.total_raised, Decimal('15.00'))
+        self.assertIn('0 mismatches', self.reconcile('--days=365'))
+
+    def test_never_downgrades(self):
+        intent_id = self.intent(succeed=False)
+        self.gateway.cancel_intent(intent_id)
+        self.payment(intent_id, status='succeeded')
+        self.assertIn('0 fixed', self.reconcile('--fix'))
+        self.assertEqual(Payment.objects.get().status, 'succeeded')
+
+    def test_one_query_per_page(self):
+        for _ in range(4):
+            self.payment(self.intent())
+        with self.assertNumQueries(2):
+            self.reconcile('--page-size=2')
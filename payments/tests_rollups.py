@@ -0,0 +1,88 @@
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from animals.models import Animal, Category
+from payments.models import DonationRollup
+from payments.rollups import report
+from payments.testing import make_payment
+
+User = get_user_model()
+
+
+class DonationRollupTests(TestCase):
+    """
+    Tests for the reporting rollups.
+
+    These tests verify that:
+    - Succeeded payments are added to their day and month rollups.
+    - Refunds and amount corrections are subtracted again.
+    - Reports group by category or animal from the rollups alone, and
+      invalid report dates fall back to the defaults.
+    - The rebuild command verifies and repairs the rollups.
+    """
+    def setUp(self):
+        self.horses = Category.objects.create(name='Horses', slug='horses')
+        self.lucky = Animal.objects.create(
+            name='Lucky', species='Horse', description='A horse', category=self.horses)
+        self.max = Animal.objects.create(name='Max', species='Goat', description='A goat')
+
+    def pay(self, amount, animal, when, status='succeeded'):
+        return make_payment(status, when, animal=animal, amount=amount)
+
+    def at(self, *args):
+        return datetime(*args, 12, tzinfo=dt_timezone.utc)
+
+    def test_incremental_updates(self):
+        self.pay(10, self.lucky, self.at(2026, 3, 1))
+        refunded = self.pay(3, self.lucky, self.at(2026, 3, 1))
+        refunded.status = 'refunded'
+        refunded.save()
+        second = self.pay(5, self.lucky, self.at(2026, 3, 2), status='pending')
+        second.status = 'succeeded'
+        second.save()
+        second.amount = Decimal('7.50')
+        second.save()
+        self.pay(20, self.max, self.at(2026, 4, 1))
+
+        months = {(row['period_start'], row['category__name']): row['total_amount']
+                  for row in report('month', group='category')}
+        self.assertEqual(months, {
+            (date(2026, 3, 1), 'Horses'): Decimal('17.50'),
+            (date(2026, 4, 1), None): Decimal('20.00'),
+        })
+        days = report('day', date(2026, 3, 2), date(2026, 3, 31), group='animal')
+        self.assertEqual([(row['animal__name'], row['donations']) for row in days],
+                         [('Lucky', 1)])
+
+    def test_rebuild_command(self):
+        self.pay(10, self.lucky, self.at(2026, 3, 1))
+        self.pay(5, self.max, self.at(2026, 3, 5))
+        call_command('rebuild_donation_rollups', '--verify', stdout=StringIO())
+
+        DonationRollup.objects.filter(period='month').update(total=0)
+        with self.assertRaisesMessage(CommandError, '2 rollup rows are stale'):
+            call_command('rebuild_donation_rollups', '--verify', stdout=StringIO())
+        call_command('rebuild_donation_rollups', stdout=StringIO())
+        call_command('rebuild_donation_rollups', '--verify', stdout=StringIO())
+
+    def test_admin_report(self):
+        self.pay(10, self.lucky, self.at(2026, 3, 1))
+        User.objects.create_superuser('admin', 'admin@example.com', 'testpass123')
+        self.client.login(username='admin', password='testpass123')
+        with self.assertNumQueries(3):  # session, user, report
+            response = self.client.get(reverse('admin:payments_donationrollup_changelist'), {
+                'group': 'category', 'start': '2026-01-01', 'end': '2026-12-31'})
+        self.assertContains(response, 'Horses')
+        self.assertContains(response, '£10.00')
+
+        response = self.client.get(reverse('admin:payments_donationrollup_changelist'), {
+            'period': 'day', 'start': '2026-13-01', 'end': '2026-02-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['end'], timezone.localdate())
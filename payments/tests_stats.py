@@ -0,0 +1,83 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from animals.models import Animal
+from payments.models import AnimalDonationStats, Payment
+
+User = get_user_model()
+
+
+class DonationStatsTests(TestCase):
+    """
+    Tests for denormalised per-animal donation totals.
+
+    These tests verify that:
+    - Succeeded payments add to total, count and distinct supporters.
+    - Refunds and failures after success are taken back out.
+    - The rebuild command verifies and repairs totals.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='donor', password='testpass123')
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse'
+        )
+
+    def pay(self, amount, status='succeeded', user=None, email='guest@example.com'):
+        return Payment.objects.create(
+            user=user, animal=self.animal, amount=amount, email=email,
+            status=status, stripe_payment_intent_id=f'pi_{Payment.objects.count()}',
+        )
+
+    def stats(self):
+        stats = AnimalDonationStats.objects.get(animal=self.animal)
+        return stats.total_raised, stats.donation_count, stats.supporter_count
+
+    def test_succeeded_payments_counted(self):
+        self.pay(10, user=self.user)
+        self.pay(5.5, user=self.user)
+        self.pay(20, email='Guest@Example.com')
+        self.pay(1, email='guest@example.com')
+        self.pay(100, status='pending')
+        self.assertEqual(self.stats(), (Decimal('36.50'), 4, 2))
+
+    def test_transition_to_succeeded(self):
+        payment = self.pay(10, status='pending', user=self.user)
+        payment.status = 'succeeded'
+        payment.save()
+        payment.save()
+        self.assertEqual(self.stats(), (Decimal('10.00'), 1, 1))
+
+    def test_refund_removes_payment_and_supporter(self):
+        first = self.pay(10, user=self.user)
+        second = self.pay(15, user=self.user)
+        first.status = 'refunded'
+        first.save()
+        self.assertEqual(self.stats(), (Decimal('15.00'), 1, 1))
+        second.delete()
+        self.assertEqual(self.stats(), (Decimal('0.00'), 0, 0))
+
+    def test_rebuild_command(self):
+        self.pay(10, user=self.user)
+        self.pay(5)
+        AnimalDonationStats.objects.filter(animal=self.animal).update(total_raised=999)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_donation_stats', '--verify', stdout=StringIO())
+        call_command('rebuild_donation_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), (Decimal('15.00'), 2, 2))
+        call_command('rebuild_donation_stats', '--verify', stdout=StringIO())
+
+    def test_detail_page_shows_totals_without_aggregation(self):
+        self.pay(200, user=self.user)
+        url = reverse('animals:detail', args=[self.animal.slug])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, "£200.00")
+        self.assertContains(response, "raised so far")
+        self.pay(50)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from animals.models import Animal
+from animals.pagination import InvalidCursor, encode_cursor
+from payments.models import Payment
+from payments.wall import message_wall
+
+User = get_user_model()
+
+
+class MessageWallTests(TestCase):
+    """
+    Tests for the approved-message wall on the animal page.
+
+    These tests verify that:
+    - Only approved, non-empty messages are shown, newest approval first.
+    - Pages are cached and follow keyset cursors.
+    - Approving or rejecting a message refreshes the cached wall.
+    - Messages of payments that are no longer succeeded (refunded,
+      deleted) leave the wall.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='donor', password='testpass123', first_name='Dana', last_name='Smith'
+        )
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse'
+        )
+
+    def pay(self, message, user=None):
+        return Payment.objects.create(
+            user=user, animal=self.animal, amount=5, email='guest@example.com',
+            donor_name='Guest', message=message, status='succeeded',
+            stripe_payment_intent_id=f'pi_{Payment.objects.count()}',
+        )
+
+    def test_only_approved_messages(self):
+        self.pay('Pending hello')
+        self.pay('Go Lucky!', user=self.user).approve_message()
+        self.pay('').approve_message()
+        self.pay('Rude').reject_message()
+        messages = message_wall(self.animal.pk)['messages']
+        self.assertEqual([(m['name'], m['message']) for m in messages],
+                         [('Dana Smith', 'Go Lucky!')])
+
+    def test_pages_are_cached_and_keyset_paginated(self):
+        for index in range(12):
+            self.pay(f'Message {index}').approve_message()
+        first = message_wall(self.animal.pk)
+        self.assertEqual(first['messages'][0]['message'], 'Message 11')
+        with self.assertNumQueries(0):
+            message_wall(self.animal.pk)
+        second = message_wall(self.animal.pk, after=first['next_cursor'])
+        self.assertEqual([m['message'] for m in second['messages']],
+                         ['Message 1', 'Message 0'])
+        self.assertIsNone(second['next_cursor'])
+        with self.assertRaises(InvalidCursor):
+            message_wall(self.animal.pk, after=encode_cursor(['yesterday', 1]))
+
+    def test_moderation_invalidates_cache(self):
+        message_wall(self.animal.pk)
+        payment = self.pay('Hello Lucky')
+        payment.approve_message()
+        self.assertEqual(len(message_wall(self.animal.pk)['messages']), 1)
+        payment.reject_message()
+        self.assertEqual(message_wall(self.animal.pk)['messages'], [])
+
+    def test_refunded_and_deleted_payments_leave_wall(self):
+        refunded = self.pay('Refunded')
+        refunded.approve_message()
+        deleted = self.pay('Deleted')
+        deleted.approve_message()
+        self.pay('Kept').approve_message()
+        self.assertEqual(len(message_wall(self.animal.pk)['messages']), 3)
+
+        refunded.status = 'refunded'
+        refunded.save()
+        self.assertEqual(len(message_wall(self.animal.pk)['messages']), 2)
+        deleted.delete()
+        self.assertEqual([m['message'] for m in message_wall(self.animal.pk)['messages']],
+                         ['Kept'])
+
+    def test_detail_page_shows_wall(self):
+        url = reverse('animals:detail', args=[self.animal.slug])
+        etag = self.client.get(url)['ETag']
+        self.pay('Get well soon', user=self.user).approve_message()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Get well soon')
+        self.assertContains(response, 'Dana Smith')
@@ -0,0 +1,178 @@
+import hashlib
+import hmac
+import json
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from animals.models import Animal
+from payments.models import Payment, StripeEvent
+from payments.webhooks import MAX_ATTEMPTS, process_events
+
+User = get_user_model()
+
+SECRET = 'whsec_test'
+
+
+class StripeStub:
+    """Builds Stripe-like events and posts them, signed, to the webhook."""
+
+    def __init__(self, client, secret=SECRET):
+        self.client = client
+        self.secret = secret
+        self.sequence = 0
+
+    def event(self, event_type, obj):
+        self.sequence += 1
+        return {'id': f'evt_{self.sequence}', 'object': 'event',
+                'type': event_type, 'data': {'object': obj}}
+
+    def intent(self, intent_id, amount=1000, **metadata):
+        return {'id': intent_id, 'object': 'payment_intent', 'amount': amount,
+                'amount_received': amount, 'customer': 'cus_1',
+                'receipt_email': 'donor@example.com',
+                'metadata': {key: str(value) for key, value in metadata.items()}}
+
+    def sign(self, payload, timestamp=None):
+        timestamp = timestamp or int(time.time())
+        digest = hmac.new(self.secret.encode(), f'{timestamp}.{payload}'.encode(),
+                          hashlib.sha256).hexdigest()
+        return f't={timestamp},v1={digest}'
+
+    def post(self, event, signature=None):
+        payload = json.dumps(event)
+        return self.client.post(
+            reverse('payments:stripe_webhook'), payload,
+            content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=signature or self.sign(payload),
+        )
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=SECRET)
+class StripeWebhookTests(TestCase):
+    """
+    Tests for the webhook inbox and its worker.
+
+    These tests verify that:
+    - Only correctly signed events are accepted, and each is stored once.
+    - The worker creates or updates payments from queued events.
+    - Out-of-order events cannot move a payment backwards.
+    - Only a full refund marks a payment refunded.
+    - Failing events are retried after a growing delay, then left for
+      inspection; the command carries on with the events behind them.
+    - process_donation records a pending payment without calling Stripe.
+    """
+    def setUp(self):
+        self.stripe = StripeStub(self.client)
+        self.user = User.objects.create_user(
+            username='donor', password='testpass123', email='donor@example.com')
+        self.animal = Animal.objects.create(
+            name='Lucky', species='Horse', description='A friendly horse')
+
+    def succeeded(self, intent_id='pi_1', amount=1000):
+        return self.stripe.event('payment_intent.succeeded', self.stripe.intent(
+            intent_id, amount, animal_id=self.animal.pk, user_id=self.user.pk))
+
+    def test_rejects_bad_signature(self):
+        event = self.succeeded()
+        response = self.stripe.post(event, signature='t=1,v1=deadbeef')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_duplicate_deliveries_are_stored_once(self):
+        event = self.succeeded()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.stripe.post(event).status_code, 200)
+        self.assertEqual(self.stripe.post(event).status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def test_worker_creates_payment_from_metadata(self):
+        self.stripe.post(self.succeeded(amount=2550))
+        call_command('process_stripe_events', stdout=StringIO())
+        payment = Payment.objects.get()
+        self.assertEqual(
+            (payment.status, payment.amount, payment.user, payment.animal),
+            ('succeeded', 25.5, self.user, self.animal),
+        )
+        self.assertIsNotNone(StripeEvent.objects.get().processed_at)
+        self.assertEqual(self.animal.donation_stats.donation_count, 1)
+
+    def test_worker_completes_pending_donation(self):
+        self.client.login(username='donor', password='testpass123')
+        self.client.post(reverse('payments:process_donation', args=[self.animal.slug]), {
+            'amount': '10', 'message': 'Go Lucky!', 'payment_intent_id': 'pi_1',
+        })
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.message), ('pending', 'Go Lucky!'))
+
+        self.stripe.post(self.succeeded())
+        process_events()
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.message), ('succeeded', 'Go Lucky!'))
+
+    def test_form_post_after_webhook_keeps_status(self):
+        self.stripe.post(self.succeeded())
+        process_events()
+        self.client.login(username='donor', password='testpass123')
+        self.client.post(reverse('payments:process_donation', args=[self.animal.slug]), {
+            'amount': '10', 'message': 'Hi', 'payment_intent_id': 'pi_1',
+        })
+        payment = Payment.objects.get()
+        self.assertEqual((payment.status, payment.message), ('succeeded', 'Hi'))
+
+    def test_out_of_order_events(self):
+        refund = self.stripe.event('charge.refunded', {
+            'id': 'ch_1', 'object': 'charge', 'payment_intent': 'pi_1', 'refunded': True})
+        self.stripe.post(self.succeeded())
+        self.stripe.post(refund)
+        self.stripe.post(self.stripe.event('payment_intent.payment_failed',
+                                           self.stripe.intent('pi_1')))
+        process_events()
+        self.assertEqual(Payment.objects.get().status, 'refunded')
+
+    def test_partial_refund_keeps_payment(self):
+        self.stripe.post(self.succeeded())
+        self.stripe.post(self.stripe.event('charge.refunded', {
+            'id': 'ch_1', 'object': 'charge', 'payment_intent': 'pi_1',
+            'amount': 1000, 'amount_refunded': 400, 'refunded': False}))
+        self.assertEqual(process_events(), (2, 0))
+        self.assertEqual(Payment.objects.get().status, 'succeeded')
+        self.assertEqual(self.animal.donation_stats.donation_count, 1)
+
+    def test_failing_events_are_retried_then_parked(self):
+        event = self.succeeded()
+        del event['data']['object']['amount_received']
+        self.stripe.post(event)
+        self.assertEqual(process_events(), (0, 1))
+        self.assertEqual(process_events(), (0, 0))  # not due yet
+
+        delays = []
+        for _ in range(2, MAX_ATTEMPTS + 1):
+            before = timezone.now()
+            StripeEvent.objects.update(next_attempt_at=before)
+            process_events()
+            stored = StripeEvent.objects.get()
+            delays.append(round((stored.next_attempt_at - before).total_seconds()))
+        self.assertEqual(delays, [60, 120, 240, 480])
+        StripeEvent.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(process_events(), (0, 0))  # parked
+        stored.refresh_from_db()
+        self.assertEqual(stored.attempts, MAX_ATTEMPTS)
+        self.assertIsNone(stored.processed_at)
+        self.assertIn('KeyError', stored.last_error)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_command_gets_past_failing_events(self):
+        bad = self.succeeded('pi_bad')
+        del bad['data']['object']['amount_received']
+        self.stripe.post(bad)
+        self.stripe.post(self.succeeded('pi_2'))
+        out = StringIO()
+        call_command('process_stripe_events', batch_size=1, stdout=out)
+        self.assertIn('Processed 1 events (1 failed, will retry)', out.getvalue())
+        self.assertEqual(Payment.objects.get().stripe_payment_intent_id, 'pi_2')
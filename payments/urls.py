@@ -5,6 +5,12 @@ app_name = 'payments'
 
 urlpatterns = [
     path('donate/<slug:animal_slug>/', views.create_donation, name='create_donation'),
+    path('donate/<slug:animal_slug>/amount/', views.update_donation_amount,
+         name='update_donation_amount'),
     path('process/<slug:animal_slug>/', views.process_donation, name='process_donation'),
     path('success/', views.payment_success, name='success'),
+    path('webhook/', views.stripe_webhook, name='stripe_webhook'),
+    path('moderation/', views.moderation_queue, name='moderation'),
+    path('moderation/decide/', views.moderate_messages, name='moderate_messages'),
+    path('export/', views.export_donations, name='export_donations'),
 ]
\ No newline at end of file
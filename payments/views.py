@@ -1,19 +1,33 @@
-import stripe
 from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse,
+)
+from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 from animals.models import Animal
+from animals.pagination import InvalidCursor
+from .export import FORMATS, InvalidFilter, export_lines, parse_filters
+from .intents import InvalidAmount, close_intent, intent_for, parse_amount
 from .models import Payment
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from .moderation import ACTIONS, moderate, moderation_page
+from .signals import payment_donor_changed
+from .gateway import GatewayError, InvalidSignature
+from .webhooks import receive_event
 
 
 @login_required
 def create_donation(request, animal_slug):
     """
-    Show donation form. PaymentIntent is created only when amount is selected.
+    Show donation form. A PaymentIntent is only needed once an amount
+    is selected, and the donor's open intent is reused (see
+    payments.intents).
     """
     animal = get_object_or_404(Animal, slug=animal_slug)
 
@@ -23,26 +37,14 @@ def create_donation(request, animal_slug):
 
     if selected_amount:
         try:
-            amount = float(selected_amount)
-            if amount >= 1:
-                # Create PaymentIntent with selected amount
-                amount_pence = int(amount * 100)
-                intent = stripe.PaymentIntent.create(
-                    amount=amount_pence,
-                    currency='gbp',
-                    metadata={
-                        'animal_id': animal.id,
-                        'user_id': request.user.id,
-                    },
-                    automatic_payment_methods={'enabled': True},
-                )
-                client_secret = intent.client_secret
-            else:
-                messages.error(request, 'Amount must be at least £1')
-                return redirect('payments:create_donation',
-                                animal_slug=animal_slug)
-        except (ValueError, TypeError):
-            messages.error(request, 'Invalid amount')
+            intent = intent_for(request.user, animal, parse_amount(selected_amount))
+            client_secret = intent.client_secret
+        except InvalidAmount as e:
+            messages.error(request, str(e))
+            return redirect('payments:create_donation',
+                            animal_slug=animal_slug)
+        except GatewayError as e:
+            messages.error(request, f'Payment error: {e.user_message}')
             return redirect('payments:create_donation',
                             animal_slug=animal_slug)
 
@@ -56,10 +58,34 @@ def create_donation(request, animal_slug):
     return render(request, 'payments/donation_form.html', context)
 
 
+@login_required
+@require_POST
+def update_donation_amount(request, animal_slug):
+    """
+    Change the amount of the donor's open intent without reloading the
+    form. Returns JSON: {"amount": "10.00", "client_secret": "..."}.
+    """
+    animal = get_object_or_404(Animal, slug=animal_slug)
+    try:
+        amount = parse_amount(request.POST.get('amount'))
+        intent = intent_for(request.user, animal, amount)
+    except InvalidAmount as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except GatewayError as e:
+        return JsonResponse({'error': e.user_message}, status=502)
+    return JsonResponse({'amount': str(intent.amount), 'client_secret': intent.client_secret})
+
+
 @login_required
 @require_POST
 def process_donation(request, animal_slug):
-    """Process the payment after Stripe.js confirmation"""
+    """
+    Record the donation after Stripe.js has confirmed the payment.
+
+    The payment is stored as pending with the donor's message. Its
+    final status and amount come from Stripe's webhook events (see
+    payments.webhooks), so no request to Stripe is made here.
+    """
     animal = get_object_or_404(Animal, slug=animal_slug)
 
     try:
@@ -67,31 +93,42 @@ def process_donation(request, animal_slug):
         amount = float(request.POST.get('amount', 0))
         message = request.POST.get('message', '').strip()
         payment_intent_id = request.POST.get('payment_intent_id')
- 
+
         if not payment_intent_id:
             messages.error(request, 'Payment information missing.')
             return redirect('payments:create_donation',
                             animal_slug=animal_slug)
- 
-        # Verify the payment succeeded
-        intent = stripe.PaymentIntent.retrieve(payment_intent_id)
-
-        if intent.status != 'succeeded':
-            messages.error(request, 'Payment was not successful.')
-            return redirect('payments:create_donation',
-                            animal_slug=animal_slug)
 
-        # Create payment record
-        payment = Payment.objects.create(
-            user=request.user,
-            animal=animal,
-            amount=amount,
-            email=request.user.email,
-            donor_name=request.user.get_full_name() or request.user.username,
-            message=message[:500],
+        # Keyed on the intent: a double submit, or the webhook worker
+        # getting there first, finds the existing row.
+        payment, created = Payment.objects.get_or_create(
             stripe_payment_intent_id=payment_intent_id,
-            status='succeeded'
+            defaults={
+                'user': request.user,
+                'animal': animal,
+                'amount': amount,
+                'email': request.user.email,
+                'donor_name': request.user.get_full_name() or request.user.username,
+                'message': message[:500],
+                'status': 'pending',
+            },
         )
+        if not created:
+            if payment.user_id not in (None, request.user.id):
+                messages.error(request, 'Payment information missing.')
+                return redirect('payments:create_donation',
+                                animal_slug=animal_slug)
+            previous_user_id = payment.user_id
+            payment.user = request.user
+            payment.email = payment.email or request.user.email
+            payment.donor_name = request.user.get_full_name() or request.user.username
+            payment.message = message[:500]
+            with transaction.atomic():
+                payment.save()
+                payment_donor_changed.send(
+                    sender=Payment, payment=payment, previous_user_id=previous_user_id,
+                )
+        close_intent(payment_intent_id)
 
         # Store in session for success page
         request.session['last_donation_id'] = payment.id
@@ -99,14 +136,25 @@ def process_donation(request, animal_slug):
 
         return redirect('payments:success')
 
-    except stripe.error.StripeError as e:
-        messages.error(request, f'Payment error: {e.user_message}')
-        return redirect('payments:create_donation', animal_slug=animal_slug)
     except Exception as e:
         messages.error(request, f'Error: {str(e)}')
         return redirect('payments:create_donation', animal_slug=animal_slug)
 
 
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """
+    Receive a Stripe webhook. The event is verified and queued only;
+    ``manage.py process_stripe_events`` applies it to payments.
+    """
+    try:
+        receive_event(request.body, request.headers.get('Stripe-Signature'))
+    except InvalidSignature:
+        return HttpResponseBadRequest()
+    return HttpResponse(status=200)
+
+
 @login_required
 def payment_success(request):
     """Show success page"""
@@ -134,3 +182,60 @@ def payment_success(request):
         del request.session['last_donation_ref']
 
     return render(request, 'payments/success.html', context)
+
+
+@staff_member_required
+def moderation_queue(request):
+    """Pending donor messages, oldest first, for bulk moderation."""
+    try:
+        page = moderation_page(
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+        payments = list(page)
+    except InvalidCursor:
+        raise Http404("Invalid page cursor.")
+    return render(request, 'payments/moderation_queue.html', {
+        'payments': payments,
+        'page': page,
+        'title': 'Message moderation',
+    })
+
+
+@staff_member_required
+@require_POST
+def moderate_messages(request):
+    """Approve or reject the selected messages in one UPDATE."""
+    action = request.POST.get('action')
+    if action not in ACTIONS:
+        return HttpResponseBadRequest()
+    ids = [value for value in request.POST.getlist('payment') if value.isdigit()]
+    changed = moderate(ids, action)
+    messages.success(request, f"{changed} message{'s' if changed != 1 else ''} {action}d.")
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = 'payments:moderation'
+    return redirect(next_url)
+
+
+@staff_member_required
+@require_GET
+def export_donations(request):
+    """
+    Stream donations as CSV or JSONL for finance. Filters: ``start`` and
+    ``end`` (inclusive dates) and ``status`` (comma-separated).
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f"format must be one of: {', '.join(FORMATS)}")
+    try:
+        filters = parse_filters(
+            request.GET.get('start'), request.GET.get('end'), request.GET.get('status'),
+        )
+    except InvalidFilter as error:
+        return HttpResponseBadRequest(str(error))
+
+    response = StreamingHttpResponse(export_lines(fmt, **filters), content_type=FORMATS[fmt])
+    filename = f"donations-{timezone.localdate():%Y%m%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
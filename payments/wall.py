@@ -0,0 +1,62 @@
+"""
+Approved donor messages ("supporters' wall") for the animal page.
+
+Pages are served newest-approved first from the
+(animal, message_status, message_approved_at) index with keyset
+pagination, so the thousandth page costs the same as the first. Each
+page is cached as plain dicts under the animal's detail version, which
+approving or rejecting a message bumps. Only succeeded donations are
+shown, so a refund or delete of a listed payment bumps it too.
+"""
+from django.core.cache import cache
+
+from animals.cache import animal_detail_key, get_version, invalidate_animal_detail
+from animals.pagination import KeysetPaginator
+
+PAGE_SIZE = 10
+CACHE_TIMEOUT = 60 * 60
+ORDERING = ('-message_approved_at', '-id')
+
+
+def approved_messages(animal_id):
+    from .models import Payment
+    return (
+        Payment.objects
+        .filter(animal_id=animal_id, message_status='approved', status='succeeded')
+        .exclude(message='')
+        .select_related('user')
+        .only('id', 'message', 'message_approved_at', 'donor_name',
+              'user__first_name', 'user__last_name')
+    )
+
+
+def message_wall(animal_id, after=None):
+    """
+    Return one page of the wall:
+        {'messages': [{'name', 'message', 'approved_at'}, ...],
+         'next_cursor': str or None}
+    Raises animals.pagination.InvalidCursor for a bad cursor.
+    """
+    version = get_version(animal_detail_key(animal_id))
+    key = f'payments:wall:{animal_id}:{version}:{after or ""}'
+    page = cache.get(key)
+    if page is None:
+        paginator = KeysetPaginator(approved_messages(animal_id), ORDERING, PAGE_SIZE)
+        rows = paginator.page(after=after)
+        page = {
+            'messages': [
+                {
+                    'name': payment.display_name,
+                    'message': payment.message,
+                    'approved_at': payment.message_approved_at,
+                }
+                for payment in rows
+            ],
+            'next_cursor': rows.next_cursor,
+        }
+        cache.set(key, page, CACHE_TIMEOUT)
+    return page
+
+
+def invalidate_wall(animal_ids):
+    invalidate_animal_detail(animal_ids)
@@ -0,0 +1,195 @@
+"""
+Stripe webhook ingestion.
+
+Receiving and processing are split:
+
+    receive_event()   called by the webhook view. Verifies the
+                      Stripe-Signature header and stores the event in
+                      the StripeEvent inbox with a single
+                      INSERT ... ON CONFLICT DO NOTHING, so duplicates
+                      from Stripe's at-least-once delivery are dropped.
+    process_events()  called by ``manage.py process_stripe_events``.
+                      Claims a batch of pending events
+                      (SKIP LOCKED where supported, so several workers
+                      can run), loads the affected payments in one
+                      query and applies each event in its own savepoint.
+                      A failing event is retried after an exponential
+                      backoff, and left alone after MAX_ATTEMPTS.
+
+Payments are matched on the (unique) PaymentIntent id. A succeeded
+intent with no Payment yet (the donor closed the tab before the form
+posted) is created from the intent's metadata with get_or_create, so a
+form post racing the worker cannot produce a second row; an intent
+whose payment was archived (payments.archive) is restored instead.
+Statuses only move forward
+(pending -> failed -> succeeded -> refunded), so events delivered out
+of order cannot undo a later state. A partial refund leaves the payment
+succeeded; only a fully refunded charge marks it refunded.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+MAX_ATTEMPTS = 5
+BATCH_SIZE = 100
+RETRY_DELAY = timedelta(seconds=30)  # doubled after every failed attempt
+
+STATUS_RANK = {'pending': 0, 'failed': 1, 'succeeded': 2, 'refunded': 3}
+
+# Event type -> Payment status it implies
+EVENT_STATUS = {
+    'payment_intent.succeeded': 'succeeded',
+    'payment_intent.payment_failed': 'failed',
+    'payment_intent.canceled': 'failed',
+    # Only once the whole charge is refunded, see apply_event()
+    'charge.refunded': 'refunded',
+}
+
+
+def receive_event(payload, signature):
+    """
+    Verify and store one webhook delivery.
+    Raises payments.gateway.InvalidSignature for a bad signature or body.
+    """
+    from .gateway import get_gateway
+    from .models import StripeEvent
+    event = get_gateway().parse_webhook(payload, signature)
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event['id'], type=event['type'], payload=event)],
+        ignore_conflicts=True,
+    )
+
+
+def intent_id(obj):
+    """PaymentIntent id of an intent or of a charge."""
+    if obj.get('object') == 'charge':
+        return obj.get('payment_intent')
+    return obj.get('id')
+
+
+def new_payment_fields(metadata, amount, email='', customer=''):
+    """Fields for a Payment known only from its intent (amount in pence)."""
+    from animals.models import Animal
+    from django.contrib.auth import get_user_model
+    user = get_user_model().objects.filter(pk=metadata.get('user_id') or None).first()
+    return {
+        'animal_id': Animal.objects.filter(
+            pk=metadata.get('animal_id') or None).values_list('pk', flat=True).first(),
+        'user': user,
+        'email': email or (user.email if user else ''),
+        'donor_name': (user.get_full_name() or user.username) if user else '',
+        'amount': Decimal(amount) / 100,
+        'stripe_customer_id': customer or '',
+    }
+
+
+def record_intent_status(key, status, amount=None, metadata=None, email='',
+                         customer='', payment=None):
+    """
+    Move the Payment for intent ``key`` forward to ``status``, creating
+    it from the intent's metadata if a succeeded intent has none.
+    ``payment`` is the already loaded row, if any. Returns the payment
+    (or None) and whether anything was written.
+    """
+    from .archive import restore
+    from .intents import close_intent
+    from .models import Payment
+
+    if status in ('succeeded', 'failed'):
+        # The donor may never have posted the form: stop offering the intent
+        close_intent(key)
+    if payment is None:
+        # A late event for an archived payment brings it back first
+        payment = restore(key)
+    if payment is None:
+        if status != 'succeeded':
+            return None, False
+        payment, created = Payment.objects.get_or_create(
+            stripe_payment_intent_id=key,
+            defaults={'status': status,
+                      **new_payment_fields(metadata or {}, amount, email, customer)},
+        )
+        if created:
+            return payment, True
+
+    if STATUS_RANK[status] <= STATUS_RANK.get(payment.status, 0):
+        return payment, False
+    payment.status = status
+    if status == 'succeeded':
+        payment.amount = Decimal(amount) / 100
+        payment.stripe_customer_id = customer or payment.stripe_customer_id
+    payment.save()
+    return payment, True
+
+
+def apply_event(event, payments):
+    """Apply one event to its Payment, creating it if needed."""
+    status = EVENT_STATUS.get(event.type)
+    obj = event.payload['data']['object']
+    key = intent_id(obj)
+    if status is None or not key:
+        return
+    if event.type == 'charge.refunded' and not obj.get('refunded'):
+        # Partial refund: the donation still stands
+        return
+
+    payment, _ = record_intent_status(
+        key, status,
+        amount=obj['amount_received'] if status == 'succeeded' else None,
+        metadata=obj.get('metadata'),
+        email=obj.get('receipt_email') or '',
+        customer=obj.get('customer') or '',
+        payment=payments.get(key),
+    )
+    if payment is not None:
+        payments[key] = payment
+
+
+def retry_delay(attempts):
+    return RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def process_events(batch_size=BATCH_SIZE):
+    """
+    Process one batch of due events. Returns (processed, failed); failed
+    events are retried after a backoff until they reach MAX_ATTEMPTS.
+    """
+    from .models import Payment, StripeEvent
+
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS,
+                    next_attempt_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        keys = {intent_id(event.payload['data']['object']) for event in events}
+        payments = Payment.objects.in_bulk(keys - {None}, field_name='stripe_payment_intent_id')
+
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    apply_event(event, payments)
+            except Exception as error:
+                event.last_error = f"{type(error).__name__}: {error}"
+                event.next_attempt_at = now + retry_delay(event.attempts)
+                # The savepoint was rolled back; forget any unsaved changes
+                key = intent_id(event.payload['data']['object'])
+                payments.pop(key, None)
+                payments.update(Payment.objects.in_bulk(
+                    [key], field_name='stripe_payment_intent_id'))
+            else:
+                event.processed_at = now
+                event.last_error = ''
+        StripeEvent.objects.bulk_update(
+            events, ['attempts', 'next_attempt_at', 'processed_at', 'last_error'])
+    processed = sum(1 for event in events if event.processed_at)
+    return processed, len(events) - processed